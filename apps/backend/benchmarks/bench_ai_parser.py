@@ -0,0 +1,81 @@
+"""
+Benchmark do EditalAIParser: extração serial vs. concorrente, e reparse com cache.
+
+Uso:
+    python -m benchmarks.bench_ai_parser --latencia 0.5 --repeticoes 5
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+# Mede só o caminho do LLM; o cache de texto extraído grava em MEDIA_ROOT
+os.environ.setdefault('EDITAL_TEXT_CACHE_ENABLED', 'False')
+
+import openai
+
+from benchmarks.fake_llm_server import FakeLLMServer
+from modules.oportunidades.services.ai_parser import EditalAIParser
+from modules.oportunidades.services.llm_cache import DiskLLMCache, LLMResponseCache
+
+TEXTO_EDITAL = (
+    "PREFEITURA MUNICIPAL DE EXEMPLO\n"
+    "Pregão Eletrônico nº 001/2024\n"
+    "Objeto: aquisição de material de escritório.\n"
+    "Item 1: caneta esferográfica azul quantidade: 1000 un\n"
+    "Documentos exigidos: certidão negativa de débitos.\n"
+) * 200
+
+
+def medir(parser: EditalAIParser, arquivo: str, repeticoes: int) -> list:
+    """Retorna os tempos de parse em segundos."""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = parser.parse_edital(arquivo)
+        tempos.append(time.perf_counter() - inicio)
+        assert resultado['sucesso'], resultado
+    return tempos
+
+
+def main():
+    parser_args = argparse.ArgumentParser(description=__doc__)
+    parser_args.add_argument('--latencia', type=float, default=0.5,
+                             help='Latência simulada por chamada ao LLM (s)')
+    parser_args.add_argument('--repeticoes', type=int, default=5)
+    args = parser_args.parse_args()
+
+    with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False) as f:
+        f.write(TEXTO_EDITAL)
+        arquivo = f.name
+
+    try:
+        with FakeLLMServer(latencia=args.latencia) as servidor, \
+                tempfile.TemporaryDirectory() as cache_dir:
+            client = openai.OpenAI(api_key='fake', base_url=servidor.base_url, max_retries=0)
+            sem_cache = LLMResponseCache(tipo='none')
+            disco = LLMResponseCache(backend=DiskLLMCache(cache_dir, ttl=3600, max_bytes=10**7))
+
+            cenarios = (
+                ('serial', False, sem_cache),
+                ('concorrente', True, sem_cache),
+                # A primeira repetição popula o cache; as demais simulam retries
+                ('cache', True, disco),
+            )
+            for nome, concorrente, cache in cenarios:
+                parser = EditalAIParser(openai_client=client, concorrente=concorrente, cache=cache)
+                tempos = medir(parser, arquivo, args.repeticoes)
+                print(
+                    f"{nome:>12}: média {statistics.mean(tempos):.3f}s "
+                    f"(min {min(tempos):.3f}s, max {max(tempos):.3f}s) "
+                    f"latência LLM {args.latencia:.3f}s"
+                )
+    finally:
+        os.unlink(arquivo)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""
+Benchmark do modo em lote do parser contra o substituto local da Batch API.
+
+Compara N editais processados pela API de chat (concorrente, um edital por vez)
+com os mesmos editais enviados pela Batch API.
+
+Uso:
+    python -m benchmarks.bench_batch_parser --editais 50 --latencia 0.2 --latencia-lote 2
+"""
+
+import argparse
+import os
+import time
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+os.environ.setdefault('EDITAL_TEXT_CACHE_ENABLED', 'False')
+
+import openai
+
+from benchmarks.bench_ai_parser import TEXTO_EDITAL
+from benchmarks.fake_llm_server import FakeLLMServer
+from modules.oportunidades.services.ai_parser import EditalAIParser
+from modules.oportunidades.services.batch_parser import EditalBatchParser, STATUS_EM_ANDAMENTO
+from modules.oportunidades.services.llm_cache import LLMResponseCache
+
+
+def main():
+    parser_args = argparse.ArgumentParser(description=__doc__)
+    parser_args.add_argument('--editais', type=int, default=50)
+    parser_args.add_argument('--latencia', type=float, default=0.2,
+                             help='Latência por chamada síncrona ao LLM (s)')
+    parser_args.add_argument('--latencia-lote', type=float, default=2.0,
+                             help='Tempo até o lote ficar pronto (s)')
+    args = parser_args.parse_args()
+
+    # Textos distintos para não colidir no plano do lote
+    documentos = {str(i): f"Edital {i}\n{TEXTO_EDITAL}" for i in range(args.editais)}
+
+    with FakeLLMServer(latencia=args.latencia, latencia_lote=args.latencia_lote) as servidor:
+        client = openai.OpenAI(api_key='fake', base_url=servidor.base_url, max_retries=0)
+        parser = EditalAIParser(openai_client=client, concorrente=True,
+                                cache=LLMResponseCache(tipo='none'))
+
+        inicio = time.perf_counter()
+        for conteudo in documentos.values():
+            prazo_final = time.monotonic() + parser.prazo_total
+            metadados, itens, documentos_exigidos = parser._extrair_concorrente(conteudo, prazo_final)
+            assert parser.montar_resultado(metadados, itens, documentos_exigidos)['sucesso']
+        sincrono = time.perf_counter() - inicio
+
+        lote = EditalBatchParser(parser)
+        inicio = time.perf_counter()
+        lotes = dict(lote.submeter(documentos))
+        while any(lote.status(batch_id) in STATUS_EM_ANDAMENTO for batch_id in lotes):
+            time.sleep(0.1)
+        resultados = {}
+        for batch_id, chaves in lotes.items():
+            resultados.update(lote.coletar(batch_id, {chave: documentos[chave] for chave in chaves}))
+        em_lote = time.perf_counter() - inicio
+
+        assert all(resultado['sucesso'] for resultado in resultados.values())
+        assert len(resultados) == len(documentos)
+
+    print(f"  síncrono: {sincrono:.2f}s para {args.editais} editais "
+          f"({args.editais / sincrono:.1f} editais/s)")
+    print(f"  em lote: {em_lote:.2f}s para {args.editais} editais "
+          f"({args.editais / em_lote:.1f} editais/s)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+"""
+Benchmark do match edital × tenants: laço unitário vs. API vetorizada.
+
+Usa tenants e editais sintéticos em memória (sem banco) e confere que as duas
+implementações dão o mesmo score para cada par. O laço unitário roda só
+sobre uma amostra de editais (``--amostra``), porque cada par consulta o
+índice de palavras-chave separadamente.
+
+Uso:
+    python -m benchmarks.bench_matcher --tenants 5000 --editais 200 --amostra 5
+"""
+
+import argparse
+import os
+import random
+import time
+from decimal import Decimal
+from types import SimpleNamespace
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+
+import numpy as np
+
+from modules.oportunidades.services.keywords import MotorKeywords, texto_perfil
+from modules.oportunidades.services.oportunidade_matcher import FeaturesTenants, OportunidadeMatcher
+from modules.oportunidades.services.regex_fallback import UFS
+
+PLANOS = ('free', 'basic', 'pro', 'enterprise')
+MUNICIPIOS = [f"Município {i}" for i in range(300)]
+CNAES = [f"{random.randint(1000000, 9999999)}" for _ in range(400)] + [
+    '4751201', '6201501', '6204000', '4321500', '8121400', '5620101', '4120400',
+    '4644301', '8011101', '4930202', '4761003', '7112000',
+]
+CATEGORIAS = ['Informática', 'Material de escritório', 'Limpeza', 'Obras', 'Medicamentos',
+              'Gêneros alimentícios', 'Vigilância', 'Transporte', 'Serviços gerais', None]
+PALAVRAS = [
+    'computador', 'notebook', 'impressora', 'toner', 'software', 'licença', 'servidor',
+    'rede', 'cabo', 'switch', 'cadeira', 'mesa', 'armário', 'papel', 'caneta', 'limpeza',
+    'detergente', 'vigilância', 'segurança', 'obra', 'pavimentação', 'asfalto', 'cimento',
+    'medicamento', 'seringa', 'luva', 'gaze', 'merenda', 'alimento', 'arroz', 'feijão',
+    'combustível', 'gasolina', 'diesel', 'pneu', 'veículo', 'ambulância', 'uniforme',
+] + [f"termo{i}" for i in range(2000)]
+
+
+def gerar_tenants(n: int):
+    return [
+        SimpleNamespace(
+            id=i,
+            uf=random.choice(UFS),
+            municipio=random.choice(MUNICIPIOS),
+            plan=random.choice(PLANOS),
+            cnae_principal=random.choice(CNAES),
+            cnae_secundarios=random.sample(CNAES, 3),
+            palavras_chave=random.sample(PALAVRAS, 8),
+            historico=[' '.join(random.sample(PALAVRAS, 6)) for _ in range(5)],
+        )
+        for i in range(1, n + 1)
+    ]
+
+
+def gerar_editais(n: int):
+    return [
+        SimpleNamespace(
+            uf=random.choice(UFS),
+            municipio=random.choice(MUNICIPIOS),
+            valor_estimado=random.choice([None, Decimal(random.randint(1000, 2000000))]),
+            objeto=' '.join(random.sample(PALAVRAS, 10)),
+            itens_extraidos=[
+                {'descricao': ' '.join(random.sample(PALAVRAS, 4)), 'categoria': random.choice(CATEGORIAS)}
+                for _ in range(30)
+            ],
+        )
+        for _ in range(n)
+    ]
+
+
+def main():
+    parser_args = argparse.ArgumentParser(description=__doc__)
+    parser_args.add_argument('--tenants', type=int, default=5000)
+    parser_args.add_argument('--editais', type=int, default=200)
+    parser_args.add_argument('--amostra', type=int, default=5)
+    args = parser_args.parse_args()
+
+    random.seed(42)
+    tenants = gerar_tenants(args.tenants)
+    editais = gerar_editais(args.editais)
+
+    inicio = time.perf_counter()
+    motor = MotorKeywords()
+    for t in tenants:
+        motor.definir_perfil(t.id, texto_perfil(t.palavras_chave, [t.cnae_principal], t.historico))
+    motor.pontuar([''], [])
+    tempo_indice = time.perf_counter() - inicio
+    matcher = OportunidadeMatcher(motor_keywords=motor)
+
+    amostra = editais[:args.amostra]
+    inicio = time.perf_counter()
+    unitario = np.array([[matcher.calcular_match_score(e, t) for t in tenants] for e in amostra])
+    tempo_unitario = (time.perf_counter() - inicio) * len(editais) / len(amostra)
+
+    inicio = time.perf_counter()
+    features = FeaturesTenants(
+        [t.id for t in tenants], [t.uf for t in tenants], [t.municipio for t in tenants],
+        [t.plan for t in tenants], [{t.cnae_principal, *t.cnae_secundarios} for t in tenants],
+    )
+    tempo_carga = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    matriz = matcher.calcular_matriz_scores(editais, features)
+    tempo_matriz = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    for edital in editais:
+        matcher.calcular_scores_lote(edital, features)
+    tempo_por_edital = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    motor.definir_perfil(tenants[0].id, texto_perfil(['notebook', 'servidor'], [], []))
+    matcher.calcular_scores_lote(editais[0], features)
+    tempo_incremental = time.perf_counter() - inicio
+
+    assert np.allclose(unitario, matriz[:len(amostra)]), "scores vetorizados divergem do cálculo unitário"
+
+    pares = args.editais * args.tenants
+    print(f"{args.editais} editais × {args.tenants} tenants ({pares} pares)")
+    print(f"  índice de palavras-chave: {tempo_indice * 1000:8.1f} ms")
+    print(f"  unitário (estimado):      {tempo_unitario * 1000:8.1f} ms")
+    print(f"  carga de features:        {tempo_carga * 1000:8.1f} ms")
+    print(f"  matriz:                   {tempo_matriz * 1000:8.1f} ms")
+    print(f"  lote por edital:          {tempo_por_edital * 1000:8.1f} ms")
+    print(f"  1 perfil alterado + 1 edital: {tempo_incremental * 1000:8.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+"""
+Benchmark do custo por requisição da classificação de rotas nos middlewares.
+
+Compara o teste anterior (``startswith`` em EXEMPT_URLS e depois em
+SUBSCRIPTION_REQUIRED_URLS, repetido por middleware) com a política de rotas
+compilada uma vez e classificada uma vez por requisição.
+
+Uso:
+    python -m benchmarks.bench_middleware --requisicoes 200000
+"""
+
+import argparse
+import os
+import statistics
+import time
+from types import SimpleNamespace
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+
+from django.conf import settings
+
+from core.users.route_policy import RouteClassifier, get_route_policy
+
+# Mistura típica: API autenticada, polling de status, páginas, health e admin
+CAMINHOS = [
+    '/api/oportunidades/editais/busca/',
+    '/api/users/status/',
+    '/api/users/profile/',
+    '/api/users/subscription/invoices/',
+    '/dashboard/',
+    '/oportunidades/123/',
+    '/health/',
+    '/metrics/',
+    '/admin/oportunidades/edital/',
+    '/api/docs/',
+    '/static/js/app.js',
+]
+
+
+EXEMPT_URLS = list(settings.ROUTE_POLICY_EXEMPT_PREFIXES)
+SUBSCRIPTION_REQUIRED_URLS = list(settings.ROUTE_POLICY_SUBSCRIPTION_PREFIXES)
+
+
+def precisa_assinatura_legado(path):
+    """Abordagem anterior: dois laços com startswith por requisição."""
+    if path.startswith('/api/auth/') or path.startswith('/api/health/'):
+        return False
+    for exempt_url in EXEMPT_URLS:
+        if path.startswith(exempt_url):
+            return False
+    for required_url in SUBSCRIPTION_REQUIRED_URLS:
+        if path.startswith(required_url):
+            return True
+    return False
+
+
+def requisicao_legado(path):
+    # SubscriptionAccessMiddleware, mais o teste de /api/ da resposta
+    precisa_assinatura_legado(path)
+    path.startswith('/api/')
+
+
+def requisicao_politica(classificador, request):
+    request.route_policy = classificador.classify(request.path_info)
+    # Os três middlewares leem a mesma política
+    get_route_policy(request).requires_subscription
+    get_route_policy(request).is_api
+    get_route_policy(request).track_activity
+
+
+def medir(funcao, entradas, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        for entrada in entradas:
+            funcao(entrada)
+        tempos.append(time.perf_counter() - inicio)
+    return statistics.median(tempos) / len(entradas) * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requisicoes', type=int, default=200_000)
+    parser.add_argument('--repeticoes', type=int, default=5)
+    args = parser.parse_args()
+
+    classificador = RouteClassifier(
+        settings.ROUTE_POLICY_EXEMPT_PREFIXES,
+        settings.ROUTE_POLICY_SUBSCRIPTION_PREFIXES,
+        settings.ROUTE_POLICY_UNTRACKED_PREFIXES,
+    )
+
+    # As duas abordagens precisam concordar em todos os caminhos
+    for path in CAMINHOS:
+        assert classificador.classify(path).requires_subscription == precisa_assinatura_legado(path), path
+
+    caminhos = (CAMINHOS * (args.requisicoes // len(CAMINHOS) + 1))[:args.requisicoes]
+    requests = [SimpleNamespace(path_info=path) for path in caminhos]
+
+    # Caminhos únicos (ids na URL) não aproveitam o cache de caminhos
+    unicos = [f"{CAMINHOS[i % len(CAMINHOS)]}{i}/" for i in range(args.requisicoes)]
+    requests_unicos = [SimpleNamespace(path_info=path) for path in unicos]
+
+    def politica(request):
+        requisicao_politica(classificador, request)
+
+    print(f"{len(CAMINHOS)} caminhos, {args.requisicoes} requisições, mediana de {args.repeticoes} repetições")
+    print(f"startswith (legado):             {medir(requisicao_legado, caminhos, args.repeticoes):8.0f} ns/requisição")
+    print(f"política, caminhos repetidos:    {medir(politica, requests, args.repeticoes):8.0f} ns/requisição")
+    print(f"política, caminhos únicos:       {medir(politica, requests_unicos, args.repeticoes):8.0f} ns/requisição")
+    print("(a política inclui a leitura pelos 3 middlewares)")
+
+
+if __name__ == '__main__':
+    main()
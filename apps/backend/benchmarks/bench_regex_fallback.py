@@ -0,0 +1,101 @@
+"""
+Benchmark do extrator por regras (fallback sem LLM) em editais de vários MB.
+
+Compara a varredura única com padrões pré-compilados contra a abordagem
+anterior (um ``re.search`` por campo, compilando o padrão a cada chamada).
+
+Uso:
+    python -m benchmarks.bench_regex_fallback --megabytes 8 --repeticoes 3
+"""
+
+import argparse
+import os
+import re
+import statistics
+import time
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+
+from modules.oportunidades.services import regex_fallback
+
+CAPA = (
+    "PREFEITURA MUNICIPAL DE EXEMPLO - SP\n"
+    "Município: Exemplo\n"
+    "Pregão Eletrônico nº 001/2024\n"
+    "Valor estimado: R$ 1.250.000,00\n"
+)
+
+CORPO = (
+    "12. DAS CONDIÇÕES GERAIS\n"
+    "O licitante deverá observar as cláusulas deste instrumento e seus anexos.\n"
+    "Item 1: caneta esferográfica azul quantidade: 1.000 un\n"
+    "Declaração de inexistência de fato impeditivo\n"
+    "Certificado de regularidade do FGTS\n"
+)
+
+
+def gerar_edital(megabytes: float) -> str:
+    repeticoes = int(megabytes * 1024 * 1024 / len(CORPO.encode('utf-8')))
+    return CAPA + CORPO * repeticoes
+
+
+def metadados_legado(conteudo: str) -> dict:
+    """Abordagem anterior: uma varredura completa por campo."""
+    metadados = {}
+    for campo, padrao in regex_fallback.PADROES_METADADOS.items():
+        match = re.search(padrao, conteudo, re.IGNORECASE)
+        if match:
+            metadados[campo] = match.group(campo).strip()
+    return metadados
+
+
+def documentos_legado(conteudo: str) -> list:
+    """Abordagem anterior: uma varredura completa por padrão de documento."""
+    padroes = [
+        r'(?:declaração|certificado|contrato|procuração)\s+(?:de\s+)?([^,\n]+)',
+        r'(?:documentos?\s+)?(?:exigidos?|necessários?)[:.]?[ \t]*([^:\n]+)',
+    ]
+    return [
+        match.group(1).strip()
+        for padrao in padroes
+        for match in re.finditer(padrao, conteudo, re.IGNORECASE)
+    ]
+
+
+def medir(funcao, conteudo: str, repeticoes: int) -> float:
+    tempos = []
+    for _ in range(repeticoes):
+        re.purge()
+        inicio = time.perf_counter()
+        funcao(conteudo)
+        tempos.append(time.perf_counter() - inicio)
+    return statistics.mean(tempos)
+
+
+def main():
+    parser_args = argparse.ArgumentParser(description=__doc__)
+    parser_args.add_argument('--megabytes', type=float, default=8)
+    parser_args.add_argument('--repeticoes', type=int, default=3)
+    args = parser_args.parse_args()
+
+    conteudo = gerar_edital(args.megabytes)
+    tamanho_mb = len(conteudo.encode('utf-8')) / (1024 * 1024)
+    # O pior caso para a varredura de metadados é um campo ausente
+    sem_valor = conteudo.replace('Valor estimado', 'Estimativa')
+
+    cenarios = (
+        ('metadados legado', metadados_legado, conteudo),
+        ('metadados varredura única', regex_fallback.extrair_metadados, conteudo),
+        ('metadados legado (campo ausente)', metadados_legado, sem_valor),
+        ('metadados única (campo ausente)', regex_fallback.extrair_metadados, sem_valor),
+        ('itens', regex_fallback.extrair_itens, conteudo),
+        ('documentos legado', documentos_legado, conteudo),
+        ('documentos varredura única', regex_fallback.extrair_documentos, conteudo),
+    )
+    for nome, funcao, texto in cenarios:
+        media = medir(funcao, texto, args.repeticoes)
+        print(f"{nome:>34}: {media * 1000:9.1f} ms  ({tamanho_mb / media:8.1f} MB/s)")
+
+
+if __name__ == '__main__':
+    main()
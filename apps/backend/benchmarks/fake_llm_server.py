@@ -0,0 +1,217 @@
+"""
+Servidor HTTP local que imita a API da OpenAI com latência configurável.
+
+Atende chat completions e um substituto das APIs de Files e Batches, para
+medir o parser (síncrono e em lote) sem gastar tokens.
+"""
+
+import json
+import threading
+import time
+import uuid
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+RESPOSTA_METADADOS = {
+    "numero": "001/2024",
+    "ano": 2024,
+    "objeto": "Aquisição de material de escritório",
+    "orgao": "Prefeitura Municipal de Exemplo",
+    "uf": "SP",
+    "municipio": "Exemplo",
+    "modalidade": "pregao_eletronico",
+    "valor_estimado": "150000.00",
+    "data_publicacao": "2024-01-10",
+    "data_abertura": "2024-01-25",
+    "data_encerramento": None,
+    "observacoes": None,
+}
+
+RESPOSTA_ITENS = [
+    {
+        "codigo": "1",
+        "descricao": "Caneta esferográfica azul",
+        "quantidade": "1000",
+        "unidade": "un",
+        "valor_unitario_estimado": "1.50",
+        "categoria": "material_escritorio",
+        "subcategoria": None,
+    }
+]
+
+RESPOSTA_DOCUMENTOS = [
+    {
+        "nome": "Certidão negativa de débitos",
+        "tipo": "certificado",
+        "descricao": None,
+        "obrigatorio": True,
+    }
+]
+
+
+def _resposta_para(prompt_sistema: str):
+    """Escolhe a resposta fake de acordo com o prompt de sistema enviado."""
+    if '"numero"' in prompt_sistema:
+        return RESPOSTA_METADADOS
+    if '"codigo"' in prompt_sistema:
+        return RESPOSTA_ITENS
+    return RESPOSTA_DOCUMENTOS
+
+
+def _chat_completion(corpo: dict) -> dict:
+    """Monta uma resposta de chat completion para o corpo da requisição."""
+    prompt_sistema = corpo.get('messages', [{}])[0].get('content', '')
+    conteudo = json.dumps(_resposta_para(prompt_sistema))
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": corpo.get('model', 'fake'),
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": conteudo},
+            "finish_reason": "stop",
+        }],
+        "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+    }
+
+
+class FakeLLMHandler(BaseHTTPRequestHandler):
+    """
+    Handler dos endpoints /v1/chat/completions, /v1/files e /v1/batches.
+
+    Um lote fica ``in_progress`` por ``latencia_lote`` segundos depois de criado;
+    a partir daí é reportado como ``completed`` com o arquivo de saída pronto.
+    """
+
+    latencia = 0.5
+    latencia_lote = 1.0
+
+    def do_POST(self):
+        tamanho = int(self.headers.get('Content-Length', 0))
+        corpo = self.rfile.read(tamanho)
+
+        if self.path.endswith('/chat/completions'):
+            time.sleep(self.latencia)
+            self._responder(_chat_completion(json.loads(corpo or b'{}')))
+        elif self.path.endswith('/files'):
+            self._responder(self._criar_arquivo(corpo))
+        elif self.path.endswith('/batches'):
+            self._responder(self._criar_lote(json.loads(corpo)))
+        else:
+            self._responder({"error": {"message": "not found"}}, status=404)
+
+    def do_GET(self):
+        partes = self.path.rstrip('/').split('/')
+        estado = self.server.estado
+
+        if len(partes) >= 2 and partes[-2] == 'batches':
+            lote = estado['lotes'].get(partes[-1])
+            if lote is None:
+                return self._responder({"error": {"message": "not found"}}, status=404)
+            return self._responder(self._atualizar_lote(lote))
+
+        if partes[-1] == 'content' and partes[-3] == 'files':
+            dados = estado['arquivos'].get(partes[-2])
+            if dados is None:
+                return self._responder({"error": {"message": "not found"}}, status=404)
+            return self._responder_bytes(dados, 'application/octet-stream')
+
+        self._responder({"error": {"message": "not found"}}, status=404)
+
+    def _criar_arquivo(self, corpo: bytes) -> dict:
+        """Recebe um upload multipart e guarda o conteúdo do campo ``file``."""
+        cabecalho = f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode()
+        mensagem = BytesParser(policy=HTTP).parsebytes(cabecalho + corpo)
+        dados = b''
+        for parte in mensagem.iter_parts():
+            if parte.get_param('name', header='content-disposition') == 'file':
+                dados = parte.get_payload(decode=True)
+
+        file_id = f"file-{uuid.uuid4().hex[:12]}"
+        self.server.estado['arquivos'][file_id] = dados
+        return {
+            "id": file_id, "object": "file", "bytes": len(dados),
+            "created_at": int(time.time()), "filename": "editais.jsonl",
+            "purpose": "batch", "status": "processed",
+        }
+
+    def _criar_lote(self, corpo: dict) -> dict:
+        batch_id = f"batch_{uuid.uuid4().hex[:12]}"
+        lote = {
+            "id": batch_id, "object": "batch", "endpoint": corpo['endpoint'],
+            "input_file_id": corpo['input_file_id'],
+            "completion_window": corpo['completion_window'],
+            "status": "in_progress", "output_file_id": None, "error_file_id": None,
+            "created_at": int(time.time()), "metadata": corpo.get('metadata'),
+            "_pronto_em": time.time() + self.latencia_lote,
+        }
+        self.server.estado['lotes'][batch_id] = lote
+        return self._publico(lote)
+
+    def _atualizar_lote(self, lote: dict) -> dict:
+        """Conclui o lote quando a latência simulada passou, gerando a saída."""
+        with self.server.trava:
+            if lote['status'] == 'in_progress' and time.time() >= lote['_pronto_em']:
+                entrada = self.server.estado['arquivos'][lote['input_file_id']]
+                linhas = []
+                for linha in entrada.decode('utf-8').splitlines():
+                    requisicao = json.loads(linha)
+                    linhas.append(json.dumps({
+                        "id": f"batch_req_{uuid.uuid4().hex[:12]}",
+                        "custom_id": requisicao['custom_id'],
+                        "response": {"status_code": 200, "request_id": "fake",
+                                     "body": _chat_completion(requisicao['body'])},
+                        "error": None,
+                    }))
+
+                output_id = f"file-{uuid.uuid4().hex[:12]}"
+                self.server.estado['arquivos'][output_id] = '\n'.join(linhas).encode('utf-8')
+                lote.update(status='completed', output_file_id=output_id,
+                            completed_at=int(time.time()))
+        return self._publico(lote)
+
+    @staticmethod
+    def _publico(lote: dict) -> dict:
+        return {chave: valor for chave, valor in lote.items() if not chave.startswith('_')}
+
+    def _responder(self, payload, status=200):
+        self._responder_bytes(json.dumps(payload).encode('utf-8'), 'application/json', status)
+
+    def _responder_bytes(self, dados: bytes, content_type: str, status=200):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(dados)))
+        self.end_headers()
+        self.wfile.write(dados)
+
+    def log_message(self, format, *args):
+        """Silencia o log de acesso."""
+
+
+class FakeLLMServer:
+    """Sobe o servidor fake em uma thread e expõe a base_url para o cliente."""
+
+    def __init__(self, latencia: float = 0.5, latencia_lote: float = 1.0, handler=FakeLLMHandler):
+        handler_cls = type('Handler', (handler,), {
+            'latencia': latencia,
+            'latencia_lote': latencia_lote,
+        })
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), handler_cls)
+        self.httpd.estado = {'arquivos': {}, 'lotes': {}}
+        self.httpd.trava = threading.Lock()
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address
+        return f"http://{host}:{port}/v1"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
@@ -23,6 +23,26 @@ app.conf.beat_schedule = {
         'task': 'modules.oportunidades.tasks.processar_editais_pendentes',
         'schedule': 300.0,  # 5 minutos
     },
+    'indexar-busca-editais': {
+        'task': 'modules.oportunidades.tasks.indexar_busca_editais',
+        'schedule': 3600.0,  # 1 hora
+    },
+    'criar-particoes-editais': {
+        'task': 'modules.oportunidades.tasks.criar_particoes_editais',
+        'schedule': 86400.0,  # 1 dia
+    },
+    'reconstruir-indice-tenants': {
+        'task': 'modules.oportunidades.tasks.reconstruir_indice_tenants',
+        'schedule': 86400.0,  # 1 dia
+    },
+    'flush-user-activity': {
+        'task': 'core.users.tasks.flush_user_activity',
+        'schedule': 60.0,  # 1 minuto
+    },
+    'process-pending-stripe-events': {
+        'task': 'core.users.tasks.process_pending_stripe_events',
+        'schedule': 300.0,  # 5 minutos
+    },
     'enviar-lembretes-cobranca': {
         'task': 'modules.financeiro.tasks.enviar_lembretes_cobranca',
         'schedule': 3600.0,  # 1 hora
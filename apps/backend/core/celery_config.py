@@ -17,7 +17,12 @@ CELERY_TASK_ANNOTATIONS = {
 # Configurações de rate limiting
 CELERY_TASK_ROUTES = {
     'modules.oportunidades.tasks.processar_edital_task': {'queue': 'edital_processing'},
+    'modules.oportunidades.tasks.submeter_lote_editais': {'queue': 'edital_processing'},
+    'modules.oportunidades.tasks.acompanhar_lote_editais': {'queue': 'edital_processing'},
     'modules.oportunidades.tasks.criar_oportunidades_para_tenants': {'queue': 'oportunidade_creation'},
+    'modules.oportunidades.tasks.criar_oportunidades_shard': {'queue': 'oportunidade_creation'},
+    'modules.oportunidades.tasks.agregar_oportunidades_edital': {'queue': 'oportunidade_creation'},
+    'modules.oportunidades.tasks.casar_tenant_com_editais_abertos': {'queue': 'oportunidade_creation'},
     'modules.documentos.tasks.gerar_documento_task': {'queue': 'document_generation'},
     'modules.financeiro.tasks.enviar_lembretes_cobranca': {'queue': 'notifications'},
 }
@@ -27,6 +27,7 @@ SHARED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'django.contrib.sites',
+    'django.contrib.postgres',
     
     # Third party apps
     'rest_framework',
@@ -77,6 +78,7 @@ MIDDLEWARE = [
     'django_prometheus.middleware.PrometheusAfterMiddleware',
     
     # Middlewares customizados
+    'core.users.route_policy.RoutePolicyMiddleware',
     'core.users.middleware.SubscriptionAccessMiddleware',
     'core.users.middleware.TrialExpirationMiddleware',
     'core.users.middleware.UserActivityMiddleware',
@@ -182,6 +184,40 @@ REST_FRAMEWORK = {
     ),
 }
 
+# Política de rotas dos middlewares customizados (prefixos de path_info)
+# Prefixos isentos têm precedência sobre os que exigem assinatura
+ROUTE_POLICY_EXEMPT_PREFIXES = [
+    '/auth/login/',
+    '/auth/register/',
+    '/auth/password-reset/',
+    '/auth/password-reset/confirm/',
+    '/subscription/webhook/',
+    '/health/',
+    '/admin/',
+    '/api/docs/',
+    '/api/redoc/',
+    '/api/auth/',
+    '/api/health/',
+]
+ROUTE_POLICY_SUBSCRIPTION_PREFIXES = [
+    '/api/',
+    '/dashboard/',
+    '/oportunidades/',
+    '/precificacao/',
+    '/contratos/',
+    '/financeiro/',
+    '/documentos/',
+]
+ROUTE_POLICY_UNTRACKED_PREFIXES = ['/health/', '/metrics/']  # sem registro de atividade
+
+# Cache da decisão de acesso por assinatura (expira antes na próxima fronteira de estado)
+SUBSCRIPTION_ACCESS_CACHE_TTL = config('SUBSCRIPTION_ACCESS_CACHE_TTL', default=3600, cast=int)
+
+# Atividade de usuários (write-behind no Redis)
+USER_ACTIVITY_REDIS_ALIAS = config('USER_ACTIVITY_REDIS_ALIAS', default='default')
+USER_ACTIVITY_WINDOW = config('USER_ACTIVITY_WINDOW', default=60, cast=int)  # segundos; no máximo uma escrita por usuário
+USER_ACTIVITY_FLUSH_BATCH_SIZE = config('USER_ACTIVITY_FLUSH_BATCH_SIZE', default=1000, cast=int)
+
 # JWT Settings
 from datetime import timedelta
 SIMPLE_JWT = {
@@ -238,6 +274,14 @@ CACHES = {
         'OPTIONS': {
             'CLIENT_CLASS': 'django_redis.client.DefaultClient',
         }
+    },
+    # Respostas do LLM do parser: banco separado das sessões, tamanho limitado pela aplicação
+    'llm': {
+        'BACKEND': 'django_redis.cache.RedisCache',
+        'LOCATION': config('EDITAL_LLM_CACHE_REDIS_URL', default=f'redis://{REDIS_HOST}:{REDIS_PORT}/1'),
+        'OPTIONS': {
+            'CLIENT_CLASS': 'django_redis.client.DefaultClient',
+        }
     }
 }
 
@@ -291,6 +335,68 @@ LOGGING = {
 # AI Services
 OPENAI_API_KEY = config('OPENAI_API_KEY', default='')
 ANTHROPIC_API_KEY = config('ANTHROPIC_API_KEY', default='')
+OPENAI_BASE_URL = config('OPENAI_BASE_URL', default='')
+OPENAI_MODEL = config('OPENAI_MODEL', default='gpt-4')
+
+# Parsing de editais
+EDITAL_PARSER_CONCURRENT = config('EDITAL_PARSER_CONCURRENT', default=True, cast=bool)
+EDITAL_PARSER_LLM_TIMEOUT = config('EDITAL_PARSER_LLM_TIMEOUT', default=60.0, cast=float)
+EDITAL_PARSER_LLM_MAX_RETRIES = config('EDITAL_PARSER_LLM_MAX_RETRIES', default=2, cast=int)
+EDITAL_PARSER_DEADLINE = config('EDITAL_PARSER_DEADLINE', default=300.0, cast=float)
+EDITAL_PARSER_CHUNK_SIZE = config('EDITAL_PARSER_CHUNK_SIZE', default=4000, cast=int)
+EDITAL_PARSER_CHUNK_WORKERS = config('EDITAL_PARSER_CHUNK_WORKERS', default=8, cast=int)  # chamadas ao LLM simultâneas por edital
+EDITAL_PDF_WORKERS = config('EDITAL_PDF_WORKERS', default=os.cpu_count() or 1, cast=int)
+EDITAL_PDF_PAGES_PER_TASK = config('EDITAL_PDF_PAGES_PER_TASK', default=8, cast=int)
+EDITAL_TEXT_CACHE_ENABLED = config('EDITAL_TEXT_CACHE_ENABLED', default=True, cast=bool)
+EDITAL_PERSIST_BATCH_SIZE = config('EDITAL_PERSIST_BATCH_SIZE', default=1000, cast=int)
+OPORTUNIDADE_UPSERT_BATCH_SIZE = config('OPORTUNIDADE_UPSERT_BATCH_SIZE', default=1000, cast=int)
+OPORTUNIDADE_SHARD_SIZE = config('OPORTUNIDADE_SHARD_SIZE', default=2000, cast=int)  # tenants por shard do fan-out
+OPORTUNIDADE_REVERSO_BLOCO = config('OPORTUNIDADE_REVERSO_BLOCO', default=2000, cast=int)  # editais por bloco no match reverso
+OPORTUNIDADE_RESCORE_CHUNK_SIZE = config('OPORTUNIDADE_RESCORE_CHUNK_SIZE', default=2000, cast=int)
+OPORTUNIDADE_PREFILTRO = config('OPORTUNIDADE_PREFILTRO', default=True, cast=bool)  # poda pelo índice de tenants
+OPORTUNIDADE_INDICE_ALIAS = config('OPORTUNIDADE_INDICE_ALIAS', default='default')
+EDITAL_BUSCA_CONFIG = config('EDITAL_BUSCA_CONFIG', default='portuguese_unaccent')  # criada na migração 0004 de oportunidades
+EDITAL_PARTICOES_MESES_FUTUROS = config('EDITAL_PARTICOES_MESES_FUTUROS', default=3, cast=int)
+EDITAL_RETENCAO_DIAS = config('EDITAL_RETENCAO_DIAS', default=730, cast=int)
+EDITAL_RETENCAO_LOTE = config('EDITAL_RETENCAO_LOTE', default=500, cast=int)  # editais por lote de exclusão
+EDITAL_RETENCAO_PAUSA = config('EDITAL_RETENCAO_PAUSA', default=0.5, cast=float)  # segundos entre lotes
+EDITAL_RETENCAO_LOCK_TIMEOUT_MS = config('EDITAL_RETENCAO_LOCK_TIMEOUT_MS', default=2000, cast=int)
+EDITAL_RETENCAO_ARQUIVAR = config('EDITAL_RETENCAO_ARQUIVAR', default=True, cast=bool)  # pacotes JSONL em editais/arquivo/
+EDITAL_MIDIA_CARENCIA_HORAS = config('EDITAL_MIDIA_CARENCIA_HORAS', default=24, cast=int)
+
+# Índice TF-IDF de palavras-chave do matching
+KEYWORDS_SYNC_INTERVAL = config('KEYWORDS_SYNC_INTERVAL', default=60, cast=int)  # segundos
+KEYWORDS_COSSENO_REFERENCIA = config('KEYWORDS_COSSENO_REFERENCIA', default=0.3, cast=float)  # cosseno que vale score 1
+KEYWORDS_MAX_TERMOS = config('KEYWORDS_MAX_TERMOS', default=10, cast=int)  # termos gravados em keywords_match
+
+# Afinidade CNAE × categoria de item (vazio = tabela versionada em modules/oportunidades/data)
+CNAE_AFINIDADE_ARQUIVO = config('CNAE_AFINIDADE_ARQUIVO', default='')
+
+# Fila de ingestão: reivindicação com SKIP LOCKED e lote adaptativo
+EDITAL_CLAIM_CAPACITY = config('EDITAL_CLAIM_CAPACITY', default=4, cast=int)  # slots de worker em edital_processing
+EDITAL_CLAIM_MIN_BATCH = config('EDITAL_CLAIM_MIN_BATCH', default=10, cast=int)
+EDITAL_CLAIM_MAX_BATCH = config('EDITAL_CLAIM_MAX_BATCH', default=500, cast=int)
+EDITAL_CLAIM_INTERVAL = config('EDITAL_CLAIM_INTERVAL', default=300, cast=int)  # segundos entre ciclos do beat
+EDITAL_CLAIM_DEFAULT_DURATION = config('EDITAL_CLAIM_DEFAULT_DURATION', default=60, cast=int)  # segundos por edital
+EDITAL_CLAIM_LEASE = config('EDITAL_CLAIM_LEASE', default=1800, cast=int)  # segundos em processando
+
+# Processamento em lote (Batch API) para backfills
+EDITAL_BATCH_ENABLED = config('EDITAL_BATCH_ENABLED', default=False, cast=bool)
+EDITAL_BATCH_MIN_EDITAIS = config('EDITAL_BATCH_MIN_EDITAIS', default=200, cast=int)
+EDITAL_BATCH_MAX_EDITAIS = config('EDITAL_BATCH_MAX_EDITAIS', default=2000, cast=int)
+EDITAL_BATCH_POLL_INTERVAL = config('EDITAL_BATCH_POLL_INTERVAL', default=300, cast=int)  # segundos
+EDITAL_BATCH_GROUP_SIZE = config('EDITAL_BATCH_GROUP_SIZE', default=50, cast=int)  # editais lidos por reivindicação
+EDITAL_BATCH_MAX_REQUESTS = config('EDITAL_BATCH_MAX_REQUESTS', default=50_000, cast=int)  # linhas por arquivo (limite da API)
+EDITAL_BATCH_MAX_BYTES = config('EDITAL_BATCH_MAX_BYTES', default=190 * 1024 * 1024, cast=int)  # arquivo < 200 MB
+EDITAL_BATCH_LEASE = config('EDITAL_BATCH_LEASE', default=26 * 3600, cast=int)  # segundos em lote (janela de 24h + folga)
+
+# Cache de respostas do LLM: 'redis', 'disk' ou 'none'
+EDITAL_LLM_CACHE_BACKEND = config('EDITAL_LLM_CACHE_BACKEND', default='redis')
+EDITAL_LLM_CACHE_ALIAS = config('EDITAL_LLM_CACHE_ALIAS', default='llm')
+EDITAL_LLM_CACHE_MAX_ENTRIES = config('EDITAL_LLM_CACHE_MAX_ENTRIES', default=100_000, cast=int)  # LRU no backend redis
+EDITAL_LLM_CACHE_TTL = config('EDITAL_LLM_CACHE_TTL', default=30 * 24 * 3600, cast=int)  # 30 dias
+EDITAL_LLM_CACHE_DIR = config('EDITAL_LLM_CACHE_DIR', default=str(BASE_DIR / 'cache' / 'llm'))
+EDITAL_LLM_CACHE_MAX_BYTES = config('EDITAL_LLM_CACHE_MAX_BYTES', default=512 * 1024 * 1024, cast=int)
 
 # Document Generation
 WEASYPRINT_BASE_URL = config('WEASYPRINT_BASE_URL', default='http://localhost:3000')
@@ -318,6 +424,9 @@ LOGS_DIR.mkdir(exist_ok=True)
 STRIPE_PUBLISHABLE_KEY = config('STRIPE_PUBLISHABLE_KEY', default='pk_test_...')
 STRIPE_SECRET_KEY = config('STRIPE_SECRET_KEY', default='sk_test_...')
 STRIPE_WEBHOOK_SECRET = config('STRIPE_WEBHOOK_SECRET', default='whsec_...')
+STRIPE_EVENT_MAX_ATTEMPTS = config('STRIPE_EVENT_MAX_ATTEMPTS', default=10, cast=int)
+STRIPE_EVENT_RETRY_DELAY = config('STRIPE_EVENT_RETRY_DELAY', default=60, cast=int)  # segundos
+STRIPE_EVENT_CLAIM_TIMEOUT = config('STRIPE_EVENT_CLAIM_TIMEOUT', default=300, cast=int)  # segundos; depois disso um evento 'processing' pode ser retomado
 STRIPE_PRICE_ID = config('STRIPE_PRICE_ID', default='price_...')
 
 # Configurações de Billing
@@ -24,7 +24,7 @@ class TenantAdmin(admin.ModelAdmin):
             'fields': ('name', 'cnpj', 'razao_social', 'nome_fantasia')
         }),
         ('Segmentos', {
-            'fields': ('cnae_principal', 'cnae_secundarios')
+            'fields': ('cnae_principal', 'cnae_secundarios', 'palavras_chave')
         }),
         ('Localização', {
             'fields': ('uf', 'municipio', 'cep', 'endereco')
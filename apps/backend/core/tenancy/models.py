@@ -40,6 +40,7 @@ class Tenant(TenantMixin):
     # Segmentos de atuação
     cnae_principal = models.CharField('CNAE Principal', max_length=7)
     cnae_secundarios = models.JSONField('CNAEs Secundários', default=list, blank=True)
+    palavras_chave = models.JSONField('Palavras-chave', default=list, blank=True)
     
     # Localização
     uf = models.CharField('UF', max_length=2)
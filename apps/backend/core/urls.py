@@ -36,3 +36,8 @@ if settings.DEBUG:
 urlpatterns += [
     path('api/users/', include('core.users.urls')),
 ]
+
+# URLs de oportunidades
+urlpatterns += [
+    path('api/oportunidades/', include('modules.oportunidades.urls')),
+]
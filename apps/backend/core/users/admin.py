@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from .models import User, UserSession, UserAuditLog, Subscription, Invoice
+from .models import User, UserSession, UserAuditLog, Subscription, Invoice, StripeEvent
 
 @admin.register(User)
 class CustomUserAdmin(UserAdmin):
@@ -91,3 +91,11 @@ class UserAuditLogAdmin(admin.ModelAdmin):
     search_fields = ('user__email', 'action', 'model_name')
     ordering = ('-timestamp',)
     readonly_fields = ('timestamp',)
+
+@admin.register(StripeEvent)
+class StripeEventAdmin(admin.ModelAdmin):
+    list_display = ('id', 'type', 'customer_id', 'status', 'attempts', 'stripe_created_at', 'processed_at')
+    list_filter = ('status', 'type', 'received_at')
+    search_fields = ('id', 'customer_id')
+    ordering = ('-received_at',)
+    readonly_fields = ('received_at', 'claimed_at', 'processed_at')
@@ -7,3 +7,6 @@ class UsersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core.users'
     verbose_name = 'Usuários'
+    
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,37 @@
+# Generated by Django 4.2 on 2026-10-17 00:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_billing_extensions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StripeEvent',
+            fields=[
+                ('id', models.CharField(max_length=255, primary_key=True, serialize=False, verbose_name='ID do Evento')),
+                ('type', models.CharField(max_length=100, verbose_name='Tipo')),
+                ('customer_id', models.CharField(blank=True, max_length=100, verbose_name='Stripe Customer ID')),
+                ('payload', models.JSONField(verbose_name='Payload')),
+                ('status', models.CharField(choices=[('pending', 'Pendente'), ('processed', 'Processado'), ('failed', 'Falhou')], default='pending', max_length=20, verbose_name='Status')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='Tentativas')),
+                ('last_error', models.TextField(blank=True, verbose_name='Último Erro')),
+                ('stripe_created_at', models.DateTimeField(verbose_name='Criado no Stripe')),
+                ('received_at', models.DateTimeField(auto_now_add=True, verbose_name='Recebido em')),
+                ('processed_at', models.DateTimeField(blank=True, null=True, verbose_name='Processado em')),
+            ],
+            options={
+                'verbose_name': 'Evento Stripe',
+                'verbose_name_plural': 'Eventos Stripe',
+                'db_table': 'stripe_events',
+                'indexes': [
+                    models.Index(fields=['customer_id', 'status', 'stripe_created_at'], name='stripe_evt_customer_idx'),
+                    models.Index(fields=['status', 'received_at'], name='stripe_evt_status_idx'),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2 on 2026-10-17 00:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_stripe_event'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='stripeevent',
+            name='claimed_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Em processamento desde'),
+        ),
+        migrations.AlterField(
+            model_name='stripeevent',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pendente'), ('processing', 'Processando'), ('processed', 'Processado'), ('failed', 'Falhou')], default='pending', max_length=20, verbose_name='Status'),
+        ),
+    ]
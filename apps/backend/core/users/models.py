@@ -157,6 +157,13 @@ class User(AbstractUser):
             return False
         return timezone.now() <= self.data_fim_teste
     
+    @property
+    def days_until_trial_end(self):
+        """Retorna dias até o fim do teste (0 fora do período de teste)"""
+        if not self.is_in_trial_period:
+            return 0
+        return max(0, (self.data_fim_teste - timezone.now()).days)
+    
     @property
     def has_active_access(self):
         """Verifica se o usuário tem acesso ativo (teste ou plano)"""
@@ -435,3 +442,41 @@ class Invoice(models.Model):
         if not self.due_date:
             return False
         return not self.is_paid and timezone.now() > self.due_date
+
+class StripeEvent(models.Model):
+    """Log de eventos recebidos do Stripe (chave: id do evento, para deduplicação)"""
+    
+    STATUS_CHOICES = [
+        ('pending', 'Pendente'),
+        ('processing', 'Processando'),
+        ('processed', 'Processado'),
+        ('failed', 'Falhou'),
+    ]
+    
+    id = models.CharField('ID do Evento', max_length=255, primary_key=True)
+    type = models.CharField('Tipo', max_length=100)
+    customer_id = models.CharField('Stripe Customer ID', max_length=100, blank=True)
+    payload = models.JSONField('Payload')
+    
+    # Processamento
+    status = models.CharField('Status', max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField('Tentativas', default=0)
+    last_error = models.TextField('Último Erro', blank=True)
+    claimed_at = models.DateTimeField('Em processamento desde', null=True, blank=True)
+    
+    # Datas
+    stripe_created_at = models.DateTimeField('Criado no Stripe')
+    received_at = models.DateTimeField('Recebido em', auto_now_add=True)
+    processed_at = models.DateTimeField('Processado em', null=True, blank=True)
+    
+    class Meta:
+        verbose_name = 'Evento Stripe'
+        verbose_name_plural = 'Eventos Stripe'
+        db_table = 'stripe_events'
+        indexes = [
+            models.Index(fields=['customer_id', 'status', 'stripe_created_at'], name='stripe_evt_customer_idx'),
+            models.Index(fields=['status', 'received_at'], name='stripe_evt_status_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.type} ({self.id}) - {self.status}"
@@ -0,0 +1,92 @@
+"""
+Política de rotas para os middlewares customizados.
+
+Os prefixos de URL vêm das settings e são compilados uma única vez em uma
+alternância de regex ancorada. Cada requisição é classificada uma vez (pelo
+RoutePolicyMiddleware) e a política fica em ``request.route_policy`` para
+SubscriptionAccessMiddleware, TrialExpirationMiddleware e UserActivityMiddleware.
+"""
+import re
+from collections import namedtuple
+from django.conf import settings
+from django.utils.deprecation import MiddlewareMixin
+
+RoutePolicy = namedtuple('RoutePolicy', ['requires_subscription', 'is_api', 'track_activity'])
+
+class RouteClassifier:
+    """Classifica caminhos de URL em políticas pré-construídas"""
+
+    def __init__(self, exempt_prefixes, subscription_prefixes, untracked_prefixes=(),
+                 api_prefix='/api/', cache_size=4096):
+        # Isentas vêm antes na alternância: têm precedência, como no teste antigo com startswith
+        groups = [
+            ('exempt', exempt_prefixes),
+            ('subscription', subscription_prefixes),
+        ]
+        alternatives = [
+            f"(?P<{name}>{'|'.join(map(re.escape, sorted(prefixes, key=len, reverse=True)))})"
+            for name, prefixes in groups if prefixes
+        ]
+        self._pattern = re.compile('|'.join(alternatives)) if alternatives else None
+        self._untracked = tuple(untracked_prefixes)
+        self._api_prefix = api_prefix
+
+        # Todas as combinações possíveis são instanciadas uma vez
+        self._policies = {
+            (requires, is_api, track): RoutePolicy(requires, is_api, track)
+            for requires in (False, True) for is_api in (False, True) for track in (False, True)
+        }
+
+        # Caminhos repetidos (polling, listagens) saem de um dicionário limitado
+        self._cache = {}
+        self._cache_size = cache_size
+
+    def _classify(self, path):
+        match = self._pattern.match(path) if self._pattern else None
+        requires = match is not None and match.lastgroup == 'subscription'
+        track = not (self._untracked and path.startswith(self._untracked))
+        return self._policies[(requires, path.startswith(self._api_prefix), track)]
+
+    def classify(self, path):
+        """Retorna a política do caminho"""
+        policy = self._cache.get(path)
+        if policy is None:
+            policy = self._classify(path)
+            if len(self._cache) >= self._cache_size:
+                self._cache.clear()
+            self._cache[path] = policy
+        return policy
+
+_classifier = None
+
+def get_classifier():
+    """Classificador do processo, construído a partir das settings no primeiro uso"""
+    global _classifier
+    if _classifier is None:
+        _classifier = RouteClassifier(
+            settings.ROUTE_POLICY_EXEMPT_PREFIXES,
+            settings.ROUTE_POLICY_SUBSCRIPTION_PREFIXES,
+            settings.ROUTE_POLICY_UNTRACKED_PREFIXES,
+        )
+    return _classifier
+
+def get_route_policy(request):
+    """Retorna a política da requisição, classificando se ainda não foi feito"""
+    policy = getattr(request, 'route_policy', None)
+    if policy is None:
+        policy = request.route_policy = get_classifier().classify(request.path_info)
+    return policy
+
+class RoutePolicyMiddleware(MiddlewareMixin):
+    """
+    Middleware que classifica a rota uma vez e anexa a política à requisição
+    """
+
+    def __init__(self, get_response=None):
+        super().__init__(get_response)
+        # Constrói (e valida) o classificador na inicialização do servidor
+        get_classifier()
+
+    def process_request(self, request):
+        get_route_policy(request)
+        return None
@@ -2,6 +2,7 @@ from rest_framework import serializers
 from django.contrib.auth import authenticate
 from django.contrib.auth.password_validation import validate_password
 from .models import User, Subscription
+from .services.access_service import AccessSnapshot, get_access_snapshot
 from datetime import timedelta
 from django.utils import timezone
 
@@ -53,9 +54,9 @@ class UserLoginSerializer(serializers.Serializer):
         return attrs
 
 class UserSerializer(serializers.ModelSerializer):
-    subscription_status = serializers.ReadOnlyField()
-    is_in_trial_period = serializers.ReadOnlyField()
-    has_active_access = serializers.ReadOnlyField()
+    subscription_status = serializers.SerializerMethodField()
+    is_in_trial_period = serializers.SerializerMethodField()
+    has_active_access = serializers.SerializerMethodField()
     days_until_trial_end = serializers.SerializerMethodField()
     days_until_subscription_end = serializers.SerializerMethodField()
     
@@ -70,17 +71,31 @@ class UserSerializer(serializers.ModelSerializer):
         )
         read_only_fields = ('id', 'created_at', 'subscription_status', 'is_in_trial_period', 'has_active_access')
     
+    def _snapshot(self, obj):
+        """Snapshot de acesso da requisição (ou um por usuário, sem requisição no contexto)"""
+        request = self.context.get('request')
+        if request is not None:
+            return get_access_snapshot(request, obj)
+        
+        snapshots = self.__dict__.setdefault('_snapshots', {})
+        if obj.pk not in snapshots:
+            snapshots[obj.pk] = AccessSnapshot(obj)
+        return snapshots[obj.pk]
+    
+    def get_subscription_status(self, obj):
+        return self._snapshot(obj).subscription_status
+    
+    def get_is_in_trial_period(self, obj):
+        return self._snapshot(obj).is_in_trial_period
+    
+    def get_has_active_access(self, obj):
+        return self._snapshot(obj).has_active_access
+    
     def get_days_until_trial_end(self, obj):
-        if obj.data_fim_teste and obj.is_in_trial_period:
-            delta = obj.data_fim_teste - timezone.now()
-            return max(0, delta.days)
-        return 0
+        return self._snapshot(obj).days_until_trial_end
     
     def get_days_until_subscription_end(self, obj):
-        if obj.data_fim_plano and obj.plano_ativo:
-            delta = obj.data_fim_plano - timezone.now()
-            return max(0, delta.days)
-        return 0
+        return self._snapshot(obj).days_until_subscription_end
 
 class PasswordResetSerializer(serializers.Serializer):
     email = serializers.EmailField()
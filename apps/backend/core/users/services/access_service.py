@@ -0,0 +1,234 @@
+import logging
+import math
+from functools import cached_property
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from ..models import Subscription
+
+logger = logging.getLogger(__name__)
+
+CACHE_PREFIX = 'users:access'
+
+def access_cache_key(user_id):
+    return f'{CACHE_PREFIX}:{user_id}'
+
+def get_user_subscription(user):
+    """Retorna a assinatura do usuário ou None (sem levantar RelatedObjectDoesNotExist)"""
+    try:
+        return user.subscription
+    except Subscription.DoesNotExist:
+        return None
+
+def get_subscription_status(user, subscription, now):
+    """Retorna o status detalhado da assinatura"""
+    if user.data_fim_teste and now <= user.data_fim_teste:
+        return {
+            'type': 'trial',
+            'active': True,
+            'days_remaining': max(0, (user.data_fim_teste - now).days)
+        }
+
+    if subscription:
+        if subscription.status == 'active':
+            return {
+                'type': 'active',
+                'active': True,
+                'days_until_renewal': max(0, (subscription.current_period_end - now).days)
+            }
+
+        elif subscription.status == 'past_due':
+            if subscription.grace_period_until and now <= subscription.grace_period_until:
+                return {
+                    'type': 'past_due_grace',
+                    'active': True,
+                    'grace_period_until': subscription.grace_period_until
+                }
+            else:
+                return {
+                    'type': 'past_due_blocked',
+                    'active': False,
+                    'message': 'Pagamento em atraso. Acesso bloqueado.'
+                }
+
+        elif subscription.cancel_at_period_end:
+            if subscription.current_period_end > now:
+                return {
+                    'type': 'canceled_period_end',
+                    'active': True,
+                    'current_period_end': subscription.current_period_end
+                }
+            else:
+                return {
+                    'type': 'canceled_expired',
+                    'active': False,
+                    'message': 'Período de assinatura expirado.'
+                }
+
+        elif subscription.status == 'canceled':
+            return {
+                'type': 'canceled',
+                'active': False,
+                'message': 'Assinatura cancelada.'
+            }
+
+    return {
+        'type': 'no_subscription',
+        'active': False,
+        'message': 'Nenhuma assinatura ativa.'
+    }
+
+def compute_access(user, subscription, now):
+    """
+    Decide o acesso do usuário no instante ``now``.
+
+    Retorna (acesso, expira_em): ``expira_em`` é a próxima fronteira de estado
+    (fim do teste, do grace period ou do período pago) em que a decisão pode
+    mudar, ou None se ela só muda com uma alteração de dados.
+    """
+    boundaries = []
+    allowed = False
+
+    # Período de teste
+    if user.data_fim_teste and now <= user.data_fim_teste:
+        allowed = True
+        boundaries.append(user.data_fim_teste)
+
+    # Plano ativo (flag, sem fronteira de tempo)
+    if user.plano_ativo:
+        allowed = True
+
+    if subscription:
+        # Grace period de pagamento em atraso
+        if subscription.grace_period_until and now <= subscription.grace_period_until:
+            allowed = True
+            boundaries.append(subscription.grace_period_until)
+
+        # Cancelada, mas ainda no período atual
+        if subscription.cancel_at_period_end and subscription.current_period_end > now:
+            allowed = True
+            boundaries.append(subscription.current_period_end)
+
+    return allowed, min(boundaries) if boundaries else None
+
+class AccessSnapshot:
+    """
+    Estado de teste e assinatura de um usuário, calculado com uma única leitura
+    do relógio. A assinatura é carregada no máximo uma vez, e só se for usada.
+    """
+
+    def __init__(self, user, now=None):
+        self.user = user
+        self.now = now or timezone.now()
+
+    @cached_property
+    def subscription(self):
+        return get_user_subscription(self.user)
+
+    @cached_property
+    def is_in_trial_period(self):
+        return bool(self.user.data_fim_teste) and self.now <= self.user.data_fim_teste
+
+    @cached_property
+    def days_until_trial_end(self):
+        if not self.is_in_trial_period:
+            return 0
+        return max(0, (self.user.data_fim_teste - self.now).days)
+
+    @cached_property
+    def days_until_subscription_end(self):
+        if not (self.user.data_fim_plano and self.user.plano_ativo):
+            return 0
+        return max(0, (self.user.data_fim_plano - self.now).days)
+
+    @cached_property
+    def has_active_access(self):
+        return self.user.plano_ativo or self.is_in_trial_period
+
+    @cached_property
+    def subscription_status(self):
+        if self.user.plano_ativo:
+            return 'ativo'
+        elif self.is_in_trial_period:
+            return 'teste'
+        return 'expirado'
+
+    @cached_property
+    def has_grace_period(self):
+        subscription = self.subscription
+        return bool(subscription and subscription.grace_period_until) and \
+            self.now <= subscription.grace_period_until
+
+    @cached_property
+    def days_until_renewal(self):
+        subscription = self.subscription
+        if not (subscription and subscription.current_period_end):
+            return 0
+        return max(0, (subscription.current_period_end - self.now).days)
+
+    def status_detail(self):
+        """Status detalhado da assinatura (o mesmo da resposta 403 do middleware)"""
+        return get_subscription_status(self.user, self.subscription, self.now)
+
+def get_access_snapshot(request, user=None):
+    """
+    Retorna o snapshot de acesso da requisição, criando-o no primeiro uso.
+
+    Fica na HttpRequest (também quando recebe a Request do DRF), então
+    middlewares, views e serializers compartilham o mesmo objeto. Todos os
+    snapshots da requisição usam o mesmo instante.
+    """
+    http_request = getattr(request, '_request', request)
+    user = user if user is not None else request.user
+    snapshot = getattr(http_request, 'access_snapshot', None)
+    if snapshot is None or snapshot.user.pk != user.pk:
+        now = snapshot.now if snapshot is not None else None
+        snapshot = http_request.access_snapshot = AccessSnapshot(user, now)
+    elif snapshot.user is not user:
+        # Autenticação do DRF gera outra instância do mesmo usuário
+        snapshot.user = user
+    return snapshot
+
+def get_access_decision(user, snapshot=None):
+    """
+    Retorna a decisão de acesso do usuário, usando o cache quando possível.
+
+    A decisão fica em cache até a próxima fronteira de estado (limitada a
+    SUBSCRIPTION_ACCESS_CACHE_TTL) e é invalidada por saves de User e
+    Subscription e pelos webhooks do Stripe. Formato:
+    ``{'allowed': bool, 'status': dict | None}``; o status só é guardado
+    quando o acesso é negado (é o que a resposta 403 precisa).
+    """
+    key = access_cache_key(user.pk)
+    try:
+        decision = cache.get(key)
+    except Exception as e:
+        logger.warning(f"Erro ao ler cache de acesso do usuário {user.pk}: {e}")
+        decision = None
+    if decision is not None:
+        return decision
+
+    snapshot = snapshot or AccessSnapshot(user)
+    now = snapshot.now
+    allowed, expires_at = compute_access(user, snapshot.subscription, now)
+    decision = {
+        'allowed': allowed,
+        'status': None if allowed else snapshot.status_detail(),
+    }
+
+    ttl = settings.SUBSCRIPTION_ACCESS_CACHE_TTL
+    if expires_at is not None:
+        # Arredonda para cima: a decisão vale até o instante da fronteira, inclusive
+        ttl = min(ttl, math.ceil((expires_at - now).total_seconds()) + 1)
+    try:
+        cache.set(key, decision, timeout=max(1, ttl))
+    except Exception as e:
+        logger.warning(f"Erro ao gravar cache de acesso do usuário {user.pk}: {e}")
+    return decision
+
+def invalidate_access(user_id):
+    """Descarta a decisão de acesso em cache do usuário"""
+    try:
+        cache.delete(access_cache_key(user_id))
+    except Exception as e:
+        logger.warning(f"Erro ao invalidar cache de acesso do usuário {user_id}: {e}")
@@ -0,0 +1,95 @@
+import logging
+from datetime import datetime, timezone as dt_timezone
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+from django_redis import get_redis_connection
+from redis.exceptions import RedisError, ResponseError
+from ..models import User
+
+logger = logging.getLogger(__name__)
+
+PREFIX = 'users:activity'
+PENDING_KEY = f'{PREFIX}:pending'          # hash user_id -> timestamp (epoch)
+PROCESSING_KEY = f'{PREFIX}:processing'    # hash sendo gravado no banco
+
+class ActivityTracker:
+    """
+    Registro write-behind da última atividade dos usuários.
+
+    Cada requisição só toca o Redis: no máximo uma escrita por usuário a cada
+    USER_ACTIVITY_WINDOW segundos vai para o hash de pendentes. Uma task
+    periódica grava os valores pendentes em um único UPDATE por lote.
+    """
+
+    def __init__(self, alias=None):
+        self.redis = get_redis_connection(alias or settings.USER_ACTIVITY_REDIS_ALIAS)
+        self.window = settings.USER_ACTIVITY_WINDOW
+
+    def record(self, user_id, when=None):
+        """Registra a atividade do usuário, coalescida pela janela configurada"""
+        when = when or timezone.now()
+        try:
+            # A trava expira com a janela; só a primeira requisição da janela escreve
+            if self.redis.set(f'{PREFIX}:gate:{user_id}', 1, nx=True, ex=self.window):
+                self.redis.hset(PENDING_KEY, user_id, when.timestamp())
+        except RedisError as e:
+            # Atividade é informativa; a requisição não deve falhar por isso
+            logger.warning(f"Erro ao registrar atividade do usuário {user_id}: {e}")
+
+    def _claim_pending(self):
+        """Move os pendentes para o hash de processamento e retorna o conteúdo"""
+        # Um flush anterior que falhou deixa o hash de processamento; ele é regravado antes
+        if not self.redis.exists(PROCESSING_KEY):
+            try:
+                self.redis.rename(PENDING_KEY, PROCESSING_KEY)
+            except ResponseError:
+                # Nenhuma atividade pendente
+                return {}
+
+        return {
+            int(user_id): datetime.fromtimestamp(float(ts), tz=dt_timezone.utc)
+            for user_id, ts in self.redis.hgetall(PROCESSING_KEY).items()
+        }
+
+    def flush(self, batch_size=None):
+        """Grava as atividades pendentes no banco; retorna quantos usuários foram atualizados"""
+        batch_size = batch_size or settings.USER_ACTIVITY_FLUSH_BATCH_SIZE
+        pending = self._claim_pending()
+        if not pending:
+            return 0
+
+        rows = sorted(pending.items())
+        updated = 0
+        table = connection.ops.quote_name(User._meta.db_table)
+
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                for start in range(0, len(rows), batch_size):
+                    batch = rows[start:start + batch_size]
+                    values = ', '.join(['(%s::bigint, %s::timestamptz)'] * len(batch))
+                    params = [value for row in batch for value in row]
+                    # Nunca retrocede: um valor mais novo pode ter sido gravado por outro caminho
+                    cursor.execute(
+                        f"""
+                        UPDATE {table} AS u
+                        SET last_activity = v.last_activity
+                        FROM (VALUES {values}) AS v(id, last_activity)
+                        WHERE u.id = v.id
+                          AND (u.last_activity IS NULL OR u.last_activity < v.last_activity)
+                        """,
+                        params
+                    )
+                    updated += cursor.rowcount
+
+        self.redis.delete(PROCESSING_KEY)
+        return updated
+
+_tracker = None
+
+def get_activity_tracker():
+    """Retorna o tracker do processo (a conexão Redis é reaproveitada)"""
+    global _tracker
+    if _tracker is None:
+        _tracker = ActivityTracker()
+    return _tracker
@@ -0,0 +1,384 @@
+"""
+Processamento assíncrono e idempotente dos webhooks do Stripe.
+
+O webhook só verifica a assinatura e grava o evento em StripeEvent (chave: id
+do evento no Stripe), respondendo 200 na hora; entregas repetidas caem no
+mesmo registro e não fazem nada. Os eventos são processados pela task
+process_stripe_events, um customer por vez, na ordem de criação no Stripe.
+"""
+import json
+import logging
+import stripe
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from ..models import User, Subscription, Invoice, StripeEvent
+from .access_service import invalidate_access
+
+logger = logging.getLogger(__name__)
+
+def record_event(event):
+    """
+    Grava o evento verificado; retorna o StripeEvent criado, ou None se o
+    evento já tinha sido recebido
+    """
+    data_object = event['data']['object']
+    try:
+        with transaction.atomic():
+            return StripeEvent.objects.create(
+                id=event['id'],
+                type=event['type'],
+                customer_id=_customer_of(data_object),
+                payload=json.loads(json.dumps(event)),
+                stripe_created_at=datetime.fromtimestamp(event['created'], tz=dt_timezone.utc),
+            )
+    except IntegrityError:
+        return None
+
+def _customer_of(data_object):
+    """Customer do objeto do evento (o próprio id, para eventos de customer)"""
+    if data_object.get('object') == 'customer':
+        return data_object.get('id') or ''
+    return data_object.get('customer') or ''
+
+def invalidate_access_for_customer(customer_id):
+    """Invalida o cache de acesso dos usuários de um customer do Stripe"""
+    if not customer_id:
+        return
+    user_ids = set(User.objects.filter(stripe_customer_id=customer_id).values_list('id', flat=True))
+    user_ids.update(Subscription.objects.filter(stripe_customer_id=customer_id).values_list('user_id', flat=True))
+    for user_id in user_ids:
+        invalidate_access(user_id)
+
+def dispatch_event(event):
+    """Executa o handler do tipo do evento (tipos sem handler são ignorados)"""
+    handler = EVENT_HANDLERS.get(event['type'])
+    if handler:
+        handler(event['data']['object'])
+
+def stale_claim_limit(now=None):
+    """Eventos em 'processing' reivindicados antes deste instante podem ser retomados"""
+    return (now or timezone.now()) - timedelta(seconds=settings.STRIPE_EVENT_CLAIM_TIMEOUT)
+
+def claim_next_event(customer_id):
+    """
+    Reivindica o próximo evento do customer, em uma transação curta.
+
+    Os eventos não processados do customer ficam travados só durante a
+    escolha; o escolhido passa para 'processing' (com claimed_at) e o commit
+    libera as linhas. Retorna None se não há evento a processar ou se outra
+    task está com um evento do customer em andamento.
+    """
+    now = timezone.now()
+    stale = stale_claim_limit(now)
+    with transaction.atomic():
+        events = list(
+            StripeEvent.objects.select_for_update()
+            .filter(customer_id=customer_id)
+            .exclude(status='processed')
+            .order_by('stripe_created_at', 'received_at')
+        )
+        if any(e.status == 'processing' and e.claimed_at and e.claimed_at >= stale for e in events):
+            return None
+
+        for event in events:
+            if event.attempts >= settings.STRIPE_EVENT_MAX_ATTEMPTS:
+                if event.status == 'processing':
+                    # A task caiu no meio da última tentativa
+                    event.status = 'failed'
+                    event.last_error = 'Processamento interrompido'
+                    event.save(update_fields=['status', 'last_error'])
+                continue
+
+            event.status = 'processing'
+            event.attempts += 1
+            event.claimed_at = now
+            event.save(update_fields=['status', 'attempts', 'claimed_at'])
+            return event
+    return None
+
+def finish_event(event, error=None):
+    """
+    Grava o resultado de um evento reivindicado.
+
+    Só altera o evento se a reivindicação ainda é desta task (não foi retomada
+    por outra depois de STRIPE_EVENT_CLAIM_TIMEOUT); retorna se a gravação aconteceu.
+    """
+    claim = StripeEvent.objects.filter(pk=event.pk, status='processing', claimed_at=event.claimed_at)
+    if error is not None:
+        return bool(claim.update(status='failed', last_error=str(error)[:2000]))
+    return bool(claim.update(status='processed', last_error='', processed_at=timezone.now()))
+
+def process_customer_events(customer_id):
+    """
+    Processa os eventos pendentes de um customer, em ordem.
+
+    Cada evento é reivindicado em uma transação curta (claim_next_event) e o
+    handler roda fora dela, então chamadas à API do Stripe não seguram locks
+    de StripeEvent. Um evento em 'processing' impede outra task do mesmo
+    customer de avançar; se a task cair, ele é retomado depois de
+    STRIPE_EVENT_CLAIM_TIMEOUT. Se um evento falha, os seguintes esperam a
+    próxima tentativa para manter a ordem. Retorna (processados, falha).
+    """
+    stripe.api_key = settings.STRIPE_SECRET_KEY
+    processed = 0
+    failure = None
+
+    while True:
+        event = claim_next_event(customer_id)
+        if event is None:
+            break
+
+        try:
+            with transaction.atomic():
+                dispatch_event(stripe.Event.construct_from(event.payload, stripe.api_key))
+        except Exception as e:
+            finish_event(event, error=e)
+            failure = e
+            break
+
+        if not finish_event(event):
+            logger.warning(f"Evento Stripe {event.id} foi retomado por outra task durante o processamento")
+            break
+        processed += 1
+
+    # Handlers também alteram dados via update(); a invalidação explícita cobre esses casos
+    if processed:
+        invalidate_access_for_customer(customer_id)
+    return processed, failure
+
+def handle_checkout_completed(session):
+    """Processa checkout completado"""
+    user_id = session.metadata.get('user_id')
+    if not user_id:
+        return
+    
+    try:
+        user = User.objects.get(id=user_id)
+        subscription = stripe.Subscription.retrieve(session.subscription)
+        
+        # Criar ou atualizar registro de assinatura
+        subscription_obj, created = Subscription.objects.get_or_create(
+            user=user,
+            defaults={
+                'stripe_customer_id': session.customer,
+                'stripe_subscription_id': session.subscription,
+                'stripe_price_id': subscription.items.data[0].price.id,
+                'status': subscription.status,
+                'current_period_start': timezone.datetime.fromtimestamp(subscription.current_period_start),
+                'current_period_end': timezone.datetime.fromtimestamp(subscription.current_period_end),
+                'trial_start': timezone.datetime.fromtimestamp(subscription.trial_start) if subscription.trial_start else None,
+                'trial_end': timezone.datetime.fromtimestamp(subscription.trial_end) if subscription.trial_end else None,
+                'plan_name': 'Plano Mensal Licitrix',
+                'plan_price': 59.90,
+                'plan_currency': 'BRL',
+                'plan_interval': 'month'
+            }
+        )
+        
+        if not created:
+            # Atualizar assinatura existente
+            subscription_obj.stripe_customer_id = session.customer
+            subscription_obj.stripe_subscription_id = session.subscription
+            subscription_obj.status = subscription.status
+            subscription_obj.current_period_start = timezone.datetime.fromtimestamp(subscription.current_period_start)
+            subscription_obj.current_period_end = timezone.datetime.fromtimestamp(subscription.current_period_end)
+            subscription_obj.save()
+        
+        # Ativar usuário
+        user.activate_subscription(session.customer, session.subscription)
+        
+        logger.info(f"Assinatura ativada para usuário: {user.email}")
+        
+    except Exception as e:
+        logger.error(f"Erro ao processar checkout: {e}")
+        raise
+
+def handle_subscription_created(subscription):
+    """Processa assinatura criada"""
+    try:
+        user_id = subscription.metadata.get('user_id')
+        if not user_id:
+            return
+        
+        user = User.objects.get(id=user_id)
+        
+        # Atualizar assinatura local
+        if hasattr(user, 'subscription'):
+            user.subscription.status = subscription.status
+            user.subscription.current_period_start = timezone.datetime.fromtimestamp(subscription.current_period_start)
+            user.subscription.current_period_end = timezone.datetime.fromtimestamp(subscription.current_period_end)
+            user.subscription.save()
+        
+        logger.info(f"Assinatura criada para usuário: {user.email}")
+        
+    except Exception as e:
+        logger.error(f"Erro ao processar assinatura criada: {e}")
+        raise
+
+def handle_subscription_updated(subscription):
+    """Processa assinatura atualizada"""
+    try:
+        # Buscar assinatura pelo ID do Stripe
+        subscription_obj = Subscription.objects.get(stripe_subscription_id=subscription.id)
+        
+        # Atualizar campos
+        subscription_obj.status = subscription.status
+        subscription_obj.cancel_at_period_end = subscription.cancel_at_period_end
+        subscription_obj.current_period_start = timezone.datetime.fromtimestamp(subscription.current_period_start)
+        subscription_obj.current_period_end = timezone.datetime.fromtimestamp(subscription.current_period_end)
+        
+        # Atualizar método de pagamento se disponível
+        if subscription.default_payment_method:
+            payment_method = stripe.PaymentMethod.retrieve(subscription.default_payment_method)
+            subscription_obj.default_payment_method_last4 = payment_method.card.last4
+            subscription_obj.default_payment_method_brand = payment_method.card.brand
+            subscription_obj.default_payment_method_exp_month = payment_method.card.exp_month
+            subscription_obj.default_payment_method_exp_year = payment_method.card.exp_year
+        
+        subscription_obj.save()
+        
+        # Atualizar usuário se necessário
+        user = subscription_obj.user
+        if subscription.status == 'canceled' and not subscription.cancel_at_period_end:
+            user.plano_ativo = False
+            user.data_fim_plano = timezone.now()
+            user.save()
+        
+        logger.info(f"Assinatura atualizada para usuário: {user.email}")
+        
+    except Subscription.DoesNotExist:
+        logger.error(f"Assinatura não encontrada: {subscription.id}")
+    except Exception as e:
+        logger.error(f"Erro ao processar assinatura atualizada: {e}")
+        raise
+
+def handle_subscription_deleted(subscription):
+    """Processa assinatura cancelada"""
+    try:
+        subscription_obj = Subscription.objects.get(stripe_subscription_id=subscription.id)
+        subscription_obj.status = 'canceled'
+        subscription_obj.canceled_at = timezone.now()
+        subscription_obj.save()
+        
+        # Desativar usuário
+        user = subscription_obj.user
+        user.deactivate_subscription()
+        
+        logger.info(f"Assinatura cancelada: {subscription.id}")
+        
+    except Subscription.DoesNotExist:
+        logger.error(f"Assinatura não encontrada: {subscription.id}")
+    except Exception as e:
+        logger.error(f"Erro ao processar assinatura cancelada: {e}")
+        raise
+
+def handle_payment_succeeded(invoice):
+    """Processa pagamento bem-sucedido"""
+    subscription_id = invoice.subscription
+    try:
+        subscription = Subscription.objects.get(stripe_subscription_id=subscription_id)
+        subscription.status = 'active'
+        subscription.current_period_start = timezone.datetime.fromtimestamp(invoice.period_start)
+        subscription.current_period_end = timezone.datetime.fromtimestamp(invoice.period_end)
+        subscription.grace_period_until = None  # Remover grace period
+        subscription.save()
+        
+        # Atualizar usuário
+        user = subscription.user
+        user.data_fim_plano = subscription.current_period_end
+        user.save()
+        
+        # Criar/atualizar fatura local
+        Invoice.objects.update_or_create(
+            stripe_invoice_id=invoice.id,
+            defaults={
+                'subscription': subscription,
+                'stripe_customer_id': invoice.customer,
+                'status': invoice.status,
+                'amount_due': invoice.amount_due / 100,
+                'amount_paid': invoice.amount_paid / 100,
+                'amount_remaining': invoice.amount_remaining / 100,
+                'currency': invoice.currency.upper(),
+                'hosted_invoice_url': invoice.hosted_invoice_url,
+                'invoice_pdf': invoice.invoice_pdf,
+                'due_date': timezone.datetime.fromtimestamp(invoice.due_date) if invoice.due_date else None,
+                'paid_at': timezone.now(),
+            }
+        )
+        
+        logger.info(f"Pagamento processado para assinatura: {subscription_id}")
+        
+    except Subscription.DoesNotExist:
+        logger.error(f"Assinatura não encontrada: {subscription_id}")
+    except Exception as e:
+        logger.error(f"Erro ao processar pagamento: {e}")
+        raise
+
+def handle_payment_failed(invoice):
+    """Processa pagamento falhado"""
+    subscription_id = invoice.subscription
+    try:
+        subscription = Subscription.objects.get(stripe_subscription_id=subscription_id)
+        subscription.status = 'past_due'
+        subscription.start_grace_period(days=3)  # Grace period de 3 dias
+        subscription.save()
+        
+        # Criar/atualizar fatura local
+        Invoice.objects.update_or_create(
+            stripe_invoice_id=invoice.id,
+            defaults={
+                'subscription': subscription,
+                'stripe_customer_id': invoice.customer,
+                'status': invoice.status,
+                'amount_due': invoice.amount_due / 100,
+                'amount_paid': invoice.amount_paid / 100,
+                'amount_remaining': invoice.amount_remaining / 100,
+                'currency': invoice.currency.upper(),
+                'hosted_invoice_url': invoice.hosted_invoice_url,
+                'invoice_pdf': invoice.invoice_pdf,
+                'due_date': timezone.datetime.fromtimestamp(invoice.due_date) if invoice.due_date else None,
+            }
+        )
+        
+        logger.warning(f"Pagamento falhou para assinatura: {subscription_id}")
+        
+    except Subscription.DoesNotExist:
+        logger.error(f"Assinatura não encontrada: {subscription_id}")
+    except Exception as e:
+        logger.error(f"Erro ao processar pagamento falhado: {e}")
+        raise
+
+def handle_payment_method_attached(payment_method):
+    """Processa método de pagamento anexado"""
+    try:
+        customer_id = payment_method.customer
+        
+        # Buscar assinatura pelo customer ID
+        subscription = Subscription.objects.get(stripe_customer_id=customer_id)
+        
+        # Atualizar informações do método de pagamento
+        subscription.default_payment_method_last4 = payment_method.card.last4
+        subscription.default_payment_method_brand = payment_method.card.brand
+        subscription.default_payment_method_exp_month = payment_method.card.exp_month
+        subscription.default_payment_method_exp_year = payment_method.card.exp_year
+        subscription.save()
+        
+        logger.info(f"Método de pagamento atualizado para assinatura: {subscription.id}")
+        
+    except Subscription.DoesNotExist:
+        logger.error(f"Assinatura não encontrada para customer: {customer_id}")
+    except Exception as e:
+        logger.error(f"Erro ao processar método de pagamento: {e}")
+        raise
+
+EVENT_HANDLERS = {
+    'checkout.session.completed': handle_checkout_completed,
+    'customer.subscription.created': handle_subscription_created,
+    'customer.subscription.updated': handle_subscription_updated,
+    'customer.subscription.deleted': handle_subscription_deleted,
+    'invoice.payment_succeeded': handle_payment_succeeded,
+    'invoice.payment_failed': handle_payment_failed,
+    'payment_method.attached': handle_payment_method_attached,
+}
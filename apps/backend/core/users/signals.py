@@ -0,0 +1,28 @@
+"""
+Sinais do app users.
+"""
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Subscription, User
+from .services.access_service import invalidate_access
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_access(sender, instance, **kwargs):
+    """Descarta a decisão de acesso em cache quando o usuário muda"""
+    if kwargs.get('update_fields') == frozenset({'last_activity'}):
+        return
+    user_id = instance.pk
+    invalidate_access(user_id)
+    # Invalida de novo após o commit, para não ficar com uma decisão lida no meio da transação
+    transaction.on_commit(lambda: invalidate_access(user_id))
+
+@receiver(post_save, sender=Subscription)
+@receiver(post_delete, sender=Subscription)
+def invalidate_subscription_access(sender, instance, **kwargs):
+    """Descarta a decisão de acesso em cache quando a assinatura muda"""
+    user_id = instance.user_id
+    invalidate_access(user_id)
+    transaction.on_commit(lambda: invalidate_access(user_id))
@@ -0,0 +1,53 @@
+from celery import shared_task
+import logging
+from datetime import timedelta
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import StripeEvent
+from .services.activity_service import get_activity_tracker
+from .services.stripe_webhook import process_customer_events, stale_claim_limit
+
+logger = logging.getLogger(__name__)
+
+@shared_task
+def flush_user_activity():
+    """Grava no banco a última atividade acumulada no Redis"""
+    try:
+        updated = get_activity_tracker().flush()
+        if updated:
+            logger.info(f"Última atividade gravada para {updated} usuários")
+        return updated
+    except Exception as exc:
+        logger.error(f"Erro ao gravar atividade dos usuários: {exc}")
+
+@shared_task(bind=True)
+def process_stripe_events(self, customer_id):
+    """Processa, em ordem, os eventos Stripe pendentes de um customer"""
+    processed, failure = process_customer_events(customer_id)
+    if failure is not None:
+        logger.error(f"Erro ao processar eventos Stripe do customer {customer_id}: {failure}")
+        raise self.retry(exc=failure, countdown=settings.STRIPE_EVENT_RETRY_DELAY)
+    return processed
+
+@shared_task
+def process_pending_stripe_events():
+    """Reenfileira customers com eventos Stripe parados (despacho perdido, retries esgotados da task ou task que caiu)"""
+    limit = timezone.now() - timedelta(seconds=settings.STRIPE_EVENT_RETRY_DELAY)
+    customer_ids = (
+        StripeEvent.objects.filter(
+            Q(status__in=['pending', 'failed'], attempts__lt=settings.STRIPE_EVENT_MAX_ATTEMPTS)
+            | Q(status='processing', claimed_at__lt=stale_claim_limit()),
+            received_at__lt=limit,
+        )
+        .values_list('customer_id', flat=True)
+        .distinct()
+    )
+    count = 0
+    for customer_id in customer_ids:
+        process_stripe_events.delay(customer_id)
+        count += 1
+    if count:
+        logger.info(f"Reenfileirados eventos Stripe de {count} customers")
+    return count
@@ -0,0 +1,56 @@
+"""
+Testes da decisão de acesso e das fronteiras de estado.
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+from types import SimpleNamespace
+
+from core.users.services.access_service import compute_access
+
+NOW = datetime(2026, 1, 1, 12, tzinfo=dt_timezone.utc)
+
+
+def make_user(trial_end=None, plano_ativo=False):
+    return SimpleNamespace(data_fim_teste=trial_end, plano_ativo=plano_ativo)
+
+
+def make_subscription(grace_until=None, period_end=None, cancel_at_period_end=False, status='active'):
+    return SimpleNamespace(
+        grace_period_until=grace_until,
+        current_period_end=period_end or NOW + timedelta(days=30),
+        cancel_at_period_end=cancel_at_period_end,
+        status=status,
+    )
+
+
+def test_trial_is_inclusive_at_its_end():
+    user = make_user(trial_end=NOW)
+    assert compute_access(user, None, NOW) == (True, NOW)
+    assert compute_access(user, None, NOW + timedelta(microseconds=1)) == (False, None)
+
+
+def test_grace_period_is_inclusive_at_its_end():
+    subscription = make_subscription(grace_until=NOW, status='past_due')
+    assert compute_access(make_user(), subscription, NOW) == (True, NOW)
+    assert compute_access(make_user(), subscription, NOW + timedelta(seconds=1)) == (False, None)
+
+
+def test_canceled_subscription_is_exclusive_at_period_end():
+    end = NOW + timedelta(hours=1)
+    subscription = make_subscription(period_end=end, cancel_at_period_end=True)
+    assert compute_access(make_user(), subscription, NOW) == (True, end)
+    assert compute_access(make_user(), subscription, end) == (False, None)
+
+
+def test_active_plan_has_no_time_boundary():
+    assert compute_access(make_user(plano_ativo=True), None, NOW) == (True, None)
+
+
+def test_earliest_boundary_wins():
+    trial_end = NOW + timedelta(days=2)
+    grace_until = NOW + timedelta(days=1)
+    subscription = make_subscription(grace_until=grace_until, status='past_due')
+    assert compute_access(make_user(trial_end=trial_end), subscription, NOW) == (True, grace_until)
+
+
+def test_no_trial_and_no_subscription_is_denied():
+    assert compute_access(make_user(), None, NOW) == (False, None)
@@ -0,0 +1,93 @@
+"""
+Testes do buffer write-behind de última atividade.
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+import pytest
+from redis.exceptions import ResponseError
+
+from core.users.models import User
+from core.users.services.activity_service import PENDING_KEY, PROCESSING_KEY, ActivityTracker
+
+
+class FakeRedis:
+    """Subconjunto de comandos do Redis usado pelo tracker, em memória"""
+
+    def __init__(self):
+        self.data = {}
+
+    def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value
+        return True
+
+    def hset(self, key, field, value):
+        self.data.setdefault(key, {})[str(field)] = str(value)
+
+    def hgetall(self, key):
+        return dict(self.data.get(key, {}))
+
+    def exists(self, key):
+        return int(key in self.data)
+
+    def rename(self, src, dst):
+        if src not in self.data:
+            raise ResponseError('no such key')
+        self.data[dst] = self.data.pop(src)
+
+    def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+
+def make_tracker(window=60):
+    tracker = ActivityTracker.__new__(ActivityTracker)
+    tracker.redis = FakeRedis()
+    tracker.window = window
+    return tracker
+
+
+def at(minutes):
+    return datetime(2026, 1, 1, tzinfo=dt_timezone.utc) + timedelta(minutes=minutes)
+
+
+def test_record_coalesces_within_window():
+    tracker = make_tracker()
+    tracker.record(1, when=at(0))
+    tracker.record(1, when=at(1))
+    assert tracker._claim_pending() == {1: at(0)}
+
+
+def test_failed_flush_is_retried_before_new_activity():
+    tracker = make_tracker()
+    tracker.record(1, when=at(0))
+    assert tracker._claim_pending() == {1: at(0)}
+
+    # O flush anterior falhou e não apagou o hash de processamento
+    tracker.record(2, when=at(5))
+    assert tracker._claim_pending() == {1: at(0)}
+    assert PENDING_KEY in tracker.redis.data
+
+
+def test_claim_without_activity():
+    tracker = make_tracker()
+    assert tracker._claim_pending() == {}
+    assert PROCESSING_KEY not in tracker.redis.data
+
+
+@pytest.mark.django_db
+def test_flush_never_moves_last_activity_backwards():
+    newer = User.objects.create(username='a', email='a@example.com', last_activity=at(10))
+    older = User.objects.create(username='b', email='b@example.com', last_activity=at(0))
+    empty = User.objects.create(username='c', email='c@example.com', last_activity=None)
+
+    tracker = make_tracker()
+    for user in (newer, older, empty):
+        tracker.record(user.pk, when=at(5))
+
+    assert tracker.flush() == 2
+    assert User.objects.get(pk=newer.pk).last_activity == at(10)
+    assert User.objects.get(pk=older.pk).last_activity == at(5)
+    assert User.objects.get(pk=empty.pk).last_activity == at(5)
+    assert PROCESSING_KEY not in tracker.redis.data
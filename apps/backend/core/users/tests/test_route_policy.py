@@ -0,0 +1,57 @@
+"""
+Testes do classificador de rotas.
+"""
+from django.conf import settings
+
+from core.users.route_policy import RouteClassifier
+
+
+def make_classifier(**kwargs):
+    return RouteClassifier(
+        settings.ROUTE_POLICY_EXEMPT_PREFIXES,
+        settings.ROUTE_POLICY_SUBSCRIPTION_PREFIXES,
+        settings.ROUTE_POLICY_UNTRACKED_PREFIXES,
+        **kwargs
+    )
+
+
+def test_exempt_prefix_wins_over_subscription_prefix():
+    classifier = make_classifier()
+    # /api/auth/ também começa com /api/, mas é isenta
+    assert not classifier.classify('/api/auth/login/').requires_subscription
+    assert not classifier.classify('/api/health/').requires_subscription
+    assert classifier.classify('/api/oportunidades/').requires_subscription
+
+
+def test_matches_old_startswith_rules():
+    classifier = make_classifier()
+    paths = [
+        '/', '/api/', '/api', '/dashboard/', '/dashboard', '/admin/users/',
+        '/auth/login/', '/auth/logout/', '/subscription/', '/subscription/webhook/',
+        '/oportunidades/1/', '/documentos/x', '/api/docs/', '/metrics/',
+    ]
+    for path in paths:
+        exempt = any(path.startswith(p) for p in settings.ROUTE_POLICY_EXEMPT_PREFIXES)
+        required = any(path.startswith(p) for p in settings.ROUTE_POLICY_SUBSCRIPTION_PREFIXES)
+        assert classifier.classify(path).requires_subscription == (not exempt and required), path
+
+
+def test_api_and_activity_flags():
+    classifier = make_classifier()
+    assert classifier.classify('/api/oportunidades/').is_api
+    assert not classifier.classify('/dashboard/').is_api
+    assert not classifier.classify('/health/').track_activity
+    assert not classifier.classify('/metrics/').track_activity
+    assert classifier.classify('/dashboard/').track_activity
+
+
+def test_policies_are_shared_and_cache_is_bounded():
+    classifier = make_classifier(cache_size=2)
+    assert classifier.classify('/dashboard/a') is classifier.classify('/dashboard/b')
+    classifier.classify('/dashboard/c')
+    assert len(classifier._cache) <= 2
+
+
+def test_without_prefixes_nothing_requires_subscription():
+    classifier = RouteClassifier([], [])
+    assert not classifier.classify('/api/x').requires_subscription
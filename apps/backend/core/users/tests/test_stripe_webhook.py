@@ -0,0 +1,105 @@
+"""
+Testes do processamento de eventos do Stripe: deduplicação, ordem e reivindicação.
+"""
+from datetime import timedelta
+from types import SimpleNamespace
+
+import pytest
+from django.utils import timezone
+
+from core.users.models import StripeEvent
+from core.users.services import stripe_webhook
+
+pytestmark = pytest.mark.django_db
+
+CUSTOMER = 'cus_123'
+
+
+def make_event(event_id, created, customer=CUSTOMER):
+    return {
+        'id': event_id,
+        'type': 'invoice.payment_succeeded',
+        'created': created,
+        'data': {'object': {'object': 'invoice', 'customer': customer}},
+    }
+
+
+@pytest.fixture
+def dispatched(monkeypatch):
+    """Registra a ordem dos eventos despachados; falha os ids em ``failing``"""
+    calls = SimpleNamespace(order=[], failing=set())
+
+    def dispatch(event):
+        # O evento em andamento já está gravado como 'processing'
+        assert StripeEvent.objects.get(pk=event['id']).status == 'processing'
+        calls.order.append(event['id'])
+        if event['id'] in calls.failing:
+            raise RuntimeError('falhou')
+
+    monkeypatch.setattr(stripe_webhook, 'dispatch_event', dispatch)
+    monkeypatch.setattr(stripe_webhook, 'invalidate_access_for_customer', lambda customer_id: None)
+    return calls
+
+
+def test_duplicate_delivery_is_recorded_once():
+    event = make_event('evt_1', 1_700_000_000)
+    assert stripe_webhook.record_event(event) is not None
+    assert stripe_webhook.record_event(event) is None
+    assert StripeEvent.objects.count() == 1
+
+
+def test_events_are_processed_in_stripe_order(dispatched):
+    # Recebidos fora de ordem
+    for event_id, created in [('evt_3', 300), ('evt_1', 100), ('evt_2', 200)]:
+        stripe_webhook.record_event(make_event(event_id, 1_700_000_000 + created))
+
+    assert stripe_webhook.process_customer_events(CUSTOMER) == (3, None)
+    assert dispatched.order == ['evt_1', 'evt_2', 'evt_3']
+    assert set(StripeEvent.objects.values_list('status', flat=True)) == {'processed'}
+
+
+def test_failure_holds_back_later_events(dispatched):
+    for event_id, created in [('evt_1', 100), ('evt_2', 200), ('evt_3', 300)]:
+        stripe_webhook.record_event(make_event(event_id, 1_700_000_000 + created))
+    dispatched.failing.add('evt_2')
+
+    processed, failure = stripe_webhook.process_customer_events(CUSTOMER)
+    assert processed == 1 and isinstance(failure, RuntimeError)
+    assert dispatched.order == ['evt_1', 'evt_2']
+
+    failed = StripeEvent.objects.get(pk='evt_2')
+    assert (failed.status, failed.attempts, failed.last_error) == ('failed', 1, 'falhou')
+    assert StripeEvent.objects.get(pk='evt_3').status == 'pending'
+
+    # Próxima tentativa: retoma do evento que falhou, ainda em ordem
+    dispatched.failing.clear()
+    assert stripe_webhook.process_customer_events(CUSTOMER) == (2, None)
+    assert dispatched.order[2:] == ['evt_2', 'evt_3']
+
+
+def test_fresh_claim_blocks_other_tasks(dispatched):
+    stripe_webhook.record_event(make_event('evt_1', 1_700_000_100))
+    stripe_webhook.record_event(make_event('evt_2', 1_700_000_200))
+    StripeEvent.objects.filter(pk='evt_1').update(status='processing', claimed_at=timezone.now(), attempts=1)
+
+    assert stripe_webhook.process_customer_events(CUSTOMER) == (0, None)
+    assert dispatched.order == []
+
+
+def test_stale_claim_is_retaken(dispatched, settings):
+    stripe_webhook.record_event(make_event('evt_1', 1_700_000_100))
+    stale = timezone.now() - timedelta(seconds=settings.STRIPE_EVENT_CLAIM_TIMEOUT + 1)
+    StripeEvent.objects.filter(pk='evt_1').update(status='processing', claimed_at=stale, attempts=1)
+
+    assert stripe_webhook.process_customer_events(CUSTOMER) == (1, None)
+    assert StripeEvent.objects.get(pk='evt_1').attempts == 2
+
+
+def test_result_of_a_retaken_claim_is_discarded():
+    stripe_webhook.record_event(make_event('evt_1', 1_700_000_100))
+    event = stripe_webhook.claim_next_event(CUSTOMER)
+    # Outra task retomou o evento depois do timeout
+    StripeEvent.objects.filter(pk='evt_1').update(claimed_at=event.claimed_at + timedelta(seconds=1))
+
+    assert not stripe_webhook.finish_event(event)
+    assert StripeEvent.objects.get(pk='evt_1').status == 'processing'
@@ -10,6 +10,7 @@ from django.conf import settings
 from django.template.loader import render_to_string
 from django.utils.crypto import get_random_string
 from django.core.cache import cache
+from django.db import transaction
 import json
 import logging
 
@@ -19,6 +20,9 @@ from .serializers import (
     SubscriptionSerializer, StripeCheckoutSessionSerializer
 )
 from .models import User, Subscription, Invoice
+from .tasks import process_stripe_events
+from .services.access_service import get_access_snapshot
+from .services.stripe_webhook import record_event
 from .services.stripe_service import StripeService
 
 logger = logging.getLogger(__name__)
@@ -116,23 +120,22 @@ class UserStatusView(generics.GenericAPIView):
     
     def get(self, request):
         user = request.user
+        snapshot = get_access_snapshot(request)
         
         # Verificar se tem assinatura
-        subscription = None
-        if hasattr(user, 'subscription'):
-            subscription = user.subscription
+        subscription = snapshot.subscription
         
         response_data = {
             'trial': {
                 'start': user.data_inicio_teste,
                 'end': user.data_fim_teste,
-                'active': user.is_in_trial_period,
-                'days_remaining': user.days_until_trial_end if user.is_in_trial_period else 0
+                'active': snapshot.is_in_trial_period,
+                'days_remaining': snapshot.days_until_trial_end
             },
             'subscription': {
                 'active': user.plano_ativo,
-                'status': user.subscription_status,
-                'has_active_access': user.has_active_access
+                'status': snapshot.subscription_status,
+                'has_active_access': snapshot.has_active_access
             }
         }
         
@@ -142,8 +145,8 @@ class UserStatusView(generics.GenericAPIView):
                 'cancel_at_period_end': subscription.cancel_at_period_end,
                 'current_period_end': subscription.current_period_end,
                 'grace_period_until': subscription.grace_period_until,
-                'has_grace_period': subscription.has_grace_period,
-                'days_until_renewal': subscription.days_until_renewal,
+                'has_grace_period': snapshot.has_grace_period,
+                'days_until_renewal': snapshot.days_until_renewal,
                 'payment_method': {
                     'last4': subscription.default_payment_method_last4,
                     'brand': subscription.default_payment_method_brand,
@@ -429,7 +432,7 @@ def list_invoices(request):
 @api_view(['POST'])
 @permission_classes([AllowAny])
 def stripe_webhook(request):
-    """Webhook para receber eventos do Stripe"""
+    """Webhook para receber eventos do Stripe (processados por process_stripe_events)"""
     payload = request.body
     sig_header = request.META.get('HTTP_STRIPE_SIGNATURE')
     
@@ -442,21 +445,13 @@ def stripe_webhook(request):
             payload, sig_header, settings.STRIPE_WEBHOOK_SECRET
         )
         
-        # Processar eventos
-        if event['type'] == 'checkout.session.completed':
-            handle_checkout_completed(event['data']['object'])
-        elif event['type'] == 'customer.subscription.created':
-            handle_subscription_created(event['data']['object'])
-        elif event['type'] == 'customer.subscription.updated':
-            handle_subscription_updated(event['data']['object'])
-        elif event['type'] == 'customer.subscription.deleted':
-            handle_subscription_deleted(event['data']['object'])
-        elif event['type'] == 'invoice.payment_succeeded':
-            handle_payment_succeeded(event['data']['object'])
-        elif event['type'] == 'invoice.payment_failed':
-            handle_payment_failed(event['data']['object'])
-        elif event['type'] == 'payment_method.attached':
-            handle_payment_method_attached(event['data']['object'])
+        # Registrar o evento e processar de forma assíncrona (entregas repetidas são ignoradas)
+        stripe_event = record_event(event)
+        if stripe_event:
+            customer_id = stripe_event.customer_id
+            transaction.on_commit(lambda: process_stripe_events.delay(customer_id))
+        else:
+            logger.info(f"Evento Stripe duplicado ignorado: {event['id']}")
         
         return Response({'status': 'success'})
         
@@ -469,221 +464,3 @@ def stripe_webhook(request):
     except Exception as e:
         logger.error(f"Erro no webhook: {e}")
         return Response({'error': 'Erro interno'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-
-def handle_checkout_completed(session):
-    """Processa checkout completado"""
-    user_id = session.metadata.get('user_id')
-    if not user_id:
-        return
-    
-    try:
-        user = User.objects.get(id=user_id)
-        subscription = stripe.Subscription.retrieve(session.subscription)
-        
-        # Criar ou atualizar registro de assinatura
-        subscription_obj, created = Subscription.objects.get_or_create(
-            user=user,
-            defaults={
-                'stripe_customer_id': session.customer,
-                'stripe_subscription_id': session.subscription,
-                'stripe_price_id': subscription.items.data[0].price.id,
-                'status': subscription.status,
-                'current_period_start': timezone.datetime.fromtimestamp(subscription.current_period_start),
-                'current_period_end': timezone.datetime.fromtimestamp(subscription.current_period_end),
-                'trial_start': timezone.datetime.fromtimestamp(subscription.trial_start) if subscription.trial_start else None,
-                'trial_end': timezone.datetime.fromtimestamp(subscription.trial_end) if subscription.trial_end else None,
-                'plan_name': 'Plano Mensal Licitrix',
-                'plan_price': 59.90,
-                'plan_currency': 'BRL',
-                'plan_interval': 'month'
-            }
-        )
-        
-        if not created:
-            # Atualizar assinatura existente
-            subscription_obj.stripe_customer_id = session.customer
-            subscription_obj.stripe_subscription_id = session.subscription
-            subscription_obj.status = subscription.status
-            subscription_obj.current_period_start = timezone.datetime.fromtimestamp(subscription.current_period_start)
-            subscription_obj.current_period_end = timezone.datetime.fromtimestamp(subscription.current_period_end)
-            subscription_obj.save()
-        
-        # Ativar usuário
-        user.activate_subscription(session.customer, session.subscription)
-        
-        logger.info(f"Assinatura ativada para usuário: {user.email}")
-        
-    except Exception as e:
-        logger.error(f"Erro ao processar checkout: {e}")
-
-def handle_subscription_created(subscription):
-    """Processa assinatura criada"""
-    try:
-        user_id = subscription.metadata.get('user_id')
-        if not user_id:
-            return
-        
-        user = User.objects.get(id=user_id)
-        
-        # Atualizar assinatura local
-        if hasattr(user, 'subscription'):
-            user.subscription.status = subscription.status
-            user.subscription.current_period_start = timezone.datetime.fromtimestamp(subscription.current_period_start)
-            user.subscription.current_period_end = timezone.datetime.fromtimestamp(subscription.current_period_end)
-            user.subscription.save()
-        
-        logger.info(f"Assinatura criada para usuário: {user.email}")
-        
-    except Exception as e:
-        logger.error(f"Erro ao processar assinatura criada: {e}")
-
-def handle_subscription_updated(subscription):
-    """Processa assinatura atualizada"""
-    try:
-        # Buscar assinatura pelo ID do Stripe
-        subscription_obj = Subscription.objects.get(stripe_subscription_id=subscription.id)
-        
-        # Atualizar campos
-        subscription_obj.status = subscription.status
-        subscription_obj.cancel_at_period_end = subscription.cancel_at_period_end
-        subscription_obj.current_period_start = timezone.datetime.fromtimestamp(subscription.current_period_start)
-        subscription_obj.current_period_end = timezone.datetime.fromtimestamp(subscription.current_period_end)
-        
-        # Atualizar método de pagamento se disponível
-        if subscription.default_payment_method:
-            payment_method = stripe.PaymentMethod.retrieve(subscription.default_payment_method)
-            subscription_obj.default_payment_method_last4 = payment_method.card.last4
-            subscription_obj.default_payment_method_brand = payment_method.card.brand
-            subscription_obj.default_payment_method_exp_month = payment_method.card.exp_month
-            subscription_obj.default_payment_method_exp_year = payment_method.card.exp_year
-        
-        subscription_obj.save()
-        
-        # Atualizar usuário se necessário
-        user = subscription_obj.user
-        if subscription.status == 'canceled' and not subscription.cancel_at_period_end:
-            user.plano_ativo = False
-            user.data_fim_plano = timezone.now()
-            user.save()
-        
-        logger.info(f"Assinatura atualizada para usuário: {user.email}")
-        
-    except Subscription.DoesNotExist:
-        logger.error(f"Assinatura não encontrada: {subscription.id}")
-    except Exception as e:
-        logger.error(f"Erro ao processar assinatura atualizada: {e}")
-
-def handle_subscription_deleted(subscription):
-    """Processa assinatura cancelada"""
-    try:
-        subscription_obj = Subscription.objects.get(stripe_subscription_id=subscription.id)
-        subscription_obj.status = 'canceled'
-        subscription_obj.canceled_at = timezone.now()
-        subscription_obj.save()
-        
-        # Desativar usuário
-        user = subscription_obj.user
-        user.deactivate_subscription()
-        
-        logger.info(f"Assinatura cancelada: {subscription.id}")
-        
-    except Subscription.DoesNotExist:
-        logger.error(f"Assinatura não encontrada: {subscription.id}")
-    except Exception as e:
-        logger.error(f"Erro ao processar assinatura cancelada: {e}")
-
-def handle_payment_succeeded(invoice):
-    """Processa pagamento bem-sucedido"""
-    subscription_id = invoice.subscription
-    try:
-        subscription = Subscription.objects.get(stripe_subscription_id=subscription_id)
-        subscription.status = 'active'
-        subscription.current_period_start = timezone.datetime.fromtimestamp(invoice.period_start)
-        subscription.current_period_end = timezone.datetime.fromtimestamp(invoice.period_end)
-        subscription.grace_period_until = None  # Remover grace period
-        subscription.save()
-        
-        # Atualizar usuário
-        user = subscription.user
-        user.data_fim_plano = subscription.current_period_end
-        user.save()
-        
-        # Criar/atualizar fatura local
-        Invoice.objects.update_or_create(
-            stripe_invoice_id=invoice.id,
-            defaults={
-                'subscription': subscription,
-                'stripe_customer_id': invoice.customer,
-                'status': invoice.status,
-                'amount_due': invoice.amount_due / 100,
-                'amount_paid': invoice.amount_paid / 100,
-                'amount_remaining': invoice.amount_remaining / 100,
-                'currency': invoice.currency.upper(),
-                'hosted_invoice_url': invoice.hosted_invoice_url,
-                'invoice_pdf': invoice.invoice_pdf,
-                'due_date': timezone.datetime.fromtimestamp(invoice.due_date) if invoice.due_date else None,
-                'paid_at': timezone.now(),
-            }
-        )
-        
-        logger.info(f"Pagamento processado para assinatura: {subscription_id}")
-        
-    except Subscription.DoesNotExist:
-        logger.error(f"Assinatura não encontrada: {subscription_id}")
-    except Exception as e:
-        logger.error(f"Erro ao processar pagamento: {e}")
-
-def handle_payment_failed(invoice):
-    """Processa pagamento falhado"""
-    subscription_id = invoice.subscription
-    try:
-        subscription = Subscription.objects.get(stripe_subscription_id=subscription_id)
-        subscription.status = 'past_due'
-        subscription.start_grace_period(days=3)  # Grace period de 3 dias
-        subscription.save()
-        
-        # Criar/atualizar fatura local
-        Invoice.objects.update_or_create(
-            stripe_invoice_id=invoice.id,
-            defaults={
-                'subscription': subscription,
-                'stripe_customer_id': invoice.customer,
-                'status': invoice.status,
-                'amount_due': invoice.amount_due / 100,
-                'amount_paid': invoice.amount_paid / 100,
-                'amount_remaining': invoice.amount_remaining / 100,
-                'currency': invoice.currency.upper(),
-                'hosted_invoice_url': invoice.hosted_invoice_url,
-                'invoice_pdf': invoice.invoice_pdf,
-                'due_date': timezone.datetime.fromtimestamp(invoice.due_date) if invoice.due_date else None,
-            }
-        )
-        
-        logger.warning(f"Pagamento falhou para assinatura: {subscription_id}")
-        
-    except Subscription.DoesNotExist:
-        logger.error(f"Assinatura não encontrada: {subscription_id}")
-    except Exception as e:
-        logger.error(f"Erro ao processar pagamento falhado: {e}")
-
-def handle_payment_method_attached(payment_method):
-    """Processa método de pagamento anexado"""
-    try:
-        customer_id = payment_method.customer
-        
-        # Buscar assinatura pelo customer ID
-        subscription = Subscription.objects.get(stripe_customer_id=customer_id)
-        
-        # Atualizar informações do método de pagamento
-        subscription.default_payment_method_last4 = payment_method.card.last4
-        subscription.default_payment_method_brand = payment_method.card.brand
-        subscription.default_payment_method_exp_month = payment_method.card.exp_month
-        subscription.default_payment_method_exp_year = payment_method.card.exp_year
-        subscription.save()
-        
-        logger.info(f"Método de pagamento atualizado para assinatura: {subscription.id}")
-        
-    except Subscription.DoesNotExist:
-        logger.error(f"Assinatura não encontrada para customer: {customer_id}")
-    except Exception as e:
-        logger.error(f"Erro ao processar método de pagamento: {e}")
@@ -7,3 +7,6 @@ class OportunidadesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'modules.oportunidades'
     verbose_name = 'Oportunidades'
+    
+    def ready(self):
+        from . import signals  # noqa: F401
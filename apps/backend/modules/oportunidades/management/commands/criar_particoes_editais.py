@@ -0,0 +1,47 @@
+"""
+Cria antecipadamente as partições mensais da tabela de editais.
+
+Uso (por schema de tenant, via django-tenants):
+
+    python manage.py all_tenants_command criar_particoes_editais --meses 6
+    python manage.py tenant_command criar_particoes_editais --converter --schema=<schema>
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from modules.oportunidades.services import particoes
+
+
+class Command(BaseCommand):
+    help = 'Cria as partições mensais de oportunidades_edital para os próximos meses.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--meses',
+            type=int,
+            default=settings.EDITAL_PARTICOES_MESES_FUTUROS,
+            help='Quantidade de meses à frente do mês atual (padrão: EDITAL_PARTICOES_MESES_FUTUROS).',
+        )
+        parser.add_argument(
+            '--converter',
+            action='store_true',
+            help='Converte a tabela atual em tabela particionada antes (janela de manutenção).',
+        )
+
+    def handle(self, *args, meses, converter, **options):
+        if meses < 0:
+            raise CommandError('--meses não pode ser negativo.')
+
+        if not particoes.esta_particionada():
+            if not converter:
+                raise CommandError(
+                    f'{particoes.TABELA} não é particionada; use --converter para convertê-la.'
+                )
+            particoes.converter_tabela(meses)
+            self.stdout.write(self.style.SUCCESS(f'{particoes.TABELA} convertida em tabela particionada.'))
+
+        criadas = particoes.criar_particoes(meses)
+        for nome in criadas:
+            self.stdout.write(f'Partição criada: {nome}')
+        self.stdout.write(self.style.SUCCESS(f'{len(criadas)} partições criadas.'))
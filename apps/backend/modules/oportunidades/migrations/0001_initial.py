@@ -0,0 +1,191 @@
+# Generated by Django 4.2.10 on 2026-10-17 02:30
+
+from decimal import Decimal
+from django.conf import settings
+import django.contrib.postgres.indexes
+import django.contrib.postgres.operations
+import django.contrib.postgres.search
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('tenancy', '__first__'),
+    ]
+
+    operations = [
+        django.contrib.postgres.operations.TrigramExtension(),
+        django.contrib.postgres.operations.UnaccentExtension(),
+        migrations.CreateModel(
+            name='DocumentoExigido',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nome', models.CharField(max_length=200, verbose_name='Nome do Documento')),
+                ('tipo', models.CharField(choices=[('declaracao', 'Declaração'), ('certificado', 'Certificado'), ('contrato', 'Contrato'), ('procuracao', 'Procuração'), ('outro', 'Outro')], default='declaracao', max_length=20, verbose_name='Tipo')),
+                ('descricao', models.TextField(blank=True, verbose_name='Descrição')),
+                ('obrigatorio', models.BooleanField(default=True, verbose_name='Obrigatório')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Criado em')),
+            ],
+            options={
+                'verbose_name': 'Documento Exigido',
+                'verbose_name_plural': 'Documentos Exigidos',
+                'db_table': 'oportunidades_documento_exigido',
+            },
+        ),
+        migrations.CreateModel(
+            name='Edital',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('numero', models.CharField(max_length=100, verbose_name='Número do Edital')),
+                ('ano', models.PositiveIntegerField(verbose_name='Ano')),
+                ('objeto', models.TextField(verbose_name='Objeto da Licitação')),
+                ('origem', models.CharField(choices=[('portal', 'Portal Oficial'), ('upload', 'Upload Manual'), ('api', 'API Externa'), ('crawler', 'Crawler')], default='upload', max_length=20, verbose_name='Origem')),
+                ('status_ingestao', models.CharField(choices=[('pendente', 'Pendente'), ('processando', 'Processando'), ('concluido', 'Concluído'), ('erro', 'Erro')], default='pendente', max_length=20, verbose_name='Status da Ingestão')),
+                ('orgao', models.CharField(max_length=200, verbose_name='Órgão Licitantante')),
+                ('uf', models.CharField(max_length=2, verbose_name='UF')),
+                ('municipio', models.CharField(max_length=100, verbose_name='Município')),
+                ('modalidade', models.CharField(choices=[('pregao_eletronico', 'Pregão Eletrônico'), ('pregao_presencial', 'Pregão Presencial'), ('concorrencia', 'Concorrência'), ('tomada_precos', 'Tomada de Preços'), ('convite', 'Convite'), ('concurso', 'Concurso'), ('leilao', 'Leilão'), ('dispensa', 'Dispensa de Licitação'), ('inexigibilidade', 'Inexigibilidade de Licitação')], max_length=30, verbose_name='Modalidade')),
+                ('valor_estimado', models.DecimalField(blank=True, decimal_places=2, max_digits=15, null=True, verbose_name='Valor Estimado')),
+                ('data_publicacao', models.DateField(verbose_name='Data de Publicação')),
+                ('data_abertura', models.DateField(verbose_name='Data de Abertura')),
+                ('data_encerramento', models.DateField(blank=True, null=True, verbose_name='Data de Encerramento')),
+                ('arquivo_original', models.FileField(upload_to='editais/originais/', verbose_name='Arquivo Original')),
+                ('arquivo_processado', models.JSONField(blank=True, null=True, verbose_name='Arquivo Processado')),
+                ('arquivo_sha256', models.CharField(blank=True, db_index=True, max_length=64, verbose_name='SHA-256 do Arquivo')),
+                ('texto_extraido', models.FileField(blank=True, max_length=255, upload_to='editais/textos/', verbose_name='Texto Extraído')),
+                ('itens_extraidos', models.JSONField(blank=True, default=list, verbose_name='Itens Extraídos')),
+                ('documentos_exigidos', models.JSONField(blank=True, default=list, verbose_name='Documentos Exigidos')),
+                ('observacoes', models.TextField(blank=True, verbose_name='Observações')),
+                ('parse_errors', models.JSONField(blank=True, default=list, verbose_name='Erros de Parse')),
+                ('lote_ia_id', models.CharField(blank=True, db_index=True, max_length=100, verbose_name='Lote de IA')),
+                ('processando_desde', models.DateTimeField(blank=True, null=True, verbose_name='Processando desde')),
+                ('confidence_score', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True, verbose_name='Score de Confiança')),
+                ('busca', django.contrib.postgres.search.SearchVectorField(editable=False, null=True, verbose_name='Vetor de Busca')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Criado em')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Atualizado em')),
+                ('processed_at', models.DateTimeField(blank=True, null=True, verbose_name='Processado em')),
+            ],
+            options={
+                'verbose_name': 'Edital',
+                'verbose_name_plural': 'Editais',
+                'db_table': 'oportunidades_edital',
+            },
+        ),
+        migrations.CreateModel(
+            name='OportunidadeTenant',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('nova', 'Nova'), ('analisando', 'Analisando'), ('proposta_enviada', 'Proposta Enviada'), ('vencedora', 'Vencedora'), ('perdida', 'Perdida'), ('desistiu', 'Desistiu'), ('cancelada', 'Cancelada')], default='nova', max_length=20, verbose_name='Status')),
+                ('match_score', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True, verbose_name='Score de Match')),
+                ('keywords_match', models.JSONField(blank=True, default=list, verbose_name='Palavras-chave que Combinam')),
+                ('relevancia_score', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True, verbose_name='Score de Relevância')),
+                ('decisao', models.CharField(blank=True, max_length=50, verbose_name='Decisão')),
+                ('justificativa', models.TextField(blank=True, verbose_name='Justificativa')),
+                ('data_analise', models.DateTimeField(blank=True, null=True, verbose_name='Data da Análise')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Criado em')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Atualizado em')),
+                ('edital', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='oportunidades_tenant', to='oportunidades.edital')),
+                ('responsavel', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='oportunidades_responsavel', to=settings.AUTH_USER_MODEL)),
+                ('tenant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='oportunidades', to='tenancy.tenant')),
+            ],
+            options={
+                'verbose_name': 'Oportunidade do Tenant',
+                'verbose_name_plural': 'Oportunidades dos Tenants',
+                'db_table': 'oportunidades_oportunidade_tenant',
+            },
+        ),
+        migrations.CreateModel(
+            name='ItemEdital',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('codigo', models.CharField(max_length=50, verbose_name='Código')),
+                ('descricao', models.TextField(verbose_name='Descrição')),
+                ('especificacao_tecnica', models.TextField(blank=True, verbose_name='Especificação Técnica')),
+                ('quantidade', models.DecimalField(decimal_places=2, max_digits=10, validators=[django.core.validators.MinValueValidator(Decimal('0.01'))], verbose_name='Quantidade')),
+                ('unidade', models.CharField(max_length=20, verbose_name='Unidade')),
+                ('valor_unitario_estimado', models.DecimalField(blank=True, decimal_places=2, max_digits=15, null=True, verbose_name='Valor Unitário Estimado')),
+                ('valor_total_estimado', models.DecimalField(blank=True, decimal_places=2, max_digits=15, null=True, verbose_name='Valor Total Estimado')),
+                ('categoria', models.CharField(blank=True, max_length=100, verbose_name='Categoria')),
+                ('subcategoria', models.CharField(blank=True, max_length=100, verbose_name='Subcategoria')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Criado em')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Atualizado em')),
+                ('edital', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='itens', to='oportunidades.edital')),
+            ],
+            options={
+                'verbose_name': 'Item do Edital',
+                'verbose_name_plural': 'Itens do Edital',
+                'db_table': 'oportunidades_item_edital',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='edital',
+            index=models.Index(fields=['status_ingestao'], name='oportunidad_status__cdc6a0_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='edital',
+            index=models.Index(fields=['modalidade', 'uf'], name='oportunidad_modalid_6f5140_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='edital',
+            index=models.Index(fields=['data_publicacao'], name='oportunidad_data_pu_586114_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='edital',
+            index=models.Index(fields=['valor_estimado'], name='oportunidad_valor_e_79f201_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='edital',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['busca'], name='edital_busca_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='edital',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['orgao'], name='edital_orgao_trgm', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='edital',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['municipio'], name='edital_municipio_trgm', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AlterUniqueTogether(
+            name='edital',
+            unique_together={('numero', 'ano', 'orgao')},
+        ),
+        migrations.AddField(
+            model_name='documentoexigido',
+            name='edital',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='documentos_exigidos_rel', to='oportunidades.edital'),
+        ),
+        migrations.AddIndex(
+            model_name='oportunidadetenant',
+            index=models.Index(fields=['tenant', 'status'], name='oportunidad_tenant__efd15d_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='oportunidadetenant',
+            index=models.Index(fields=['match_score'], name='oportunidad_match_s_8f082b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='oportunidadetenant',
+            index=models.Index(fields=['data_analise'], name='oportunidad_data_an_1b9aee_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='oportunidadetenant',
+            unique_together={('tenant', 'edital')},
+        ),
+        migrations.AddIndex(
+            model_name='itemedital',
+            index=models.Index(fields=['categoria', 'subcategoria'], name='oportunidad_categor_d35683_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='itemedital',
+            constraint=models.UniqueConstraint(fields=('edital', 'codigo'), name='uniq_item_edital_codigo'),
+        ),
+        migrations.AddConstraint(
+            model_name='documentoexigido',
+            constraint=models.UniqueConstraint(fields=('edital', 'nome'), name='uniq_documento_edital_nome'),
+        ),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 4.2.10 on 2026-10-17 02:30
+
+from django.db import migrations, models
+
+UNICIDADE = 'oportunidades_edital_numero_ano_orgao_uniq'
+
+
+def _particionada(schema_editor, tabela):
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s))",
+            [tabela],
+        )
+        return cursor.fetchone()[0]
+
+
+def trocar_unicidade(apps, schema_editor):
+    """
+    Tabela não particionada: troca (numero, ano, orgao) pela unicidade com
+    ``data_publicacao``. Na particionada, ``converter_tabela`` já a criou.
+    """
+    Edital = apps.get_model('oportunidades', 'Edital')
+    if _particionada(schema_editor, Edital._meta.db_table):
+        return
+    schema_editor.alter_unique_together(Edital, {('numero', 'ano', 'orgao')}, set())
+    schema_editor.execute(
+        f'ALTER TABLE "{Edital._meta.db_table}" ADD CONSTRAINT "{UNICIDADE}" '
+        f'UNIQUE (numero, ano, orgao, data_publicacao)'
+    )
+
+
+def restaurar_unicidade(apps, schema_editor):
+    Edital = apps.get_model('oportunidades', 'Edital')
+    if _particionada(schema_editor, Edital._meta.db_table):
+        return
+    schema_editor.execute(f'ALTER TABLE "{Edital._meta.db_table}" DROP CONSTRAINT "{UNICIDADE}"')
+    schema_editor.alter_unique_together(Edital, set(), {('numero', 'ano', 'orgao')})
+
+
+class Migration(migrations.Migration):
+    """
+    Unicidade de editais compatível com a tabela particionada por
+    ``data_publicacao`` (ver ``services/particoes.py``).
+
+    O estado passa a ter a constraint de quatro colunas em qualquer caso; no
+    banco, só a tabela ainda não particionada precisa ser alterada.
+    """
+
+    dependencies = [
+        ('oportunidades', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunPython(trocar_unicidade, restaurar_unicidade),
+            ],
+            state_operations=[
+                migrations.AlterUniqueTogether(
+                    name='edital',
+                    unique_together=set(),
+                ),
+                migrations.AddConstraint(
+                    model_name='edital',
+                    constraint=models.UniqueConstraint(
+                        fields=('numero', 'ano', 'orgao', 'data_publicacao'),
+                        name=UNICIDADE,
+                    ),
+                ),
+            ],
+        ),
+    ]
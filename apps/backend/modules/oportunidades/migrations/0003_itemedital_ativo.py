@@ -0,0 +1,18 @@
+# Generated by Django 4.2.10 on 2026-10-17 02:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('oportunidades', '0002_unicidade_particionada'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='itemedital',
+            name='ativo',
+            field=models.BooleanField(default=True, verbose_name='Ativo'),
+        ),
+    ]
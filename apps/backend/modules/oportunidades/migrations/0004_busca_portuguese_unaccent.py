@@ -0,0 +1,40 @@
+# Generated by Django 4.2.10 on 2026-10-17 02:30
+
+from django.contrib.postgres.operations import UnaccentExtension
+from django.db import migrations
+
+CRIAR_CONFIGURACAO = """
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT FROM pg_catalog.pg_ts_config c
+        JOIN pg_catalog.pg_namespace n ON n.oid = c.cfgnamespace
+        WHERE c.cfgname = 'portuguese_unaccent' AND n.nspname = 'public'
+    ) THEN
+        CREATE TEXT SEARCH CONFIGURATION public.portuguese_unaccent (COPY = portuguese);
+        ALTER TEXT SEARCH CONFIGURATION public.portuguese_unaccent
+            ALTER MAPPING FOR hword, hword_part, word WITH unaccent, portuguese_stem;
+    END IF;
+END
+$$;
+"""
+
+
+class Migration(migrations.Migration):
+    """
+    Configuração de busca textual ``portuguese_unaccent`` (``EDITAL_BUSCA_CONFIG``).
+
+    Antes só existia em ``infra/docker/postgres/init.sql``. A configuração fica
+    no schema ``public``, visível para todos os tenants, e é criada uma única
+    vez: as migrações dos schemas seguintes não fazem nada. Não é removida na
+    reversão, porque os outros schemas continuam a usá-la.
+    """
+
+    dependencies = [
+        ('oportunidades', '0003_itemedital_ativo'),
+    ]
+
+    operations = [
+        UnaccentExtension(),
+        migrations.RunSQL(CRIAR_CONFIGURACAO, migrations.RunSQL.noop),
+    ]
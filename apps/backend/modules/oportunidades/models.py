@@ -1,13 +1,21 @@
 """
 Modelos para o módulo de oportunidades.
 """
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator
 from django.utils import timezone
 from decimal import Decimal
 
 class Edital(models.Model):
-    """Modelo para editais de licitação."""
+    """
+    Modelo para editais de licitação.
+    
+    No banco, a tabela pode ser particionada por mês de ``data_publicacao``
+    (ver ``services/particoes.py``).
+    """
     
     ORIGEM_CHOICES = [
         ('portal', 'Portal Oficial'),
@@ -72,6 +80,13 @@ class Edital(models.Model):
     # Documentos
     arquivo_original = models.FileField('Arquivo Original', upload_to='editais/originais/')
     arquivo_processado = models.JSONField('Arquivo Processado', null=True, blank=True)
+    arquivo_sha256 = models.CharField('SHA-256 do Arquivo', max_length=64, blank=True, db_index=True)
+    texto_extraido = models.FileField(
+        'Texto Extraído',
+        upload_to='editais/textos/',
+        max_length=255,
+        blank=True
+    )
     
     # Metadados extraídos
     itens_extraidos = models.JSONField('Itens Extraídos', default=list, blank=True)
@@ -80,6 +95,8 @@ class Edital(models.Model):
     
     # Processamento IA
     parse_errors = models.JSONField('Erros de Parse', default=list, blank=True)
+    lote_ia_id = models.CharField('Lote de IA', max_length=100, blank=True, db_index=True)
+    processando_desde = models.DateTimeField('Processando desde', null=True, blank=True)
     confidence_score = models.DecimalField(
         'Score de Confiança',
         max_digits=5,
@@ -88,6 +105,9 @@ class Edital(models.Model):
         blank=True
     )
     
+    # Busca textual (mantida por services.busca.atualizar_vetor_busca)
+    busca = SearchVectorField('Vetor de Busca', null=True, editable=False)
+    
     # Metadados
     created_at = models.DateTimeField('Criado em', auto_now_add=True)
     updated_at = models.DateTimeField('Atualizado em', auto_now=True)
@@ -97,17 +117,41 @@ class Edital(models.Model):
         verbose_name = 'Edital'
         verbose_name_plural = 'Editais'
         db_table = 'oportunidades_edital'
-        unique_together = ['numero', 'ano', 'orgao']
+        constraints = [
+            # Tabela particionada só aceita unicidade com a chave de partição; a de
+            # (numero, ano, orgao) é verificada em validate_unique
+            models.UniqueConstraint(
+                fields=['numero', 'ano', 'orgao', 'data_publicacao'],
+                name='oportunidades_edital_numero_ano_orgao_uniq',
+            ),
+        ]
         indexes = [
             models.Index(fields=['status_ingestao']),
             models.Index(fields=['modalidade', 'uf']),
             models.Index(fields=['data_publicacao']),
             models.Index(fields=['valor_estimado']),
+            GinIndex(fields=['busca'], name='edital_busca_gin'),
+            GinIndex(fields=['orgao'], opclasses=['gin_trgm_ops'], name='edital_orgao_trgm'),
+            GinIndex(fields=['municipio'], opclasses=['gin_trgm_ops'], name='edital_municipio_trgm'),
         ]
     
     def __str__(self):
         return f"{self.numero}/{self.ano} - {self.orgao}"
     
+    def validate_unique(self, exclude=None):
+        """Valida também (numero, ano, orgao), que o banco só garante por data de publicação."""
+        super().validate_unique(exclude)
+        if exclude and {'numero', 'ano', 'orgao'} & set(exclude):
+            return
+        
+        duplicado = Edital.objects.filter(
+            numero=self.numero, ano=self.ano, orgao=self.orgao
+        ).exclude(pk=self.pk)
+        if duplicado.exists():
+            raise ValidationError(
+                f"Já existe o edital {self.numero}/{self.ano} do órgão {self.orgao}."
+            )
+    
     @property
     def is_open(self):
         """Verifica se a licitação está aberta."""
@@ -123,13 +167,21 @@ class Edital(models.Model):
         delta = self.data_encerramento - timezone.now().date()
         return delta.days
     
+    def carregar_texto(self):
+        """Retorna o texto normalizado já extraído do arquivo, se houver."""
+        if not self.arquivo_sha256:
+            return None
+        
+        from .services.texto_cache import TextoExtraidoStore
+        return TextoExtraidoStore().obter(self.arquivo_sha256)
+    
     def mark_as_processed(self, confidence_score=None):
         """Marca o edital como processado."""
         self.status_ingestao = 'concluido'
         self.processed_at = timezone.now()
         if confidence_score:
             self.confidence_score = confidence_score
-        self.save(update_fields=['status_ingestao', 'processed_at', 'confidence_score'])
+        self.save(update_fields=['status_ingestao', 'processed_at', 'confidence_score', 'updated_at'])
 
 class OportunidadeTenant(models.Model):
     """Modelo para oportunidades específicas de cada tenant."""
@@ -145,7 +197,12 @@ class OportunidadeTenant(models.Model):
     ]
     
     tenant = models.ForeignKey('tenancy.Tenant', on_delete=models.CASCADE, related_name='oportunidades')
-    edital = models.ForeignKey(Edital, on_delete=models.CASCADE, related_name='oportunidades_tenant')
+    edital = models.ForeignKey(
+        Edital,
+        on_delete=models.CASCADE,
+        related_name='oportunidades_tenant',
+        db_constraint=False  # editais é particionada (ver services/particoes.py)
+    )
     
     # Status e acompanhamento
     status = models.CharField('Status', max_length=20, choices=STATUS_CHOICES, default='nova')
@@ -220,7 +277,12 @@ class OportunidadeTenant(models.Model):
 class ItemEdital(models.Model):
     """Modelo para itens específicos do edital."""
     
-    edital = models.ForeignKey(Edital, on_delete=models.CASCADE, related_name='itens')
+    edital = models.ForeignKey(
+        Edital,
+        on_delete=models.CASCADE,
+        related_name='itens',
+        db_constraint=False  # editais é particionada (ver services/particoes.py)
+    )
     
     # Identificação
     codigo = models.CharField('Código', max_length=50)
@@ -256,6 +318,9 @@ class ItemEdital(models.Model):
     categoria = models.CharField('Categoria', max_length=100, blank=True)
     subcategoria = models.CharField('Subcategoria', max_length=100, blank=True)
     
+    # False: o item saiu do edital no reprocessamento, mas tem propostas e foi mantido
+    ativo = models.BooleanField('Ativo', default=True)
+    
     # Metadados
     created_at = models.DateTimeField('Criado em', auto_now_add=True)
     updated_at = models.DateTimeField('Atualizado em', auto_now=True)
@@ -265,9 +330,12 @@ class ItemEdital(models.Model):
         verbose_name_plural = 'Itens do Edital'
         db_table = 'oportunidades_item_edital'
         indexes = [
-            models.Index(fields=['edital', 'codigo']),
             models.Index(fields=['categoria', 'subcategoria']),
         ]
+        constraints = [
+            # Também serve de alvo do upsert em lote no reprocessamento
+            models.UniqueConstraint(fields=['edital', 'codigo'], name='uniq_item_edital_codigo'),
+        ]
     
     def __str__(self):
         return f"{self.codigo} - {self.descricao[:50]}..."
@@ -289,7 +357,12 @@ class DocumentoExigido(models.Model):
         ('outro', 'Outro'),
     ]
     
-    edital = models.ForeignKey(Edital, on_delete=models.CASCADE, related_name='documentos_exigidos_rel')
+    edital = models.ForeignKey(
+        Edital,
+        on_delete=models.CASCADE,
+        related_name='documentos_exigidos_rel',
+        db_constraint=False  # editais é particionada (ver services/particoes.py)
+    )
     
     nome = models.CharField('Nome do Documento', max_length=200)
     tipo = models.CharField('Tipo', max_length=20, choices=TIPO_CHOICES, default='declaracao')
@@ -303,6 +376,9 @@ class DocumentoExigido(models.Model):
         verbose_name = 'Documento Exigido'
         verbose_name_plural = 'Documentos Exigidos'
         db_table = 'oportunidades_documento_exigido'
+        constraints = [
+            models.UniqueConstraint(fields=['edital', 'nome'], name='uniq_documento_edital_nome'),
+        ]
     
     def __str__(self):
         return f"{self.nome} ({self.get_tipo_display()})"
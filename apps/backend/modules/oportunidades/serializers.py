@@ -0,0 +1,32 @@
+from rest_framework import serializers
+from .models import Edital
+
+class BuscaEditaisParamsSerializer(serializers.Serializer):
+    """Parâmetros da busca de editais (query string)."""
+    q = serializers.CharField(required=False, allow_blank=True, default='', max_length=200)
+    orgao = serializers.CharField(required=False, allow_blank=True, default='', max_length=200)
+    uf = serializers.CharField(required=False, allow_blank=True, default='', max_length=2)
+    modalidade = serializers.ChoiceField(
+        choices=Edital.MODALIDADE_CHOICES, required=False, allow_blank=True, default=''
+    )
+    valor_min = serializers.DecimalField(max_digits=15, decimal_places=2, required=False)
+    valor_max = serializers.DecimalField(max_digits=15, decimal_places=2, required=False)
+    pagina = serializers.IntegerField(required=False, default=1, min_value=1, max_value=500)
+    tamanho = serializers.IntegerField(required=False, default=20, min_value=1, max_value=100)
+    
+    def validate(self, attrs):
+        minimo, maximo = attrs.get('valor_min'), attrs.get('valor_max')
+        if minimo is not None and maximo is not None and minimo > maximo:
+            raise serializers.ValidationError("valor_min deve ser menor ou igual a valor_max.")
+        return attrs
+
+class EditalBuscaSerializer(serializers.ModelSerializer):
+    relevancia = serializers.FloatField(read_only=True)
+    
+    class Meta:
+        model = Edital
+        fields = (
+            'id', 'numero', 'ano', 'objeto', 'orgao', 'uf', 'municipio', 'modalidade',
+            'valor_estimado', 'data_publicacao', 'data_abertura', 'data_encerramento',
+            'relevancia',
+        )
@@ -4,25 +4,70 @@ Serviço de IA para parsing de editais.
 
 import logging
 import json
-import re
-from typing import Dict, List, Any, Optional
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Dict, List, Any, Optional, Tuple
 from pathlib import Path
 
 import openai
 from django.conf import settings
 from django.utils import timezone
 
+from . import regex_fallback
+from .chunking import SEPARADOR_PAGINA, dividir_em_chunks
+from .llm_cache import LLMResponseCache, chave_llm
+from .texto_cache import (
+    TextoExtraidoStore, calcular_sha256, caminho_texto, normalizar_texto
+)
+
 logger = logging.getLogger(__name__)
 
 class EditalAIParser:
     """Parser de editais usando IA."""
     
-    def __init__(self):
-        """Inicializa o parser."""
-        self.openai_client = None
-        if settings.OPENAI_API_KEY:
+    # Instrução ao usuário e limite de tokens de cada tipo de extração
+    EXTRACOES = {
+        'metadados': ("Extraia os metadados deste edital", 1000),
+        'itens': ("Extraia os itens desta licitação", 1500),
+        'documentos': ("Extraia os documentos exigidos", 1000),
+    }
+    
+    # Trecho inicial usado para metadados (capa e preâmbulo)
+    TAMANHO_TRECHO_METADADOS = 4000
+    
+    def __init__(self, openai_client=None, concorrente: Optional[bool] = None,
+                 cache: Optional[LLMResponseCache] = None,
+                 texto_store: Optional[TextoExtraidoStore] = None):
+        """
+        Inicializa o parser.
+        
+        Args:
+            openai_client: Cliente OpenAI já configurado (opcional)
+            concorrente: Força o modo de extração concorrente (padrão: settings)
+            cache: Cache de respostas do LLM (padrão: settings)
+            texto_store: Store do texto extraído por hash do arquivo (opcional)
+        """
+        self.openai_client = openai_client
+        if self.openai_client is None and settings.OPENAI_API_KEY:
             openai.api_key = settings.OPENAI_API_KEY
-            self.openai_client = openai.OpenAI()
+            self.openai_client = openai.OpenAI(
+                base_url=settings.OPENAI_BASE_URL or None,
+                max_retries=settings.EDITAL_PARSER_LLM_MAX_RETRIES,
+            )
+        
+        self.model = settings.OPENAI_MODEL
+        self.llm_timeout = settings.EDITAL_PARSER_LLM_TIMEOUT
+        self.llm_max_retries = settings.EDITAL_PARSER_LLM_MAX_RETRIES
+        self.prazo_total = settings.EDITAL_PARSER_DEADLINE
+        self.chunk_size = settings.EDITAL_PARSER_CHUNK_SIZE
+        self.chunk_workers = settings.EDITAL_PARSER_CHUNK_WORKERS
+        self.concorrente = (
+            settings.EDITAL_PARSER_CONCURRENT if concorrente is None else concorrente
+        )
+        self.llm_cache = cache if cache is not None else LLMResponseCache()
+        self.texto_store = texto_store
+        if self.texto_store is None and settings.EDITAL_TEXT_CACHE_ENABLED:
+            self.texto_store = TextoExtraidoStore()
         
         # Prompts base para diferentes tipos de extração
         self.prompts = {
@@ -86,42 +131,25 @@ class EditalAIParser:
         try:
             logger.info(f"Iniciando parsing do edital: {arquivo_path}")
             
-            # Lê o conteúdo do arquivo
-            conteudo = self._ler_arquivo(arquivo_path)
+            # Lê o conteúdo do arquivo (ou o texto já extraído para o mesmo hash)
+            conteudo, artefato = self.obter_texto(arquivo_path)
             if not conteudo:
                 return {
                     'sucesso': False,
                     'erros': ['Não foi possível ler o arquivo']
                 }
             
-            # Extrai metadados básicos
-            metadados = self._extrair_metadados(conteudo)
-            if not metadados:
-                return {
-                    'sucesso': False,
-                    'erros': ['Não foi possível extrair metadados']
-                }
-            
-            # Extrai itens
-            itens = self._extrair_itens(conteudo)
-            
-            # Extrai documentos exigidos
-            documentos = self._extrair_documentos(conteudo)
-            
-            # Calcula score de confiança
-            confidence_score = self._calcular_confidence_score(metadados, itens, documentos)
-            
-            resultado = {
-                'sucesso': True,
-                'dados': metadados,
-                'itens': itens,
-                'documentos': documentos,
-                'confidence_score': confidence_score,
-                'timestamp': timezone.now().isoformat()
-            }
+            # Extrai metadados, itens e documentos exigidos
+            # Instante (time.monotonic) em que o parsing deste edital expira
+            prazo_final = time.monotonic() + self.prazo_total
+            if self.concorrente and self.openai_client:
+                metadados, itens, documentos = self._extrair_concorrente(conteudo, prazo_final)
+            else:
+                metadados = self._extrair_metadados(conteudo, prazo_final)
+                itens = self._extrair_itens(conteudo, prazo_final) if metadados else []
+                documentos = self._extrair_documentos(conteudo, prazo_final) if metadados else []
             
-            logger.info(f"Parsing concluído com sucesso. Score: {confidence_score}")
-            return resultado
+            return self.montar_resultado(metadados, itens, documentos, artefato)
             
         except Exception as e:
             logger.error(f"Erro no parsing do edital: {e}")
@@ -130,6 +158,268 @@ class EditalAIParser:
                 'erros': [str(e)]
             }
     
+    def montar_resultado(self, metadados: Optional[Dict[str, Any]], itens: List,
+                         documentos: List, artefato: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        """Monta o resultado do parsing a partir das extrações (modo síncrono ou em lote)."""
+        if not metadados:
+            return {
+                'sucesso': False,
+                'erros': ['Não foi possível extrair metadados']
+            }
+        
+        # Calcula score de confiança
+        confidence_score = self._calcular_confidence_score(metadados, itens, documentos)
+        
+        resultado = {
+            'sucesso': True,
+            'dados': metadados,
+            'itens': itens,
+            'documentos': documentos,
+            'confidence_score': confidence_score,
+            'timestamp': timezone.now().isoformat(),
+            **(artefato or {})
+        }
+        
+        logger.info(f"Parsing concluído com sucesso. Score: {confidence_score}")
+        return resultado
+    
+    def _extrair_concorrente(self, conteudo: str, prazo_final: float):
+        """
+        Dispara as chamadas de IA das três extrações em um único pool.
+        
+        Metadados e cada bloco de itens e documentos viram uma tarefa do mesmo
+        pool, limitado por ``EDITAL_PARSER_CHUNK_WORKERS``: esse é o teto de
+        chamadas simultâneas por edital. Ao fim do prazo global, o que não
+        terminou usa o fallback por regex (no bloco atrasado, não no edital
+        inteiro). As chamadas em andamento não ficam órfãs: o timeout e os
+        retries de cada uma são limitados ao prazo restante (``_chamar_llm``).
+        """
+        chunks = dividir_em_chunks(conteudo, self.chunk_size)
+        
+        executor = ThreadPoolExecutor(
+            max_workers=self.chunk_workers,
+            thread_name_prefix='edital-parser'
+        )
+        try:
+            metadados = executor.submit(self._extrair_metadados, conteudo, prazo_final)
+            blocos = {
+                tipo: (fallback, [
+                    (chunk, executor.submit(self._extrair_chunk, tipo, chunk, fallback, prazo_final))
+                    for chunk in chunks
+                ])
+                for tipo, fallback in (
+                    ('itens', self._extrair_itens_fallback),
+                    ('documentos', self._extrair_documentos_fallback),
+                )
+            }
+            
+            todas = [metadados] + [future for _, lista in blocos.values() for _, future in lista]
+            wait(todas, timeout=max(0.0, prazo_final - time.monotonic()))
+            
+            if metadados.done():
+                resultado_metadados = metadados.result()
+            else:
+                metadados.cancel()
+                logger.warning("Extração de metadados excedeu o prazo; usando fallback")
+                resultado_metadados = self._extrair_metadados_fallback(conteudo)
+            
+            partes = {}
+            for tipo, (fallback, lista) in blocos.items():
+                partes[tipo] = []
+                atrasados = 0
+                for chunk, future in lista:
+                    if future.done():
+                        partes[tipo].append(future.result())
+                    else:
+                        future.cancel()
+                        atrasados += 1
+                        partes[tipo].append(fallback(chunk))
+                if atrasados:
+                    logger.warning(
+                        f"Extração de {tipo} excedeu o prazo em {atrasados} bloco(s); usando fallback"
+                    )
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+        
+        return (
+            resultado_metadados,
+            self.mesclar_itens(partes['itens']),
+            self.mesclar_documentos(partes['documentos']),
+        )
+    
+    def _extrair_chunk(self, tipo: str, chunk: str, fallback,
+                       prazo_final: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Extrai ``tipo`` de um bloco; se a chamada falhar, usa o fallback só no bloco."""
+        try:
+            return self.como_lista(self._chamar_llm(tipo, chunk, prazo_final))
+        except Exception as e:
+            logger.error(f"Erro na extração de {tipo} em bloco do edital: {e}")
+            return fallback(chunk)
+    
+    def _mapear_chunks(self, tipo: str, conteudo: str, fallback,
+                       prazo_final: Optional[float] = None) -> List[List[Dict[str, Any]]]:
+        """
+        Executa a extração ``tipo`` em cada bloco do edital, em paralelo.
+        
+        Usado no modo não concorrente, em que as extrações rodam uma após a
+        outra; a concorrência é limitada por ``EDITAL_PARSER_CHUNK_WORKERS``.
+        """
+        chunks = dividir_em_chunks(conteudo, self.chunk_size)
+        if not chunks:
+            return []
+        
+        workers = min(self.chunk_workers, len(chunks))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f'edital-{tipo}') as executor:
+            return list(executor.map(
+                lambda chunk: self._extrair_chunk(tipo, chunk, fallback, prazo_final), chunks
+            ))
+    
+    @staticmethod
+    def como_lista(resposta) -> List[Dict[str, Any]]:
+        """Normaliza a resposta do LLM, que pode vir como lista ou objeto envelopado."""
+        if isinstance(resposta, list):
+            return resposta
+        if isinstance(resposta, dict):
+            for valor in resposta.values():
+                if isinstance(valor, list):
+                    return valor
+            return [resposta]
+        return []
+    
+    @staticmethod
+    def mesclar_itens(partes: List[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """Une os itens de todos os blocos, deduplicando por ``codigo``."""
+        itens = []
+        por_codigo = {}
+        
+        for parte in partes:
+            for item in parte:
+                codigo = str(item.get('codigo') or '').strip()
+                if not codigo:
+                    itens.append(item)
+                    continue
+                
+                existente = por_codigo.get(codigo)
+                if existente is None:
+                    por_codigo[codigo] = item
+                    itens.append(item)
+                else:
+                    # Completa campos vazios com o que outro bloco encontrou
+                    for campo, valor in item.items():
+                        if valor not in (None, '') and existente.get(campo) in (None, ''):
+                            existente[campo] = valor
+        
+        return itens
+    
+    @staticmethod
+    def mesclar_documentos(partes: List[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """Une os documentos de todos os blocos, deduplicando pelo nome."""
+        documentos = []
+        vistos = set()
+        
+        for parte in partes:
+            for documento in parte:
+                nome = ' '.join(str(documento.get('nome') or '').lower().split())
+                if nome in vistos:
+                    continue
+                vistos.add(nome)
+                documentos.append(documento)
+        
+        return documentos
+    
+    def montar_requisicao(self, tipo: str, trecho: str) -> Tuple[Dict[str, Any], str]:
+        """
+        Monta o corpo da chamada de chat para uma extração e sua chave de cache.
+        
+        Usado tanto nas chamadas síncronas quanto nas linhas do JSONL do modo em lote.
+        """
+        instrucao, max_tokens = self.EXTRACOES[tipo]
+        mensagem = f"{instrucao}:\n\n{trecho}"
+        corpo = {
+            'model': self.model,
+            'messages': [
+                {"role": "system", "content": self.prompts[tipo]},
+                {"role": "user", "content": mensagem}
+            ],
+            'temperature': 0.1,
+            'max_tokens': max_tokens,
+        }
+        return corpo, chave_llm(tipo, self.prompts[tipo], self.model, mensagem)
+    
+    def _chamar_llm(self, tipo: str, trecho: str, prazo_final: Optional[float] = None):
+        """
+        Executa uma chamada ao LLM e devolve o JSON da resposta, usando o cache.
+        
+        ``prazo_final`` (time.monotonic) é o fim do prazo do edital em curso;
+        vem por argumento porque o mesmo parser pode processar editais em paralelo.
+        """
+        corpo, chave = self.montar_requisicao(tipo, trecho)
+        
+        em_cache = self.llm_cache.get(tipo, chave)
+        if em_cache is not None:
+            return em_cache
+        
+        timeout, max_retries = self._limites_chamada(prazo_final)
+        response = self.openai_client.with_options(max_retries=max_retries).chat.completions.create(
+            **corpo,
+            timeout=timeout
+        )
+        
+        resposta = json.loads(response.choices[0].message.content)
+        self.llm_cache.set(tipo, chave, resposta)
+        return resposta
+    
+    def _limites_chamada(self, prazo_final: Optional[float] = None) -> Tuple[float, int]:
+        """
+        Timeout e número de retries de uma chamada, dentro do prazo restante.
+        
+        Cada tentativa dura no máximo ``min(EDITAL_PARSER_LLM_TIMEOUT, restante)``
+        e só há retries enquanto todas as tentativas couberem no prazo; assim
+        uma chamada abandonada pelo fallback termina até o fim do prazo global.
+        """
+        if prazo_final is None:
+            return self.llm_timeout, self.llm_max_retries
+        
+        restante = prazo_final - time.monotonic()
+        if restante <= 0:
+            raise TimeoutError("Prazo do parsing do edital esgotado")
+        
+        timeout = min(self.llm_timeout, restante)
+        max_retries = max(0, min(self.llm_max_retries, int(restante // timeout) - 1))
+        return timeout, max_retries
+    
+    def obter_texto(self, arquivo_path: str) -> Tuple[Optional[str], Dict[str, str]]:
+        """
+        Retorna o texto normalizado do edital e a referência ao artefato gravado.
+        
+        Com o store habilitado, o texto é buscado pelo SHA-256 do arquivo e só
+        é decodificado do PDF/DOCX na primeira vez.
+        """
+        if not self.texto_store:
+            texto = self._ler_arquivo(arquivo_path)
+            return (normalizar_texto(texto) if texto else None), {}
+        
+        sha256 = calcular_sha256(arquivo_path)
+        artefato = {'arquivo_sha256': sha256}
+        
+        texto = self.texto_store.obter(sha256)
+        if texto is not None:
+            logger.info(f"Texto extraído reaproveitado para {arquivo_path} ({sha256[:12]})")
+            artefato['texto_extraido'] = caminho_texto(sha256)
+            return texto, artefato
+        
+        texto = self._ler_arquivo(arquivo_path)
+        if not texto:
+            return None, artefato
+        texto = normalizar_texto(texto)
+        
+        try:
+            artefato['texto_extraido'] = self.texto_store.salvar(sha256, texto)
+        except Exception as e:
+            logger.warning(f"Não foi possível gravar o texto extraído de {arquivo_path}: {e}")
+        
+        return texto, artefato
+    
     def _ler_arquivo(self, arquivo_path: str) -> Optional[str]:
         """Lê o conteúdo do arquivo."""
         try:
@@ -150,16 +440,18 @@ class EditalAIParser:
             return None
     
     def _ler_pdf(self, arquivo_path: str) -> Optional[str]:
-        """Lê arquivo PDF."""
+        """
+        Lê arquivo PDF, extraindo as páginas em paralelo (ver pdf_reader).
+        
+        O gerador de páginas é consumido inteiro aqui: o texto completo vai
+        para o store de texto e para o cache por hash antes da extração por
+        IA, então a leitura do PDF não se sobrepõe às chamadas ao LLM.
+        """
         try:
-            import pdfplumber
+            from .pdf_reader import iterar_paginas_pdf
             
-            texto = ""
-            with pdfplumber.open(arquivo_path) as pdf:
-                for pagina in pdf.pages:
-                    texto += pagina.extract_text() or ""
-            
-            return texto
+            # Páginas separadas por form feed para o chunking respeitar os limites
+            return SEPARADOR_PAGINA.join(iterar_paginas_pdf(arquivo_path))
             
         except ImportError:
             logger.error("pdfplumber não está instalado")
@@ -174,11 +466,7 @@ class EditalAIParser:
             from docx import Document
             
             doc = Document(arquivo_path)
-            texto = ""
-            for paragrafo in doc.paragraphs:
-                texto += paragrafo.text + "\n"
-            
-            return texto
+            return "".join(f"{paragrafo.text}\n" for paragrafo in doc.paragraphs)
             
         except ImportError:
             logger.error("python-docx não está instalado")
@@ -196,24 +484,14 @@ class EditalAIParser:
             logger.error(f"Erro ao ler TXT {arquivo_path}: {e}")
             return None
     
-    def _extrair_metadados(self, conteudo: str) -> Optional[Dict[str, Any]]:
+    def _extrair_metadados(self, conteudo: str,
+                           prazo_final: Optional[float] = None) -> Optional[Dict[str, Any]]:
         """Extrai metadados usando IA."""
         if not self.openai_client:
             return self._extrair_metadados_fallback(conteudo)
         
         try:
-            response = self.openai_client.chat.completions.create(
-                model="gpt-4",
-                messages=[
-                    {"role": "system", "content": self.prompts['metadados']},
-                    {"role": "user", "content": f"Extraia os metadados deste edital:\n\n{conteudo[:4000]}"}
-                ],
-                temperature=0.1,
-                max_tokens=1000
-            )
-            
-            resposta = response.choices[0].message.content
-            return json.loads(resposta)
+            return self._chamar_llm('metadados', conteudo[:self.TAMANHO_TRECHO_METADADOS], prazo_final)
             
         except Exception as e:
             logger.error(f"Erro na extração com IA: {e}")
@@ -221,53 +499,18 @@ class EditalAIParser:
     
     def _extrair_metadados_fallback(self, conteudo: str) -> Dict[str, Any]:
         """Extrai metadados usando regex como fallback."""
-        metadados = {}
-        
-        # Padrões comuns em editais
-        padroes = {
-            'numero': r'(?:edital|licitação|pregão)\s*(?:n[oº]\.?\s*)?([A-Z0-9\-/]+)',
-            'ano': r'(?:20\d{2})',
-            'orgao': r'(?:órgão|entidade|prefeitura|câmara|secretaria)\s*:?\s*([^,\n]+)',
-            'uf': r'\b([A-Z]{2})\b',
-            'municipio': r'(?:município|cidade)\s*:?\s*([^,\n]+)',
-            'modalidade': r'(?:pregão|concorrência|tomada|convite|concurso|leilão)',
-            'valor': r'(?:valor|preço|orçamento)\s*:?\s*R?\$?\s*([\d.,]+)',
-        }
-        
-        for campo, padrao in padroes.items():
-            match = re.search(padrao, conteudo, re.IGNORECASE)
-            if match:
-                metadados[campo] = match.group(1).strip()
-        
-        # Valores padrão
-        metadados.update({
-            'ano': int(metadados.get('ano', timezone.now().year)),
-            'data_publicacao': timezone.now().date().isoformat(),
-            'data_abertura': timezone.now().date().isoformat(),
-            'data_encerramento': None,
-            'observacoes': None
-        })
-        
-        return metadados
+        return regex_fallback.extrair_metadados(conteudo)
     
-    def _extrair_itens(self, conteudo: str) -> List[Dict[str, Any]]:
+    def _extrair_itens(self, conteudo: str, prazo_final: Optional[float] = None) -> List[Dict[str, Any]]:
         """Extrai itens da licitação."""
         if not self.openai_client:
             return self._extrair_itens_fallback(conteudo)
         
         try:
-            response = self.openai_client.chat.completions.create(
-                model="gpt-4",
-                messages=[
-                    {"role": "system", "content": self.prompts['itens']},
-                    {"role": "user", "content": f"Extraia os itens desta licitação:\n\n{conteudo[:4000]}"}
-                ],
-                temperature=0.1,
-                max_tokens=1500
+            partes = self._mapear_chunks(
+                'itens', conteudo, fallback=self._extrair_itens_fallback, prazo_final=prazo_final
             )
-            
-            resposta = response.choices[0].message.content
-            return json.loads(resposta)
+            return self.mesclar_itens(partes)
             
         except Exception as e:
             logger.error(f"Erro na extração de itens com IA: {e}")
@@ -275,45 +518,20 @@ class EditalAIParser:
     
     def _extrair_itens_fallback(self, conteudo: str) -> List[Dict[str, Any]]:
         """Extrai itens usando regex como fallback."""
-        itens = []
-        
-        # Padrão básico para itens
-        padrao_item = r'(?:item|lote)\s*(\d+)[:.]?\s*([^:]+?)(?:\s*quantidade\s*:?\s*([\d.,]+)\s*([^\s]+))?'
-        
-        matches = re.finditer(padrao_item, conteudo, re.IGNORECASE)
-        
-        for match in matches:
-            item = {
-                'codigo': match.group(1),
-                'descricao': match.group(2).strip(),
-                'quantidade': float(match.group(3).replace(',', '.')) if match.group(3) else 1.0,
-                'unidade': match.group(4) if match.group(4) else 'unidade',
-                'valor_unitario_estimado': None,
-                'categoria': None,
-                'subcategoria': None
-            }
-            itens.append(item)
-        
-        return itens
+        return regex_fallback.extrair_itens(conteudo)
     
-    def _extrair_documentos(self, conteudo: str) -> List[Dict[str, Any]]:
+    def _extrair_documentos(self, conteudo: str,
+                            prazo_final: Optional[float] = None) -> List[Dict[str, Any]]:
         """Extrai documentos exigidos."""
         if not self.openai_client:
             return self._extrair_documentos_fallback(conteudo)
         
         try:
-            response = self.openai_client.chat.completions.create(
-                model="gpt-4",
-                messages=[
-                    {"role": "system", "content": self.prompts['documentos']},
-                    {"role": "user", "content": f"Extraia os documentos exigidos:\n\n{conteudo[:4000]}"}
-                ],
-                temperature=0.1,
-                max_tokens=1000
+            partes = self._mapear_chunks(
+                'documentos', conteudo, fallback=self._extrair_documentos_fallback,
+                prazo_final=prazo_final
             )
-            
-            resposta = response.choices[0].message.content
-            return json.loads(resposta)
+            return self.mesclar_documentos(partes)
             
         except Exception as e:
             logger.error(f"Erro na extração de documentos com IA: {e}")
@@ -321,26 +539,7 @@ class EditalAIParser:
     
     def _extrair_documentos_fallback(self, conteudo: str) -> List[Dict[str, Any]]:
         """Extrai documentos usando regex como fallback."""
-        documentos = []
-        
-        # Padrões comuns para documentos
-        padroes_doc = [
-            r'(?:declaração|certificado|contrato|procuração)\s+(?:de\s+)?([^,\n]+)',
-            r'(?:documentos?\s+)?(?:exigidos?|necessários?)[:.]?\s*([^:]+)',
-        ]
-        
-        for padrao in padroes_doc:
-            matches = re.finditer(padrao, conteudo, re.IGNORECASE)
-            for match in matches:
-                doc = {
-                    'nome': match.group(1).strip(),
-                    'tipo': 'declaracao',
-                    'descricao': None,
-                    'obrigatorio': True
-                }
-                documentos.append(doc)
-        
-        return documentos
+        return regex_fallback.extrair_documentos(conteudo)
     
     def _calcular_confidence_score(self, metadados: Dict, itens: List, documentos: List) -> float:
         """Calcula score de confiança da extração."""
@@ -0,0 +1,205 @@
+"""
+Modo em lote (Batch API da OpenAI) para o parsing de editais.
+
+Usado em backfills: em vez de uma chamada síncrona por bloco de cada edital,
+todas as extrações pendentes vão em um único JSONL, processado de forma
+assíncrona pela OpenAI. O throughput deixa de depender do rate limit da API
+de chat.
+"""
+
+import io
+import json
+import logging
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from django.conf import settings
+
+from .ai_parser import EditalAIParser
+from .chunking import dividir_em_chunks
+
+logger = logging.getLogger(__name__)
+
+ENDPOINT_CHAT = '/v1/chat/completions'
+
+STATUS_EM_ANDAMENTO = ('validating', 'in_progress', 'finalizing', 'cancelling')
+
+
+class EditalBatchParser:
+    """Monta, submete e coleta lotes de extração de editais."""
+
+    def __init__(self, parser: Optional[EditalAIParser] = None):
+        self.parser = parser or EditalAIParser()
+        if not self.parser.openai_client:
+            raise ValueError("Modo em lote exige OPENAI_API_KEY configurada")
+        self.client = self.parser.openai_client
+        # Limites de um arquivo de entrada da Batch API
+        self.max_requisicoes = settings.EDITAL_BATCH_MAX_REQUESTS
+        self.max_bytes = settings.EDITAL_BATCH_MAX_BYTES
+
+    def planejar(self, chave_doc: str, conteudo: str) -> List[Tuple[str, str, str]]:
+        """
+        Lista as extrações de um edital como (custom_id, tipo, trecho).
+
+        O fatiamento é determinístico, então o mesmo plano pode ser refeito na
+        coleta a partir do texto já extraído.
+        """
+        trechos = [('metadados', conteudo[:self.parser.TAMANHO_TRECHO_METADADOS])]
+        for tipo in ('itens', 'documentos'):
+            trechos.extend((tipo, chunk) for chunk in dividir_em_chunks(conteudo, self.parser.chunk_size))
+
+        return [
+            (f"{chave_doc}:{tipo}:{indice}", tipo, trecho)
+            for indice, (tipo, trecho) in enumerate(trechos)
+        ]
+
+    def _linhas_pendentes(self, chave_doc: str, conteudo: str) -> List[bytes]:
+        """Linhas JSONL das extrações do documento que ainda não estão no cache."""
+        linhas = []
+        for custom_id, tipo, trecho in self.planejar(chave_doc, conteudo):
+            corpo, chave_cache = self.parser.montar_requisicao(tipo, trecho)
+            if self.parser.llm_cache.get(tipo, chave_cache) is not None:
+                continue
+
+            linha = {
+                'custom_id': custom_id,
+                'method': 'POST',
+                'url': ENDPOINT_CHAT,
+                'body': corpo,
+            }
+            linhas.append(json.dumps(linha, ensure_ascii=False).encode('utf-8') + b'\n')
+        return linhas
+
+    def submeter(self, documentos: Dict[str, str]) -> Iterator[Tuple[Optional[str], List[str]]]:
+        """
+        Envia as extrações dos documentos em um ou mais lotes.
+
+        Extrações que já estão no cache de respostas não entram nos arquivos.
+        Cada arquivo respeita os limites da Batch API (``EDITAL_BATCH_MAX_REQUESTS``
+        linhas, ``EDITAL_BATCH_MAX_BYTES``) sem dividir um documento entre lotes.
+
+        Gera ``(batch_id, chaves)`` logo após criar cada lote, para o chamador
+        marcar os editais antes do envio seguinte. Documentos que sozinhos
+        excedem os limites saem com ``batch_id`` ``None`` e devem seguir pelo
+        caminho síncrono; documentos inteiramente em cache não aparecem.
+        """
+        buffer = io.BytesIO()
+        chaves = []
+        total = 0
+        pendentes = 0
+
+        for chave_doc, conteudo in documentos.items():
+            linhas = self._linhas_pendentes(chave_doc, conteudo)
+            if not linhas:
+                continue
+            pendentes += 1
+
+            tamanho = sum(map(len, linhas))
+            if len(linhas) > self.max_requisicoes or tamanho > self.max_bytes:
+                logger.warning(
+                    f"Documento {chave_doc} excede sozinho os limites da Batch API "
+                    f"({len(linhas)} extrações, {tamanho} bytes)"
+                )
+                yield None, [chave_doc]
+                continue
+
+            if total + len(linhas) > self.max_requisicoes or buffer.tell() + tamanho > self.max_bytes:
+                yield self._enviar(buffer.getvalue(), total, chaves), chaves
+                buffer, chaves, total = io.BytesIO(), [], 0
+
+            buffer.writelines(linhas)
+            chaves.append(chave_doc)
+            total += len(linhas)
+
+        if chaves:
+            yield self._enviar(buffer.getvalue(), total, chaves), chaves
+
+        if not pendentes:
+            logger.info("Lote de editais inteiramente atendido pelo cache")
+
+    def _enviar(self, conteudo: bytes, total: int, chaves: List[str]) -> str:
+        """Cria o arquivo de entrada e o lote na OpenAI; retorna o id do lote."""
+        arquivo = self.client.files.create(
+            file=('editais.jsonl', conteudo),
+            purpose='batch'
+        )
+        lote = self.client.batches.create(
+            input_file_id=arquivo.id,
+            endpoint=ENDPOINT_CHAT,
+            completion_window='24h',
+            metadata={'origem': 'licitrix-editais'}
+        )
+
+        logger.info(f"Lote {lote.id} submetido com {total} extrações de {len(chaves)} editais")
+        return lote.id
+
+    def status(self, batch_id: str) -> str:
+        """Retorna o status do lote na OpenAI."""
+        return self.client.batches.retrieve(batch_id).status
+
+    def _baixar_saida(self, batch_id: str) -> Dict[str, Any]:
+        """Baixa o arquivo de saída do lote e indexa as respostas por custom_id."""
+        lote = self.client.batches.retrieve(batch_id)
+        if not lote.output_file_id:
+            return {}
+
+        respostas = {}
+        conteudo = self.client.files.content(lote.output_file_id).text
+        for linha in conteudo.splitlines():
+            if not linha.strip():
+                continue
+
+            registro = json.loads(linha)
+            resposta = registro.get('response') or {}
+            if registro.get('error') or resposta.get('status_code') != 200:
+                logger.warning(f"Extração {registro.get('custom_id')} falhou no lote {batch_id}")
+                continue
+
+            try:
+                mensagem = resposta['body']['choices'][0]['message']['content']
+                respostas[registro['custom_id']] = json.loads(mensagem)
+            except (KeyError, IndexError, ValueError) as e:
+                logger.warning(f"Resposta inválida para {registro.get('custom_id')}: {e}")
+
+        return respostas
+
+    def coletar(self, batch_id: Optional[str], documentos: Dict[str, str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Monta o resultado de cada documento a partir da saída do lote.
+
+        Cada extração vem, em ordem de preferência, da saída do lote, do cache de
+        respostas ou do fallback por regex sobre o mesmo trecho.
+        """
+        saida = self._baixar_saida(batch_id) if batch_id else {}
+        parser = self.parser
+        fallbacks = {
+            'metadados': parser._extrair_metadados_fallback,
+            'itens': parser._extrair_itens_fallback,
+            'documentos': parser._extrair_documentos_fallback,
+        }
+
+        resultados = {}
+        for chave_doc, conteudo in documentos.items():
+            extraido = {'metadados': None, 'itens': [], 'documentos': []}
+
+            for custom_id, tipo, trecho in self.planejar(chave_doc, conteudo):
+                _, chave_cache = parser.montar_requisicao(tipo, trecho)
+                resposta = saida.get(custom_id)
+                if resposta is not None:
+                    parser.llm_cache.set(tipo, chave_cache, resposta)
+                else:
+                    resposta = parser.llm_cache.get(tipo, chave_cache)
+                if resposta is None:
+                    resposta = fallbacks[tipo](trecho)
+
+                if tipo == 'metadados':
+                    extraido['metadados'] = resposta
+                else:
+                    extraido[tipo].append(parser.como_lista(resposta))
+
+            resultados[chave_doc] = parser.montar_resultado(
+                extraido['metadados'],
+                parser.mesclar_itens(extraido['itens']),
+                parser.mesclar_documentos(extraido['documentos'])
+            )
+
+        return resultados
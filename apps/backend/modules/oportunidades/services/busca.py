@@ -0,0 +1,166 @@
+"""
+Busca textual de editais com full-text search e trigramas do Postgres.
+
+O vetor ``Edital.busca`` combina objeto (peso A), órgão (B), município (C) e
+as descrições dos itens (D) na configuração ``EDITAL_BUSCA_CONFIG`` (a
+``portuguese`` com ``unaccent``, criada pela migração
+``0004_busca_portuguese_unaccent``). Ele é recalculado no próprio banco, em um
+único UPDATE, depois do commit que altera o edital ou os seus itens. A consulta usa o índice GIN do vetor; o filtro por órgão
+usa o índice GIN de trigramas, que tolera grafias aproximadas.
+"""
+
+from decimal import Decimal
+from typing import Any, Dict, Iterable, Optional
+
+from django.conf import settings
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector, TrigramSimilarity
+from django.db.models import Count, F, FloatField, OuterRef, Q, QuerySet, Subquery, Value
+
+from ..models import Edital, ItemEdital
+
+# Faixas de valor estimado da faceta (limite inferior inclusivo, superior exclusivo)
+FAIXAS_VALOR = (
+    ('ate_80mil', None, Decimal('80000')),
+    ('80mil_1mi', Decimal('80000'), Decimal('1000000')),
+    ('1mi_10mi', Decimal('1000000'), Decimal('10000000')),
+    ('acima_10mi', Decimal('10000000'), None),
+)
+
+
+def vetor_busca() -> SearchVector:
+    """Expressão do vetor de busca de um edital, avaliada no banco."""
+    config = settings.EDITAL_BUSCA_CONFIG
+    itens = (
+        ItemEdital.objects.filter(edital=OuterRef('pk'), ativo=True)
+        .order_by()
+        .values('edital')
+        .annotate(texto=StringAgg('descricao', delimiter=' '))
+        .values('texto')
+    )
+    return (
+        SearchVector('objeto', weight='A', config=config)
+        + SearchVector('orgao', weight='B', config=config)
+        + SearchVector('municipio', weight='C', config=config)
+        + SearchVector(Subquery(itens), weight='D', config=config)
+    )
+
+
+def atualizar_vetor_busca(edital_ids: Iterable[int]) -> int:
+    """
+    Recalcula o vetor de busca dos editais informados.
+
+    Usa ``update()``, então ``updated_at`` não muda e o reescore incremental
+    de oportunidades não é acionado por uma reindexação.
+    """
+    return Edital.objects.filter(id__in=list(edital_ids)).update(busca=vetor_busca())
+
+
+def indexar_pendentes(bloco: int = 1000) -> int:
+    """Preenche o vetor dos editais que ainda não o têm, em blocos por id."""
+    total = 0
+    ultimo_id = 0
+    while True:
+        ids = list(
+            Edital.objects.filter(busca__isnull=True, id__gt=ultimo_id)
+            .order_by('id')
+            .values_list('id', flat=True)[:bloco]
+        )
+        if not ids:
+            return total
+        total += atualizar_vetor_busca(ids)
+        ultimo_id = ids[-1]
+
+
+def _filtro_valor(minimo: Optional[Decimal], maximo: Optional[Decimal],
+                  maximo_inclusivo: bool = True) -> Q:
+    """
+    Filtro de valor estimado entre ``minimo`` e ``maximo`` (ambos inclusivos).
+
+    As faixas da faceta usam ``maximo_inclusivo=False`` para não contar um
+    edital em duas faixas vizinhas.
+    """
+    filtro = Q()
+    if minimo is not None:
+        filtro &= Q(valor_estimado__gte=minimo)
+    if maximo is not None:
+        filtro &= Q(valor_estimado__lte=maximo) if maximo_inclusivo else Q(valor_estimado__lt=maximo)
+    return filtro
+
+
+class BuscaEditais:
+    """
+    Consulta ranqueada de editais com facetas por UF, modalidade e valor.
+
+    As facetas são disjuntivas: a contagem de cada dimensão considera os
+    demais filtros, mas não o da própria dimensão, para que o usuário veja
+    as alternativas ao refinar a busca.
+    """
+
+    def __init__(self, termo: str = '', orgao: str = '', uf: str = '', modalidade: str = '',
+                 valor_min: Optional[Decimal] = None, valor_max: Optional[Decimal] = None):
+        self.termo = termo.strip()
+        self.orgao = orgao.strip()
+        self.uf = uf.upper()
+        self.filtros = {
+            'uf': Q(uf=self.uf) if self.uf else Q(),
+            'modalidade': Q(modalidade=modalidade) if modalidade else Q(),
+            'valor': _filtro_valor(valor_min, valor_max),
+        }
+
+    def _consulta(self) -> SearchQuery:
+        return SearchQuery(self.termo, config=settings.EDITAL_BUSCA_CONFIG, search_type='websearch')
+
+    def _filtrada(self, exceto: Optional[str] = None) -> QuerySet:
+        """Editais que casam com texto, órgão e filtros (menos a faceta ``exceto``)."""
+        queryset = Edital.objects.all()
+        if self.termo:
+            queryset = queryset.filter(busca=self._consulta())
+        if self.orgao:
+            # ``%`` usa o índice de trigramas; o limiar é pg_trgm.similarity_threshold
+            queryset = queryset.filter(orgao__trigram_similar=self.orgao)
+        for nome, filtro in self.filtros.items():
+            if nome != exceto:
+                queryset = queryset.filter(filtro)
+        return queryset
+
+    def resultados(self) -> QuerySet:
+        """Editais filtrados, do mais relevante ao menos relevante."""
+        queryset = self._filtrada()
+        ordem = []
+        if self.termo:
+            queryset = queryset.annotate(relevancia=SearchRank(F('busca'), self._consulta()))
+            ordem.append('-relevancia')
+        else:
+            queryset = queryset.annotate(relevancia=Value(0.0, output_field=FloatField()))
+        if self.orgao:
+            queryset = queryset.annotate(similaridade_orgao=TrigramSimilarity('orgao', self.orgao))
+            ordem.append('-similaridade_orgao')
+        return queryset.order_by(*ordem, '-data_publicacao', '-id')
+
+    def facetas(self) -> Dict[str, Any]:
+        """Contagens por UF, modalidade e faixa de valor."""
+        por_uf = (
+            self._filtrada(exceto='uf').order_by()
+            .values_list('uf').annotate(total=Count('id'))
+        )
+        por_modalidade = (
+            self._filtrada(exceto='modalidade').order_by()
+            .values_list('modalidade').annotate(total=Count('id'))
+        )
+        por_valor = self._filtrada(exceto='valor').order_by().aggregate(**{
+            nome: Count('id', filter=_filtro_valor(minimo, maximo, maximo_inclusivo=False)
+                          & Q(valor_estimado__isnull=False))
+            for nome, minimo, maximo in FAIXAS_VALOR
+        })
+        return {
+            'uf': dict(por_uf),
+            'modalidade': dict(por_modalidade),
+            'valor': por_valor,
+        }
+
+    def total(self, facetas: Dict[str, Any]) -> int:
+        """Total de resultados, derivado da faceta de UF (evita um COUNT extra)."""
+        if self.uf:
+            return facetas['uf'].get(self.uf, 0)
+        return sum(facetas['uf'].values())
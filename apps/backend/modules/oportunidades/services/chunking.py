@@ -0,0 +1,86 @@
+"""
+Divisão do texto de editais em blocos para extração map-reduce.
+"""
+
+import re
+from typing import Iterable, Iterator, List
+
+# Separador de páginas usado pelos leitores de arquivo
+SEPARADOR_PAGINA = '\f'
+
+# Início de seção: "ANEXO I", "CAPÍTULO 2", "SEÇÃO III", "TERMO DE REFERÊNCIA", "12. DO OBJETO"
+PADRAO_SECAO = re.compile(
+    r'^(?=[ \t]*(?:(?i:ANEXO|CAP[IÍ]TULO|SE[CÇ][AÃ]O|T[IÍ]TULO|TERMO\s+DE\s+REFER[EÊ]NCIA)\b'
+    r'|\d{1,3}(?:\.\d{1,3})*\.?\s+[A-ZÁÉÍÓÚÂÊÔÃÕÇ]{2,}))',
+    re.MULTILINE
+)
+
+
+def dividir_em_secoes(texto: str) -> Iterator[str]:
+    """
+    Divide o texto nos limites de página e de seção, sem descartar conteúdo.
+
+    O separador de página é consumido na divisão; por isso a última seção de
+    cada página termina com uma quebra de linha, para que a última palavra de
+    uma página não se junte à primeira da seguinte quando os blocos são montados.
+    """
+    for pagina in texto.split(SEPARADOR_PAGINA):
+        for secao in PADRAO_SECAO.split(pagina):
+            if secao.strip():
+                yield secao if secao.endswith('\n') else f"{secao}\n"
+
+
+def agrupar_em_chunks(secoes: Iterable[str], tamanho_max: int) -> List[str]:
+    """
+    Agrupa seções consecutivas em blocos de até ``tamanho_max`` caracteres.
+
+    Seções maiores que o limite são quebradas em linhas e, em último caso,
+    cortadas no tamanho máximo.
+    """
+    chunks = []
+    atual = []
+    tamanho_atual = 0
+
+    for secao in secoes:
+        pedacos = [secao]
+        if len(secao) > tamanho_max:
+            pedacos = _quebrar_secao(secao, tamanho_max)
+
+        for pedaco in pedacos:
+            if tamanho_atual + len(pedaco) > tamanho_max and atual:
+                chunks.append(''.join(atual))
+                atual = []
+                tamanho_atual = 0
+            atual.append(pedaco)
+            tamanho_atual += len(pedaco)
+
+    if atual:
+        chunks.append(''.join(atual))
+    return chunks
+
+
+def dividir_em_chunks(texto: str, tamanho_max: int = 4000) -> List[str]:
+    """Divide o texto do edital em blocos respeitando páginas e seções."""
+    return agrupar_em_chunks(dividir_em_secoes(texto), tamanho_max)
+
+
+def _quebrar_secao(secao: str, tamanho_max: int) -> List[str]:
+    """Quebra uma seção longa em blocos nos limites de linha."""
+    pedacos = []
+    atual = []
+    tamanho_atual = 0
+
+    for linha in secao.splitlines(keepends=True):
+        if tamanho_atual + len(linha) > tamanho_max and atual:
+            pedacos.append(''.join(atual))
+            atual = []
+            tamanho_atual = 0
+        while len(linha) > tamanho_max:
+            pedacos.append(linha[:tamanho_max])
+            linha = linha[tamanho_max:]
+        atual.append(linha)
+        tamanho_atual += len(linha)
+
+    if atual:
+        pedacos.append(''.join(atual))
+    return pedacos
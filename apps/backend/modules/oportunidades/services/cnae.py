@@ -0,0 +1,158 @@
+"""
+Tabelas de referência da CNAE 2.0 usadas no matching.
+
+Os dados ficam em ``data/`` (versionados junto com o código) e são carregados
+uma vez por processo:
+
+- ``cnae.json``: descrições por prefixo do código (divisão e, quando
+  disponível, a subclasse completa), usadas no perfil de palavras-chave;
+- ``cnae_categorias.json``: matriz de afinidade CNAE × categoria de item, com
+  os apelidos de cada categoria para reconhecer o texto livre de
+  ``ItemEdital.categoria``/``subcategoria``.
+
+A afinidade de um código é a linha do prefixo mais específico presente na
+tabela (subclasse, senão divisão), então cada consulta é no máximo um punhado
+de lookups em dicionário mais uma indexação de array.
+"""
+
+import json
+import logging
+import re
+import unicodedata
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+DIRETORIO_DADOS = Path(__file__).resolve().parent.parent / 'data'
+
+_NAO_DIGITOS = re.compile(r'\D')
+
+# Textos distintos de categoria/subcategoria memorizados por tabela
+CATEGORIAS_EM_CACHE = 4096
+
+
+def normalizar_cnae(codigo) -> str:
+    """Remove pontuação do código (``47.51-2/01`` -> ``4751201``)."""
+    return _NAO_DIGITOS.sub('', str(codigo or ''))
+
+
+@lru_cache(maxsize=None)
+def _tabela() -> Dict[str, str]:
+    with open(DIRETORIO_DADOS / 'cnae.json', encoding='utf-8') as f:
+        return json.load(f)['descricoes']
+
+
+def descricoes_cnae(codigo) -> List[str]:
+    """Descrições de todos os níveis conhecidos do código, do mais geral ao mais específico."""
+    codigo = normalizar_cnae(codigo)
+    tabela = _tabela()
+    return [
+        tabela[codigo[:tamanho]]
+        for tamanho in range(2, len(codigo) + 1)
+        if codigo[:tamanho] in tabela
+    ]
+
+
+def _normalizar_texto(texto: str) -> str:
+    texto = unicodedata.normalize('NFKD', (texto or '').lower()).encode('ascii', 'ignore').decode()
+    return ' '.join(re.sub(r'[^a-z0-9]+', ' ', texto).split())
+
+
+class TabelaAfinidade:
+    """Matriz de afinidade prefixo de CNAE × categoria de item."""
+
+    def __init__(self, dados: dict):
+        self.versao = dados['versao']
+        self.categorias = list(dados['categorias'])
+        self.coluna = {categoria: i for i, categoria in enumerate(self.categorias)}
+
+        self.apelidos = {}
+        for categoria, apelidos in dados['categorias'].items():
+            for apelido in [categoria, *apelidos]:
+                self.apelidos[_normalizar_texto(apelido.replace('_', ' '))] = self.coluna[categoria]
+        # Para reconhecer apelidos dentro de textos maiores, do mais longo ao mais curto
+        self._apelidos_por_tamanho = sorted(self.apelidos, key=len, reverse=True)
+
+        self.prefixos = list(dados['afinidades'])
+        self.linha = {prefixo: i for i, prefixo in enumerate(self.prefixos)}
+        self.matriz = np.zeros((len(self.linha), len(self.categorias)), dtype=np.float32)
+        for prefixo, afinidades in dados['afinidades'].items():
+            for categoria, valor in afinidades.items():
+                self.matriz[self.linha[prefixo], self.coluna[categoria]] = valor
+
+        # Textos livres de categoria se repetem muito entre editais; cache limitado por instância
+        self.categoria = lru_cache(maxsize=CATEGORIAS_EM_CACHE)(self._categoria)
+
+    def prefixo_cnae(self, codigo) -> Optional[str]:
+        """Prefixo mais específico do código presente na tabela, ou ``None``."""
+        codigo = normalizar_cnae(codigo)
+        for tamanho in range(len(codigo), 1, -1):
+            if codigo[:tamanho] in self.linha:
+                return codigo[:tamanho]
+        return None
+
+    def linha_cnae(self, codigo) -> Optional[np.ndarray]:
+        """Afinidades do código (prefixo mais específico presente), ou ``None``."""
+        prefixo = self.prefixo_cnae(codigo)
+        return None if prefixo is None else self.matriz[self.linha[prefixo]]
+
+    def prefixos_afins(self, distribuicao: np.ndarray) -> List[str]:
+        """Prefixos com afinidade positiva com alguma categoria presente na distribuição."""
+        return [self.prefixos[linha] for linha in np.flatnonzero(self.matriz @ distribuicao > 0)]
+
+    def afinidade_cnaes(self, codigos: Iterable) -> Tuple[np.ndarray, bool]:
+        """Melhor afinidade por categoria entre os CNAEs e se algum CNAE é conhecido."""
+        afinidade = np.zeros(len(self.categorias), dtype=np.float32)
+        conhecido = False
+        for codigo in codigos:
+            linha = self.linha_cnae(codigo)
+            if linha is not None:
+                np.maximum(afinidade, linha, out=afinidade)
+                conhecido = True
+        return afinidade, conhecido
+
+    def _categoria(self, texto: str) -> Optional[int]:
+        """Coluna da categoria reconhecida no texto livre, ou ``None`` (use ``categoria``)."""
+        normalizado = _normalizar_texto(texto)
+        coluna = self.apelidos.get(normalizado)
+        if coluna is None and normalizado:
+            envolto = f' {normalizado} '
+            for apelido in self._apelidos_por_tamanho:
+                if f' {apelido} ' in envolto:
+                    coluna = self.apelidos[apelido]
+                    break
+        return coluna
+
+    def distribuicao(self, itens: Iterable) -> Optional[np.ndarray]:
+        """
+        Fração dos itens do edital em cada categoria (``None`` se nenhum foi reconhecido).
+
+        A subcategoria, mais específica, tem precedência sobre a categoria.
+        """
+        contagem = np.zeros(len(self.categorias), dtype=np.float32)
+        for item in itens or []:
+            if not isinstance(item, dict):
+                continue
+            coluna = self.categoria(item.get('subcategoria') or '')
+            if coluna is None:
+                coluna = self.categoria(item.get('categoria') or '')
+            if coluna is not None:
+                contagem[coluna] += 1
+
+        total = contagem.sum()
+        return contagem / total if total else None
+
+
+@lru_cache(maxsize=None)
+def carregar_tabela_afinidade(caminho: Optional[str] = None) -> TabelaAfinidade:
+    """Carrega (uma vez por processo) a tabela de afinidade configurada."""
+    caminho = caminho or settings.CNAE_AFINIDADE_ARQUIVO or DIRETORIO_DADOS / 'cnae_categorias.json'
+    with open(caminho, encoding='utf-8') as f:
+        tabela = TabelaAfinidade(json.load(f))
+    logger.info(f"Tabela de afinidade CNAE × categoria v{tabela.versao} carregada de {caminho}")
+    return tabela
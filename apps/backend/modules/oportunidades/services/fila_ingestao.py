@@ -0,0 +1,139 @@
+"""
+Fila de ingestão de editais sobre ``Edital.status_ingestao``.
+
+Os editais são reivindicados com ``SELECT ... FOR UPDATE SKIP LOCKED`` e
+passam para ``processando`` na mesma transação, então execuções sobrepostas
+do beat nunca pegam o mesmo edital. ``processando_desde`` funciona como
+lease: editais parados além de ``EDITAL_CLAIM_LEASE`` (worker morto, task
+perdida) voltam para ``pendente``. Editais com ``lote_ia_id`` estão na Batch
+API e são acompanhados por ``acompanhar_lote_editais``; se o acompanhamento
+se perder, eles voltam para a fila após ``EDITAL_BATCH_LEASE``, contada a
+partir do envio do lote.
+"""
+
+import logging
+from datetime import timedelta
+from typing import List, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Avg, Count, F, Q
+from django.utils import timezone
+
+from ..models import Edital
+
+logger = logging.getLogger(__name__)
+
+# Amostra de editais recentes usada para estimar a duração média do processamento
+AMOSTRA_DURACAO = 200
+
+
+def reivindicar_editais(limite: int) -> List[int]:
+    """Marca até ``limite`` editais pendentes como ``processando`` e retorna seus ids."""
+    if limite <= 0:
+        return []
+
+    with transaction.atomic():
+        ids = list(
+            Edital.objects.select_for_update(skip_locked=True)
+            .filter(status_ingestao='pendente')
+            .order_by('created_at')
+            .values_list('id', flat=True)[:limite]
+        )
+        if ids:
+            Edital.objects.filter(id__in=ids).update(
+                status_ingestao='processando',
+                processando_desde=timezone.now()
+            )
+    return ids
+
+
+def recuperar_expirados(lease: Optional[int] = None) -> int:
+    """
+    Devolve para ``pendente`` os editais em ``processando`` há mais que a lease.
+
+    Editais presos em um lote da Batch API usam a lease própria
+    (``EDITAL_BATCH_LEASE``) e deixam o lote ao voltar para a fila.
+    """
+    agora = timezone.now()
+    limite = agora - timedelta(seconds=lease or settings.EDITAL_CLAIM_LEASE)
+    limite_lote = agora - timedelta(seconds=settings.EDITAL_BATCH_LEASE)
+
+    sincronos = Q(lote_ia_id='', processando_desde__lt=limite)
+    em_lote = ~Q(lote_ia_id='') & Q(processando_desde__lt=limite_lote)
+
+    with transaction.atomic():
+        ids = list(
+            Edital.objects.select_for_update(skip_locked=True)
+            .filter(status_ingestao='processando')
+            .filter(sincronos | em_lote | Q(processando_desde__isnull=True))
+            .values_list('id', flat=True)
+        )
+        if ids:
+            Edital.objects.filter(id__in=ids).update(
+                status_ingestao='pendente',
+                processando_desde=None,
+                lote_ia_id=''
+            )
+
+    if ids:
+        logger.warning(f"{len(ids)} editais com lease expirada voltaram para a fila")
+    return len(ids)
+
+
+def duracao_media() -> float:
+    """Duração média (s) do processamento dos editais concluídos mais recentemente."""
+    recentes = (
+        Edital.objects.filter(status_ingestao='concluido', processando_desde__isnull=False,
+                              processed_at__isnull=False)
+        .order_by('-processed_at')
+        .values_list('id', flat=True)[:AMOSTRA_DURACAO]
+    )
+    media = Edital.objects.filter(id__in=recentes).aggregate(
+        media=Avg(F('processed_at') - F('processando_desde'))
+    )['media']
+
+    if not media or media.total_seconds() <= 0:
+        return float(settings.EDITAL_CLAIM_DEFAULT_DURATION)
+    return media.total_seconds()
+
+
+def calcular_tamanho_lote(profundidade: int, em_voo: int, duracao: float,
+                          capacidade: Optional[int] = None) -> int:
+    """
+    Quantos editais despachar neste ciclo.
+
+    Cada slot de worker dá conta de ``intervalo / duracao`` editais até o
+    próximo ciclo do beat; desconta-se o que já está em voo e o resultado é
+    limitado pela profundidade da fila e por ``EDITAL_CLAIM_MAX_BATCH``.
+    """
+    capacidade = capacidade or settings.EDITAL_CLAIM_CAPACITY
+    vazao = int(capacidade * settings.EDITAL_CLAIM_INTERVAL / max(duracao, 1.0))
+    alvo = max(vazao, settings.EDITAL_CLAIM_MIN_BATCH) - em_voo
+    return max(0, min(profundidade, alvo, settings.EDITAL_CLAIM_MAX_BATCH))
+
+
+def estado_fila() -> dict:
+    """Profundidade da fila e editais em processamento síncrono, em uma query."""
+    return Edital.objects.filter(status_ingestao__in=['pendente', 'processando']).aggregate(
+        pendentes=Count('id', filter=Q(status_ingestao='pendente')),
+        em_voo=Count('id', filter=Q(status_ingestao='processando', lote_ia_id='')),
+    )
+
+
+def reivindicar_proximo_lote() -> List[int]:
+    """Recupera leases expiradas e reivindica um lote dimensionado pela fila."""
+    recuperar_expirados()
+
+    estado = estado_fila()
+    if not estado['pendentes']:
+        return []
+
+    tamanho = calcular_tamanho_lote(estado['pendentes'], estado['em_voo'], duracao_media())
+    ids = reivindicar_editais(tamanho)
+
+    logger.info(
+        f"Fila de editais: {estado['pendentes']} pendentes, {estado['em_voo']} em voo, "
+        f"{len(ids)} reivindicados"
+    )
+    return ids
@@ -0,0 +1,177 @@
+"""
+Índice invertido de tenants por UF, município e afinidade de CNAE, mantido no Redis.
+
+Cada termo (``uf:SP``, ``mun:Campinas``, ``afin:47``) é um SET com os ids dos
+tenants elegíveis que o possuem. Os termos ``afin:`` são os prefixos da tabela
+de afinidade CNAE × categoria em que os CNAEs do tenant caem (o mesmo prefixo
+que o matcher usa); tenants sem nenhum CNAE na tabela ficam em ``afin:?``. Um
+SET extra ``todos`` permite saber se o índice está populado, e o hash
+``termos`` guarda os termos de cada tenant para que uma atualização remova as
+associações antigas. As chaves levam a versão da tabela de afinidade, então
+uma tabela nova começa com o índice vazio (e agenda a reconstrução).
+
+O fan-out usa ``candidatos`` (um SUNION) para pontuar só tenants que podem
+atingir ``SCORE_MINIMO``, em vez de todos (ver ``termos_edital``). Enquanto o
+índice não estiver construído, ``candidatos`` retorna ``None`` e o fan-out
+volta a considerar todos os tenants.
+"""
+
+import json
+import logging
+from typing import Iterable, List, Optional, Set
+
+from django.conf import settings
+from django_redis import get_redis_connection
+
+from .cnae import TabelaAfinidade, carregar_tabela_afinidade
+from .oportunidade_matcher import SCORE_MAXIMO_SEM_AFINIDADE, SCORE_MINIMO
+
+logger = logging.getLogger(__name__)
+
+PREFIXO = 'tenants:idx'
+
+# Tenants sem CNAE na tabela de afinidade: score de CNAE neutro em qualquer edital
+TERMO_CNAE_NEUTRO = 'afin:?'
+
+
+def termos_tenant(uf: str, municipio: str, cnae_principal: str, cnae_secundarios,
+                  tabela: TabelaAfinidade) -> Set[str]:
+    """Termos indexados de um tenant."""
+    # UF e município entram sempre, mesmo vazios: o matcher compara por igualdade
+    termos = {f'uf:{uf}', f'mun:{municipio}'}
+    prefixos = {
+        tabela.prefixo_cnae(cnae)
+        for cnae in [cnae_principal, *(cnae_secundarios or [])] if cnae
+    }
+    prefixos.discard(None)
+    if prefixos:
+        termos.update(f'afin:{prefixo}' for prefixo in prefixos)
+    else:
+        termos.add(TERMO_CNAE_NEUTRO)
+    return termos
+
+
+def termos_edital(edital, tabela: TabelaAfinidade) -> Optional[Set[str]]:
+    """
+    Termos do edital que tornam um tenant candidato, ou ``None`` se não há poda segura.
+
+    Um tenant sem nenhum desses termos está fora da UF e do município e todos
+    os seus CNAEs conhecidos têm afinidade zero com as categorias dos itens;
+    o score de CNAE dele é 0. Se também não tiver termo em comum com o edital
+    no índice de palavras-chave (o fan-out une esses tenants aos candidatos),
+    o score fica limitado a ``SCORE_MAXIMO_SEM_AFINIDADE``, abaixo de
+    ``SCORE_MINIMO``. Edital sem itens categorizados dá CNAE neutro a todos,
+    e aí nenhum tenant pode ser descartado.
+    """
+    if SCORE_MAXIMO_SEM_AFINIDADE >= SCORE_MINIMO:
+        return None
+
+    distribuicao = tabela.distribuicao(edital.itens_extraidos)
+    if distribuicao is None:
+        return None
+
+    termos = {f'uf:{edital.uf}', f'mun:{edital.municipio}', TERMO_CNAE_NEUTRO}
+    termos.update(f'afin:{prefixo}' for prefixo in tabela.prefixos_afins(distribuicao))
+    return termos
+
+
+def elegivel(tenant) -> bool:
+    """Mesmo critério do fan-out: ativo e com cobrança em dia."""
+    return tenant.is_active and tenant.billing_status == 'active'
+
+
+class IndiceTenants:
+    """Leitura e manutenção do índice invertido."""
+
+    def __init__(self, alias: Optional[str] = None, tabela: Optional[TabelaAfinidade] = None):
+        self.redis = get_redis_connection(alias or settings.OPORTUNIDADE_INDICE_ALIAS)
+        self.tabela = tabela or carregar_tabela_afinidade()
+        self.prefixo = f'{PREFIXO}:v{self.tabela.versao}'
+        self.chave_todos = f'{self.prefixo}:todos'
+        self.chave_termos = f'{self.prefixo}:termos'
+
+    def _chave(self, termo: str) -> str:
+        return f'{self.prefixo}:{termo}'
+
+    def _termos(self, uf, municipio, cnae_principal, cnae_secundarios) -> Set[str]:
+        return termos_tenant(uf, municipio, cnae_principal, cnae_secundarios, self.tabela)
+
+    def atualizar(self, tenant) -> None:
+        """Reindexa um tenant (ou o remove, se deixou de ser elegível)."""
+        if not elegivel(tenant):
+            self.remover(tenant.id)
+            return
+
+        novos = self._termos(tenant.uf, tenant.municipio,
+                             tenant.cnae_principal, tenant.cnae_secundarios)
+        antigos = set(json.loads(self.redis.hget(self.chave_termos, tenant.id) or '[]'))
+
+        pipe = self.redis.pipeline()
+        for termo in antigos - novos:
+            pipe.srem(self._chave(termo), tenant.id)
+        for termo in novos - antigos:
+            pipe.sadd(self._chave(termo), tenant.id)
+        pipe.hset(self.chave_termos, tenant.id, json.dumps(sorted(novos)))
+        pipe.sadd(self.chave_todos, tenant.id)
+        pipe.execute()
+
+    def remover(self, tenant_id: int) -> None:
+        """Remove o tenant de todos os termos."""
+        antigos = json.loads(self.redis.hget(self.chave_termos, tenant_id) or '[]')
+
+        pipe = self.redis.pipeline()
+        for termo in antigos:
+            pipe.srem(self._chave(termo), tenant_id)
+        pipe.hdel(self.chave_termos, tenant_id)
+        pipe.srem(self.chave_todos, tenant_id)
+        pipe.execute()
+
+    def construido(self) -> bool:
+        return bool(self.redis.exists(self.chave_todos))
+
+    def candidatos(self, termos: Iterable[str]) -> Optional[List[int]]:
+        """
+        Ids dos tenants com ao menos um dos termos, em ordem crescente.
+
+        Retorna ``None`` se o índice ainda não foi construído.
+        """
+        if not self.construido():
+            return None
+
+        chaves = [self._chave(termo) for termo in termos]
+        if not chaves:
+            return []
+        return sorted(int(tenant_id) for tenant_id in self.redis.sunion(chaves))
+
+    def reconstruir(self, tenants=None) -> int:
+        """Reconstrói o índice a partir do banco. Retorna quantos tenants foram indexados."""
+        if tenants is None:
+            from core.tenancy.models import Tenant
+            tenants = Tenant.objects.filter(is_active=True, billing_status='active')
+
+        # Apaga o índice atual e os de versões anteriores da tabela em lotes (SCAN não bloqueia o Redis)
+        lote = []
+        for chave in self.redis.scan_iter(match=f'{PREFIXO}:*', count=1000):
+            lote.append(chave)
+            if len(lote) >= 1000:
+                self.redis.delete(*lote)
+                lote = []
+        if lote:
+            self.redis.delete(*lote)
+
+        total = 0
+        pipe = self.redis.pipeline(transaction=False)
+        linhas = tenants.values_list('id', 'uf', 'municipio', 'cnae_principal', 'cnae_secundarios')
+        for tenant_id, uf, municipio, cnae_principal, cnae_secundarios in linhas.iterator(chunk_size=2000):
+            termos = self._termos(uf, municipio, cnae_principal, cnae_secundarios)
+            for termo in termos:
+                pipe.sadd(self._chave(termo), tenant_id)
+            pipe.hset(self.chave_termos, tenant_id, json.dumps(sorted(termos)))
+            pipe.sadd(self.chave_todos, tenant_id)
+            total += 1
+            if total % 2000 == 0:
+                pipe.execute()
+        pipe.execute()
+
+        logger.info(f"Índice de tenants reconstruído com {total} tenants")
+        return total
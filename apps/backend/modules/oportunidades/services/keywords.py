@@ -0,0 +1,394 @@
+"""
+Motor de palavras-chave do matching: TF-IDF esparso entre tenants e editais.
+
+Cada tenant tem um perfil textual (palavras-chave cadastradas, descrições dos
+CNAEs e itens já vencidos em ``HistoricoPrecos``) que vira uma linha de uma
+matriz esparsa tenants × termos, com pesos TF-IDF normalizados (L2). Um
+edital (objeto + descrição dos itens) vira um vetor no mesmo espaço, e o
+cosseno contra todos os tenants sai de um único produto esparso.
+
+O índice é incremental: cada processo mantém o seu e, a cada
+``KEYWORDS_SYNC_INTERVAL`` segundos, revetoriza só os tenants alterados desde
+a última sincronização (``Tenant.updated_at`` e ``HistoricoPrecos.created_at``).
+Tenants excluídos não aparecem nessas consultas: a exclusão troca uma marca no
+cache compartilhado (``registrar_exclusao``) e cada processo, ao ver a marca
+mudar, tira do índice os ids que não existem mais.
+"""
+
+import logging
+import re
+import threading
+import time
+import unicodedata
+import uuid
+from collections import Counter
+from datetime import timedelta
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from scipy import sparse
+
+from .cnae import descricoes_cnae
+
+logger = logging.getLogger(__name__)
+
+STOPWORDS = frozenset("""
+    a ao aos as com como da das de do dos e em entre na nas no nos o os ou para
+    pela pelas pelo pelos por que se sem sob sobre um uma uns umas ate apos cada
+    demais este esta estes estas esse essa isso mesmo outro outra outros outras
+    sua suas seu seus ser sera serao sendo tipo tais qual quais quando onde
+    conforme demais exceto inclusive item itens lote lotes unidade unidades
+    quantidade total valor anexo edital objeto contratacao aquisicao
+    fornecimento prestacao empresa especializada referencia termo
+""".split())
+
+_TOKEN = re.compile(r'[a-z0-9]{3,}')
+
+# Plurais mais comuns do português (ordem importa: sufixos mais longos primeiro)
+_PLURAIS = (('oes', 'ao'), ('aes', 'ao'), ('ais', 'al'), ('eis', 'el'), ('ois', 'ol'),
+            ('res', 'r'), ('zes', 'z'), ('ses', 's'), ('ns', 'm'), ('s', ''))
+
+# Palavras-chave cadastradas pesam mais que o texto derivado de CNAE e histórico
+PESO_PALAVRAS_CHAVE = 3
+
+# Margem para alterações gravadas durante a sincronização anterior
+MARGEM_SINCRONIZACAO = timedelta(seconds=5)
+
+# Marca trocada a cada exclusão de tenant, comparada por cada processo
+CHAVE_EXCLUSOES = 'keywords:tenants:exclusoes'
+
+# Ids por consulta ao conferir quais tenants do índice ainda existem
+LOTE_CONFERENCIA = 5000
+
+
+def _singular(token: str) -> str:
+    if len(token) <= 4:
+        return token
+    for sufixo, troca in _PLURAIS:
+        if token.endswith(sufixo):
+            return token[:-len(sufixo)] + troca
+    return token
+
+
+def tokenizar(texto: str) -> List[str]:
+    """Minúsculas, sem acento, sem stopwords e no singular."""
+    texto = unicodedata.normalize('NFKD', (texto or '').lower()).encode('ascii', 'ignore').decode()
+    return [
+        _singular(token) for token in _TOKEN.findall(texto)
+        if token not in STOPWORDS and not token.isdigit()
+    ]
+
+
+def texto_edital(edital) -> str:
+    """Texto do edital usado no match: objeto e descrição dos itens extraídos."""
+    partes = [edital.objeto or '']
+    for item in edital.itens_extraidos or []:
+        if isinstance(item, dict):
+            partes.append(str(item.get('descricao') or ''))
+    return '\n'.join(partes)
+
+
+def texto_perfil(palavras_chave: Iterable[str], cnaes: Iterable[str],
+                 historico: Iterable[str]) -> str:
+    """Texto do perfil de um tenant."""
+    partes = [' '.join(str(p) for p in palavras_chave or [])] * PESO_PALAVRAS_CHAVE
+    for cnae in cnaes:
+        partes.extend(descricoes_cnae(cnae))
+    partes.extend(historico)
+    return '\n'.join(partes)
+
+
+class MotorKeywords:
+    """
+    Índice TF-IDF dos perfis de tenants.
+
+    Cada perfil é guardado como (colunas, frequências); a matriz CSR com os
+    pesos é remontada sob demanda, em O(nnz) com NumPy, só depois de alguma
+    alteração. O vocabulário e as frequências de documento crescem com os
+    perfis, então um tenant novo não exige reconstruir o índice.
+    """
+
+    def __init__(self):
+        self.vocab: Dict[str, int] = {}
+        self.termos: List[str] = []
+        self.df = np.zeros(0, dtype=np.int64)
+        self.perfis: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+
+        self.sincronizado_em = None
+        self.verificado_em = float('-inf')
+        self.marca_exclusoes = None
+
+        self._matriz = None
+        self._por_termo = None
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._posicao: Dict[int, int] = {}
+        self._idf = None
+
+    def __len__(self):
+        return len(self.perfis)
+
+    def _contar(self, texto: str, criar: bool) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Frequência dos termos do texto, como arrays (colunas, contagens).
+
+        Sem ``criar`` (consultas), termos que não estão em nenhum perfil são
+        ignorados, mesmo que tenham ficado no vocabulário após uma remoção:
+        o resultado é o mesmo de um índice montado do zero.
+        """
+        contagem = Counter(tokenizar(texto))
+        colunas, frequencias = [], []
+        for termo, frequencia in contagem.items():
+            coluna = self.vocab.get(termo)
+            if not criar and (coluna is None or not self.df[coluna]):
+                continue
+            if coluna is None:
+                coluna = self.vocab[termo] = len(self.termos)
+                self.termos.append(termo)
+            colunas.append(coluna)
+            frequencias.append(frequencia)
+
+        if len(self.df) < len(self.termos):
+            self.df = np.concatenate([self.df, np.zeros(len(self.termos) - len(self.df), dtype=np.int64)])
+        return np.array(colunas, dtype=np.int64), np.array(frequencias, dtype=np.float64)
+
+    def definir_perfil(self, tenant_id: int, texto: str) -> None:
+        """Cria ou substitui o perfil de um tenant."""
+        self.remover(tenant_id)
+        colunas, frequencias = self._contar(texto, criar=True)
+        if not len(colunas):
+            return
+
+        self.perfis[tenant_id] = (colunas, frequencias)
+        self.df[colunas] += 1
+        self._matriz = None
+
+    def remover(self, tenant_id: int) -> None:
+        perfil = self.perfis.pop(tenant_id, None)
+        if perfil is not None:
+            self.df[perfil[0]] -= 1
+            self._matriz = None
+
+    def _montar(self):
+        """Remonta a matriz tenants × termos com pesos TF-IDF normalizados."""
+        if self._matriz is not None:
+            return
+
+        total = len(self.perfis)
+        self._idf = np.log((1 + total) / (1 + self.df)) + 1
+        ids = sorted(self.perfis)
+        self._ids = np.array(ids, dtype=np.int64)
+        self._posicao = {tenant_id: linha for linha, tenant_id in enumerate(ids)}
+
+        colunas = [self.perfis[tenant_id][0] for tenant_id in ids]
+        frequencias = [self.perfis[tenant_id][1] for tenant_id in ids]
+        indptr = np.zeros(len(ids) + 1, dtype=np.int64)
+        np.cumsum([len(c) for c in colunas], out=indptr[1:])
+        indices = np.concatenate(colunas) if colunas else np.zeros(0, dtype=np.int64)
+        dados = np.concatenate(frequencias) if frequencias else np.zeros(0)
+
+        # TF sublinear × IDF, normalizado por linha
+        dados = (1 + np.log(dados)) * self._idf[indices]
+        normas = np.sqrt(np.add.reduceat(dados ** 2, indptr[:-1])) if len(dados) else np.zeros(0)
+        dados /= np.repeat(normas, np.diff(indptr))
+
+        self._matriz = sparse.csr_matrix(
+            (dados, indices, indptr), shape=(len(ids), len(self.termos))
+        )
+        self._por_termo = None
+
+    def _consultas(self, textos: Sequence[str]) -> sparse.csr_matrix:
+        """Vetores TF-IDF normalizados dos textos (só termos já no vocabulário)."""
+        linhas, colunas, dados = [], [], []
+        for linha, texto in enumerate(textos):
+            cols, freqs = self._contar(texto, criar=False)
+            if not len(cols):
+                continue
+            pesos = (1 + np.log(freqs)) * self._idf[cols]
+            linhas.append(np.full(len(cols), linha))
+            colunas.append(cols)
+            dados.append(pesos / np.linalg.norm(pesos))
+
+        if not dados:
+            return sparse.csr_matrix((len(textos), len(self.termos)))
+        return sparse.csr_matrix(
+            (np.concatenate(dados), (np.concatenate(linhas), np.concatenate(colunas))),
+            shape=(len(textos), len(self.termos))
+        )
+
+    def _linhas(self, tenant_ids: Sequence[int]) -> np.ndarray:
+        return np.fromiter((self._posicao.get(int(t), -1) for t in tenant_ids),
+                           dtype=np.int64, count=len(tenant_ids))
+
+    def possui(self, tenant_ids: Sequence[int]) -> np.ndarray:
+        """Máscara dos tenants que têm perfil no índice."""
+        self._montar()
+        return self._linhas(tenant_ids) >= 0
+
+    def pontuar(self, textos: Sequence[str], tenant_ids: Sequence[int]) -> np.ndarray:
+        """Cosseno textos × tenants (tenants sem perfil ficam com 0)."""
+        self._montar()
+        resultado = np.zeros((len(textos), len(tenant_ids)))
+        linhas = self._linhas(tenant_ids)
+        validos = linhas >= 0
+        if not validos.any() or not len(textos):
+            return resultado
+
+        consultas = self._consultas(textos)
+        resultado[:, validos] = (consultas @ self._matriz[linhas[validos]].T).toarray()
+        return resultado
+
+    def tenants_com_termos(self, texto: str) -> List[int]:
+        """Tenants com ao menos um termo em comum com o texto (cosseno maior que zero)."""
+        self._montar()
+        colunas, _ = self._contar(texto, criar=False)
+        if not len(colunas):
+            return []
+        if self._por_termo is None:
+            # Cópia por coluna, montada uma vez por versão da matriz
+            self._por_termo = self._matriz.tocsc()
+        linhas = np.unique(self._por_termo[:, colunas].indices)
+        return self._ids[linhas].tolist()
+
+    def termos_em_comum(self, texto: str, tenant_ids: Sequence[int],
+                        limite: Optional[int] = None) -> List[List[str]]:
+        """Termos que mais contribuem para o match de cada tenant, em ordem decrescente."""
+        limite = limite or settings.KEYWORDS_MAX_TERMOS
+        self._montar()
+        linhas = self._linhas(tenant_ids)
+        resultado = [[] for _ in tenant_ids]
+        validos = np.flatnonzero(linhas >= 0)
+        if not len(validos):
+            return resultado
+
+        consulta = self._consultas([texto]).toarray().ravel()
+        contribuicoes = self._matriz[linhas[validos]] @ sparse.diags(consulta)
+        contribuicoes = sparse.csr_matrix(contribuicoes)
+        contribuicoes.eliminate_zeros()
+
+        for posicao, indice in enumerate(validos):
+            inicio, fim = contribuicoes.indptr[posicao], contribuicoes.indptr[posicao + 1]
+            colunas = contribuicoes.indices[inicio:fim]
+            ordem = np.argsort(-contribuicoes.data[inicio:fim])[:limite]
+            resultado[indice] = [self.termos[c] for c in colunas[ordem]]
+        return resultado
+
+
+def carregar_perfis(tenant_ids: Optional[Iterable[int]] = None) -> Dict[int, str]:
+    """Texto do perfil dos tenants elegíveis (todos, ou só os ``tenant_ids``)."""
+    from core.tenancy.models import Tenant
+    from modules.precificacao.models import HistoricoPrecos
+
+    tenants = Tenant.objects.filter(is_active=True, billing_status='active')
+    historico = HistoricoPrecos.objects.filter(
+        tenant__is_active=True, tenant__billing_status='active'
+    )
+    if tenant_ids is not None:
+        tenant_ids = list(tenant_ids)
+        tenants = tenants.filter(id__in=tenant_ids)
+        historico = historico.filter(tenant_id__in=tenant_ids)
+
+    itens_vencidos: Dict[int, List[str]] = {}
+    for tenant_id, descricao, categoria, subcategoria in historico.values_list(
+            'tenant_id', 'descricao_item', 'categoria', 'subcategoria').iterator(chunk_size=5000):
+        itens_vencidos.setdefault(tenant_id, []).append(f"{descricao} {categoria} {subcategoria}")
+
+    perfis = {}
+    for tenant_id, palavras_chave, cnae_principal, cnae_secundarios in tenants.values_list(
+            'id', 'palavras_chave', 'cnae_principal', 'cnae_secundarios').iterator(chunk_size=2000):
+        perfis[tenant_id] = texto_perfil(
+            palavras_chave,
+            [cnae_principal, *(cnae_secundarios or [])],
+            itens_vencidos.get(tenant_id, [])
+        )
+    return perfis
+
+
+def atualizar_perfis(motor: MotorKeywords, tenant_ids: Optional[Iterable[int]] = None) -> int:
+    """Revetoriza os perfis dos tenants (todos, se ``None``). Retorna quantos foram tocados."""
+    if tenant_ids is not None:
+        tenant_ids = set(tenant_ids)
+
+    perfis = carregar_perfis(tenant_ids)
+    # Tenants alterados que deixaram de ser elegíveis saem do índice
+    for tenant_id in (tenant_ids or set()) - perfis.keys():
+        motor.remover(tenant_id)
+    for tenant_id, texto in perfis.items():
+        motor.definir_perfil(tenant_id, texto)
+    return len(tenant_ids) if tenant_ids is not None else len(perfis)
+
+
+def sincronizar(motor: MotorKeywords) -> int:
+    """
+    Atualiza o índice com os tenants alterados desde a última sincronização.
+
+    Na primeira chamada carrega todos os tenants. Retorna quantos perfis
+    foram revetorizados ou removidos.
+    """
+    from core.tenancy.models import Tenant
+    from modules.precificacao.models import HistoricoPrecos
+
+    inicio = timezone.now()
+    alterados = None
+
+    if motor.sincronizado_em is not None:
+        corte = motor.sincronizado_em - MARGEM_SINCRONIZACAO
+        alterados = set(Tenant.objects.filter(updated_at__gte=corte).values_list('id', flat=True))
+        alterados.update(
+            HistoricoPrecos.objects.filter(created_at__gte=corte).values_list('tenant_id', flat=True)
+        )
+
+    # Lida antes da conferência: uma exclusão durante a sincronização troca a marca de novo
+    marca = cache.get(CHAVE_EXCLUSOES)
+    total = atualizar_perfis(motor, alterados) if alterados is None or alterados else 0
+    if alterados is not None and marca != motor.marca_exclusoes:
+        total += remover_excluidos(motor)
+
+    motor.marca_exclusoes = marca
+    motor.sincronizado_em = inicio
+    motor.verificado_em = time.monotonic()
+    if total:
+        logger.info(f"Índice de palavras-chave: {total} perfis atualizados ({len(motor)} no total)")
+    return total
+
+
+def remover_excluidos(motor: MotorKeywords) -> int:
+    """Tira do índice os tenants que não existem mais no banco. Retorna quantos saíram."""
+    from core.tenancy.models import Tenant
+
+    ids = list(motor.perfis)
+    existentes = set()
+    for inicio in range(0, len(ids), LOTE_CONFERENCIA):
+        existentes.update(
+            Tenant.objects.filter(id__in=ids[inicio:inicio + LOTE_CONFERENCIA]).values_list('id', flat=True)
+        )
+
+    excluidos = set(ids) - existentes
+    for tenant_id in excluidos:
+        motor.remover(tenant_id)
+    return len(excluidos)
+
+
+_motor: Optional[MotorKeywords] = None
+_motor_lock = threading.Lock()
+
+
+def obter_motor() -> MotorKeywords:
+    """Índice do processo, sincronizado no máximo a cada ``KEYWORDS_SYNC_INTERVAL`` segundos."""
+    global _motor
+    with _motor_lock:
+        if _motor is None:
+            _motor = MotorKeywords()
+        if time.monotonic() - _motor.verificado_em >= settings.KEYWORDS_SYNC_INTERVAL:
+            sincronizar(_motor)
+        return _motor
+
+
+def registrar_exclusao(tenant_id: int) -> None:
+    """Tira o tenant excluído do índice deste processo e avisa os demais pelo cache."""
+    with _motor_lock:
+        if _motor is not None:
+            _motor.remover(tenant_id)
+    cache.set(CHAVE_EXCLUSOES, uuid.uuid4().hex, timeout=None)
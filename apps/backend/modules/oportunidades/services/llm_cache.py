@@ -0,0 +1,251 @@
+"""
+Cache endereçado por conteúdo para respostas de LLM do parser de editais.
+
+A chave é o SHA-256 de (nome do prompt, texto do prompt, modelo, trecho enviado),
+então reenvios do mesmo edital, refetch do crawler e retries da task reaproveitam
+a resposta sem gastar tokens.
+"""
+
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Optional
+
+from django.conf import settings
+from django.core.cache import caches
+from prometheus_client import Counter
+
+logger = logging.getLogger(__name__)
+
+LLM_CACHE_REQUESTS = Counter(
+    'licitrix_llm_cache_requests_total',
+    'Consultas ao cache de respostas do LLM',
+    ['backend', 'prompt', 'result'],
+)
+
+_SENTINELA = object()
+
+
+def chave_llm(prompt_nome: str, prompt_texto: str, modelo: str, trecho: str) -> str:
+    """Gera a chave de cache para uma chamada ao LLM."""
+    h = hashlib.sha256()
+    for parte in (prompt_nome, prompt_texto, modelo, trecho):
+        dados = parte.encode('utf-8')
+        # Prefixo de tamanho evita colisões por concatenação
+        h.update(len(dados).to_bytes(8, 'big'))
+        h.update(dados)
+    return h.hexdigest()
+
+
+class RedisLLMCache:
+    """
+    Camada Redis via cache do Django, em um alias próprio (``llm``).
+
+    O TTL é aplicado por chave e o tamanho é limitado aqui, não pela política
+    de evicção do Redis: um sorted set guarda o último acesso de cada chave e,
+    ao gravar, as menos usadas recentemente saem até restarem ``max_entradas``.
+    Assim o cache não cresce sem limite e não depende de ``allkeys-lru``, que
+    no Redis compartilhado também despejaria sessões de usuário.
+    """
+
+    nome = 'redis'
+    INDICE = 'llm:lru'
+
+    def __init__(self, alias: str, ttl: int, max_entradas: int):
+        from django_redis import get_redis_connection
+
+        self.cache = caches[alias]
+        self.redis = get_redis_connection(alias)
+        self.ttl = ttl
+        self.max_entradas = max_entradas
+
+    def get(self, chave: str) -> Any:
+        valor = self.cache.get(f"llm:{chave}", _SENTINELA)
+        if valor is not _SENTINELA:
+            self.redis.zadd(self.INDICE, {chave: time.time()})
+        return valor
+
+    def set(self, chave: str, valor: Any) -> None:
+        agora = time.time()
+        self.cache.set(f"llm:{chave}", valor, timeout=self.ttl)
+
+        pipe = self.redis.pipeline()
+        pipe.zadd(self.INDICE, {chave: agora})
+        # Chaves sem acesso há mais que o TTL já expiraram no Redis
+        pipe.zremrangebyscore(self.INDICE, 0, agora - self.ttl)
+        pipe.zcard(self.INDICE)
+        total = pipe.execute()[-1]
+
+        if total > self.max_entradas:
+            self._evictar(total - self.max_entradas)
+
+    def _evictar(self, quantidade: int) -> None:
+        """Remove as ``quantidade`` entradas menos usadas recentemente."""
+        removidas = [
+            membro.decode() if isinstance(membro, bytes) else membro
+            for membro, _ in self.redis.zpopmin(self.INDICE, quantidade)
+        ]
+        if removidas:
+            self.cache.delete_many([f"llm:{chave}" for chave in removidas])
+            logger.info(f"Cache LLM: {len(removidas)} entradas removidas por LRU")
+
+
+class DiskLLMCache:
+    """
+    Camada local em SQLite com TTL e evicção LRU limitada por tamanho.
+
+    Cada leitura atualiza o instante de acesso; ao gravar, as entradas menos
+    usadas recentemente são removidas até o total caber em ``max_bytes``.
+    """
+
+    nome = 'disk'
+
+    def __init__(self, diretorio: Path, ttl: int, max_bytes: int):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+        Path(diretorio).mkdir(parents=True, exist_ok=True)
+        self.db_path = Path(diretorio) / 'llm_cache.sqlite3'
+        with self._conectar() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS respostas (
+                    chave TEXT PRIMARY KEY,
+                    valor TEXT NOT NULL,
+                    tamanho INTEGER NOT NULL,
+                    acessado_em REAL NOT NULL,
+                    expira_em REAL NOT NULL
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS respostas_acesso ON respostas (acessado_em)"
+            )
+
+    @contextmanager
+    def _conectar(self):
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            yield conn
+        finally:
+            conn.close()
+
+    def get(self, chave: str) -> Any:
+        agora = time.time()
+        with self._lock, self._conectar() as conn:
+            row = conn.execute(
+                "SELECT valor, expira_em FROM respostas WHERE chave = ?", (chave,)
+            ).fetchone()
+            if row is None:
+                return _SENTINELA
+
+            valor, expira_em = row
+            if expira_em < agora:
+                conn.execute("DELETE FROM respostas WHERE chave = ?", (chave,))
+                return _SENTINELA
+
+            conn.execute(
+                "UPDATE respostas SET acessado_em = ? WHERE chave = ?", (agora, chave)
+            )
+            return json.loads(valor)
+
+    def set(self, chave: str, valor: Any) -> None:
+        agora = time.time()
+        serializado = json.dumps(valor, ensure_ascii=False)
+        tamanho = len(serializado.encode('utf-8'))
+
+        with self._lock, self._conectar() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO respostas VALUES (?, ?, ?, ?, ?)",
+                (chave, serializado, tamanho, agora, agora + self.ttl)
+            )
+            conn.execute("DELETE FROM respostas WHERE expira_em < ?", (agora,))
+            self._evictar(conn)
+
+    def _evictar(self, conn) -> None:
+        """Remove as entradas menos usadas até o cache caber no limite."""
+        total = conn.execute("SELECT COALESCE(SUM(tamanho), 0) FROM respostas").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        excedente = total - self.max_bytes
+        removidas = []
+        for chave, tamanho in conn.execute(
+            "SELECT chave, tamanho FROM respostas ORDER BY acessado_em"
+        ):
+            removidas.append((chave,))
+            excedente -= tamanho
+            if excedente <= 0:
+                break
+
+        conn.executemany("DELETE FROM respostas WHERE chave = ?", removidas)
+        logger.info(f"Cache LLM: {len(removidas)} entradas removidas por LRU")
+
+
+class LLMResponseCache:
+    """Fachada do cache de respostas do LLM com métricas de hit/miss."""
+
+    def __init__(self, tipo: Optional[str] = None, backend=None):
+        """
+        Args:
+            tipo: 'redis', 'disk' ou 'none' (padrão: settings.EDITAL_LLM_CACHE_BACKEND)
+            backend: Camada já construída; tem precedência sobre ``tipo``
+        """
+        if backend is None:
+            backend = self._criar_backend(tipo or settings.EDITAL_LLM_CACHE_BACKEND)
+        self.backend = backend
+
+    @staticmethod
+    def _criar_backend(tipo: str):
+        ttl = settings.EDITAL_LLM_CACHE_TTL
+
+        if tipo == 'redis':
+            return RedisLLMCache(
+                settings.EDITAL_LLM_CACHE_ALIAS,
+                ttl,
+                settings.EDITAL_LLM_CACHE_MAX_ENTRIES
+            )
+        if tipo == 'disk':
+            return DiskLLMCache(
+                settings.EDITAL_LLM_CACHE_DIR,
+                ttl,
+                settings.EDITAL_LLM_CACHE_MAX_BYTES
+            )
+        return None
+
+    @property
+    def habilitado(self) -> bool:
+        return self.backend is not None
+
+    def get(self, prompt_nome: str, chave: str) -> Optional[Any]:
+        """Retorna a resposta em cache ou ``None``."""
+        if not self.habilitado:
+            return None
+
+        try:
+            valor = self.backend.get(chave)
+        except Exception as e:
+            logger.warning(f"Falha ao ler cache LLM ({self.backend.nome}): {e}")
+            LLM_CACHE_REQUESTS.labels(self.backend.nome, prompt_nome, 'error').inc()
+            return None
+
+        resultado = 'miss' if valor is _SENTINELA else 'hit'
+        LLM_CACHE_REQUESTS.labels(self.backend.nome, prompt_nome, resultado).inc()
+        return None if valor is _SENTINELA else valor
+
+    def set(self, prompt_nome: str, chave: str, valor: Any) -> None:
+        """Grava a resposta; falhas de cache nunca interrompem o parsing."""
+        if not self.habilitado:
+            return
+
+        try:
+            self.backend.set(chave, valor)
+        except Exception as e:
+            logger.warning(f"Falha ao gravar cache LLM ({self.backend.nome}): {e}")
@@ -0,0 +1,37 @@
+"""
+Conversão de números escritos em texto pelos editais e pelo parser.
+
+Usada tanto no fallback por regex quanto na gravação das colunas decimais,
+para que "1.000" signifique o mesmo nos dois caminhos.
+"""
+
+import re
+from typing import Optional
+
+# Pontos seguidos de grupos de exatamente três dígitos: "1.000", "12.500", "1.000.000"
+MILHAR_BR = re.compile(r'[-+]?\d{1,3}(?:\.\d{3})+')
+
+
+def normalizar_numero(texto: str) -> str:
+    """
+    Normaliza um número escrito em texto para o formato do Decimal/float.
+
+    Com vírgula, o formato é o brasileiro ("1.000,50"): os pontos são
+    separadores de milhar. Sem vírgula, os pontos também são milhar quando
+    separam grupos de três dígitos ("1.000", "12.500"); nos demais casos o
+    ponto é o separador decimal ("1000.50", "2.5").
+    """
+    texto = texto.replace('R$', '').replace(' ', '').strip()
+    if ',' in texto:
+        return texto.replace('.', '').replace(',', '.')
+    if MILHAR_BR.fullmatch(texto):
+        return texto.replace('.', '')
+    return texto
+
+
+def numero_br(texto: str) -> Optional[float]:
+    """Converte o texto para float; ``None`` se não for um número."""
+    try:
+        return float(normalizar_numero(texto))
+    except ValueError:
+        return None
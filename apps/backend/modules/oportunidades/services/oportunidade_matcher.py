@@ -1,62 +1,330 @@
 """
 Serviço para calcular match entre editais e tenants.
+
+Além do cálculo unitário (``calcular_match_score``), há uma API em lote: as
+features dos tenants (UF, município, CNAEs, plano) são carregadas uma vez em
+arrays NumPy (``FeaturesTenants``) e um edital, ou uma lista de editais, é
+pontuado contra todos os tenants em uma única passada vetorizada.
+
+O componente de palavras-chave vem do índice TF-IDF de ``keywords``; o de
+CNAE, da tabela de afinidade CNAE × categoria de item de ``cnae``.
 """
 
 import logging
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Sequence
+
+import numpy as np
+from django.conf import settings
 from django.db.models import Q
 
+from .cnae import TabelaAfinidade, carregar_tabela_afinidade
+from .keywords import MotorKeywords, obter_motor, texto_edital
+
 logger = logging.getLogger(__name__)
 
+# Pesos dos componentes do score
+PESO_CNAE = 0.4
+PESO_LOCALIZACAO = 0.3
+PESO_KEYWORDS = 0.2
+PESO_VALOR = 0.1
+
+# Score mínimo para um match virar oportunidade (fan-out, shards e match reverso)
+SCORE_MINIMO = 0.3
+
+# Score de localização: mesma UF, mesmo município, fora da região
+LOCALIZACAO_UF = 1.0
+LOCALIZACAO_MUNICIPIO = 0.8
+LOCALIZACAO_FORA = 0.3
+
+# Score de valor: dentro do limite do plano e edital sem valor estimado
+VALOR_PADRAO = 0.8
+VALOR_NEUTRO = 0.5
+
+# Limites de valor por plano: acima do limite o match de valor cai para o score indicado
+LIMITES_VALOR_PLANO = {
+    'free': (100000, 0.3),
+    'basic': (500000, 0.5),
+}
+
+# Código usado para valores que não aparecem em nenhum tenant
+SEM_CODIGO = -1
+
+# Score de palavras-chave para tenants sem perfil textual
+KEYWORDS_SEM_PERFIL = 0.6
+
+# Score de CNAE quando o edital não tem itens categorizados ou o CNAE não está na tabela
+CNAE_NEUTRO = 0.5
+
+# Maior score possível de um tenant fora da UF e do município, sem afinidade de
+# CNAE com os itens do edital e sem termo em comum com ele. Enquanto for menor
+# que SCORE_MINIMO, o fan-out pode descartar esses tenants sem pontuá-los.
+SCORE_MAXIMO_SEM_AFINIDADE = (
+    PESO_LOCALIZACAO * LOCALIZACAO_FORA
+    + PESO_KEYWORDS * KEYWORDS_SEM_PERFIL
+    + PESO_VALOR * max(VALOR_PADRAO, VALOR_NEUTRO,
+                       *(score for _, score in LIMITES_VALOR_PLANO.values()))
+)
+
+
+class FeaturesTenants:
+    """
+    Features dos tenants em arrays NumPy, alinhadas por posição com ``ids``.
+
+    UF, município e plano são codificados como inteiros (vocabulário próprio
+    por campo); os CNAEs ficam numa matriz booleana tenants × CNAEs.
+    """
+    
+    def __init__(self, ids, ufs, municipios, planos, cnaes):
+        self.ids = np.asarray(ids, dtype=np.int64)
+        
+        self.vocab_uf = self._vocabulario(ufs)
+        self.vocab_municipio = self._vocabulario(municipios)
+        self.vocab_plano = self._vocabulario(planos)
+        self.vocab_cnae = self._vocabulario(cnae for conjunto in cnaes for cnae in conjunto)
+        
+        self.uf = self._codificar(ufs, self.vocab_uf)
+        self.municipio = self._codificar(municipios, self.vocab_municipio)
+        self.plano = self._codificar(planos, self.vocab_plano)
+        
+        self.cnaes = np.zeros((len(self.ids), len(self.vocab_cnae)), dtype=bool)
+        for linha, conjunto in enumerate(cnaes):
+            colunas = [self.vocab_cnae[cnae] for cnae in conjunto]
+            self.cnaes[linha, colunas] = True
+        
+        self._afinidade = None
+    
+    def __len__(self):
+        return len(self.ids)
+    
+    @staticmethod
+    def _vocabulario(valores) -> Dict[str, int]:
+        vocab = {}
+        for valor in valores:
+            vocab.setdefault(valor, len(vocab))
+        return vocab
+    
+    @staticmethod
+    def _codificar(valores, vocab) -> np.ndarray:
+        return np.fromiter((vocab[valor] for valor in valores), dtype=np.int32, count=len(valores))
+    
+    def afinidade_cnae(self, tabela: TabelaAfinidade):
+        """
+        Afinidade de cada tenant com cada categoria (tenants × categorias) e a
+        máscara dos tenants com algum CNAE presente na tabela.
+        
+        É o máximo entre os CNAEs do tenant; calculado uma vez por tabela.
+        """
+        if self._afinidade is not None and self._afinidade[0] is tabela:
+            return self._afinidade[1], self._afinidade[2]
+        
+        afinidade = np.zeros((len(self), len(tabela.categorias)), dtype=np.float32)
+        conhecido = np.zeros(len(self), dtype=bool)
+        for cnae, coluna in self.vocab_cnae.items():
+            linha = tabela.linha_cnae(cnae)
+            if linha is None:
+                continue
+            possui = self.cnaes[:, coluna]
+            afinidade[possui] = np.maximum(afinidade[possui], linha)
+            conhecido |= possui
+        
+        self._afinidade = (tabela, afinidade, conhecido)
+        return afinidade, conhecido
+    
+    def codigo(self, vocab: Dict[str, int], valores: Sequence[str]) -> np.ndarray:
+        """Codifica valores de editais no vocabulário dos tenants (``SEM_CODIGO`` se ausente)."""
+        return np.fromiter((vocab.get(valor, SEM_CODIGO) for valor in valores),
+                           dtype=np.int32, count=len(valores))
+    
+    @classmethod
+    def carregar(cls, tenants=None) -> 'FeaturesTenants':
+        """Carrega as features em uma única query (por padrão, tenants ativos e em dia)."""
+        if tenants is None:
+            from core.tenancy.models import Tenant
+            tenants = Tenant.objects.filter(is_active=True, billing_status='active')
+        
+        linhas = tenants.values_list(
+            'id', 'uf', 'municipio', 'plan', 'cnae_principal', 'cnae_secundarios'
+        )
+        return cls.de_linhas(linhas)
+    
+    @classmethod
+    def de_tenants(cls, tenants) -> 'FeaturesTenants':
+        """Monta as features a partir de instâncias de Tenant já carregadas."""
+        return cls.de_linhas(
+            (t.id, t.uf, t.municipio, t.plan, t.cnae_principal, t.cnae_secundarios)
+            for t in tenants
+        )
+    
+    @classmethod
+    def de_linhas(cls, linhas) -> 'FeaturesTenants':
+        """Monta as features de tuplas (id, uf, municipio, plano, cnae_principal, cnae_secundarios)."""
+        ids, ufs, municipios, planos, cnaes = [], [], [], [], []
+        for tenant_id, uf, municipio, plano, cnae_principal, cnae_secundarios in linhas:
+            ids.append(tenant_id)
+            ufs.append(uf)
+            municipios.append(municipio)
+            planos.append(plano)
+            conjunto = {cnae_principal} if cnae_principal else set()
+            conjunto.update(str(cnae) for cnae in (cnae_secundarios or []) if cnae)
+            cnaes.append(conjunto)
+        
+        return cls(ids, ufs, municipios, planos, cnaes)
+
+
 class OportunidadeMatcher:
     """Calcula score de match entre editais e tenants."""
     
+    def __init__(self, motor_keywords: MotorKeywords = None, tabela_cnae: TabelaAfinidade = None):
+        self._motor_keywords = motor_keywords
+        self._tabela_cnae = tabela_cnae
+    
+    @property
+    def tabela_cnae(self) -> TabelaAfinidade:
+        """Tabela de afinidade CNAE × categoria (por padrão, a carregada no processo)."""
+        return self._tabela_cnae or carregar_tabela_afinidade()
+    
+    @property
+    def motor_keywords(self) -> MotorKeywords:
+        """Índice de palavras-chave (por padrão, o índice sincronizado do processo)."""
+        return self._motor_keywords or obter_motor()
+    
     def calcular_match_score(self, edital, tenant) -> float:
         """Calcula score de relevância da oportunidade para o tenant."""
         score = 0.0
         
         # Match por CNAE (40% do score)
-        score += self._calcular_match_cnae(edital, tenant) * 0.4
+        score += self._calcular_match_cnae(edital, tenant) * PESO_CNAE
         
         # Match por localização (30% do score)
-        score += self._calcular_match_localizacao(edital, tenant) * 0.3
+        score += self._calcular_match_localizacao(edital, tenant) * PESO_LOCALIZACAO
         
         # Match por palavras-chave (20% do score)
-        score += self._calcular_match_keywords(edital, tenant) * 0.2
+        score += self._calcular_match_keywords(edital, tenant) * PESO_KEYWORDS
         
         # Match por valor (10% do score)
-        score += self._calcular_match_valor(edital, tenant) * 0.1
+        score += self._calcular_match_valor(edital, tenant) * PESO_VALOR
         
         return min(score, 1.0)
     
     def _calcular_match_cnae(self, edital, tenant) -> float:
-        """Calcula match por CNAE."""
-        # Implementação básica - pode ser expandida com IA
-        return 0.5  # Score médio por padrão
+        """
+        Calcula match por CNAE: afinidade média dos CNAEs do tenant com as
+        categorias dos itens do edital.
+        """
+        tabela = self.tabela_cnae
+        distribuicao = tabela.distribuicao(edital.itens_extraidos)
+        afinidade, conhecido = tabela.afinidade_cnaes(
+            [tenant.cnae_principal, *(tenant.cnae_secundarios or [])]
+        )
+        if distribuicao is None or not conhecido:
+            return CNAE_NEUTRO
+        return float(distribuicao @ afinidade)
     
     def _calcular_match_localizacao(self, edital, tenant) -> float:
         """Calcula match por localização."""
         if edital.uf == tenant.uf:
-            return 1.0
+            return LOCALIZACAO_UF
         elif edital.municipio == tenant.municipio:
-            return 0.8
+            return LOCALIZACAO_MUNICIPIO
         else:
-            return 0.3
+            return LOCALIZACAO_FORA
     
     def _calcular_match_keywords(self, edital, tenant) -> float:
         """Calcula match por palavras-chave."""
-        # Implementação básica
-        return 0.6
+        return float(self._scores_keywords([texto_edital(edital)], [tenant.id])[0, 0])
+    
+    def _scores_keywords(self, textos, tenant_ids) -> np.ndarray:
+        """Cosseno TF-IDF escalado para [0, 1]; tenants sem perfil ficam com score neutro."""
+        motor = self.motor_keywords
+        cosseno = motor.pontuar(textos, tenant_ids)
+        score = np.minimum(cosseno / settings.KEYWORDS_COSSENO_REFERENCIA, 1.0)
+        return np.where(motor.possui(tenant_ids)[None, :], score, KEYWORDS_SEM_PERFIL)
+    
+    def palavras_em_comum(self, edital, tenant_ids) -> List[List[str]]:
+        """Termos do edital que sustentam o match de cada tenant (para ``keywords_match``)."""
+        return self.motor_keywords.termos_em_comum(texto_edital(edital), tenant_ids)
     
     def _calcular_match_valor(self, edital, tenant) -> float:
         """Calcula match por valor da licitação."""
         if not edital.valor_estimado:
-            return 0.5
+            return VALOR_NEUTRO
         
         # Lógica baseada no plano do tenant
-        if tenant.plan == 'free' and edital.valor_estimado > 100000:
-            return 0.3
-        elif tenant.plan == 'basic' and edital.valor_estimado > 500000:
-            return 0.5
-        else:
-            return 0.8
+        limite = LIMITES_VALOR_PLANO.get(tenant.plan)
+        if limite and edital.valor_estimado > limite[0]:
+            return limite[1]
+        return VALOR_PADRAO
+    
+    # API em lote
+    
+    def carregar_tenants(self, tenants=None) -> FeaturesTenants:
+        """Carrega as features dos tenants para pontuação em lote."""
+        return FeaturesTenants.carregar(tenants)
+    
+    def calcular_scores_lote(self, edital, features: FeaturesTenants) -> np.ndarray:
+        """Scores de um edital contra todos os tenants, alinhados com ``features.ids``."""
+        return self.calcular_matriz_scores([edital], features)[0]
+    
+    def calcular_matriz_scores(self, editais: Sequence, features: FeaturesTenants) -> np.ndarray:
+        """
+        Matriz de scores editais × tenants (``len(editais)`` × ``len(features)``).
+        
+        Equivale a chamar ``calcular_match_score`` para cada par, mas cada
+        componente é calculado para a matriz inteira por broadcasting.
+        """
+        formato = (len(editais), len(features))
+        if not all(formato):
+            return np.zeros(formato)
+        
+        score = self._match_cnae_lote(editais, features) * PESO_CNAE
+        score += self._match_localizacao_lote(editais, features) * PESO_LOCALIZACAO
+        score += self._match_keywords_lote(editais, features) * PESO_KEYWORDS
+        score += self._match_valor_lote(editais, features) * PESO_VALOR
+        return np.minimum(score, 1.0)
+    
+    def _match_cnae_lote(self, editais, features: FeaturesTenants) -> np.ndarray:
+        """Versão em lote de ``_calcular_match_cnae``."""
+        tabela = self.tabela_cnae
+        afinidade, conhecido = features.afinidade_cnae(tabela)
+        
+        distribuicoes = [tabela.distribuicao(e.itens_extraidos) for e in editais]
+        categorizado = np.array([d is not None for d in distribuicoes])
+        vazia = np.zeros(len(tabela.categorias), dtype=np.float32)
+        matriz = np.stack([vazia if d is None else d for d in distribuicoes])
+        
+        score = (matriz @ afinidade.T).astype(np.float64)
+        score[~categorizado, :] = CNAE_NEUTRO
+        score[:, ~conhecido] = CNAE_NEUTRO
+        return score
+    
+    def _match_localizacao_lote(self, editais, features: FeaturesTenants) -> np.ndarray:
+        """Versão em lote de ``_calcular_match_localizacao``."""
+        uf = features.codigo(features.vocab_uf, [e.uf for e in editais])[:, None]
+        municipio = features.codigo(features.vocab_municipio, [e.municipio for e in editais])[:, None]
+        
+        return np.where(
+            uf == features.uf[None, :], LOCALIZACAO_UF,
+            np.where(municipio == features.municipio[None, :], LOCALIZACAO_MUNICIPIO, LOCALIZACAO_FORA)
+        )
+    
+    def _match_keywords_lote(self, editais, features: FeaturesTenants) -> np.ndarray:
+        """Versão em lote de ``_calcular_match_keywords``."""
+        return self._scores_keywords([texto_edital(e) for e in editais], features.ids)
+    
+    def _match_valor_lote(self, editais, features: FeaturesTenants) -> np.ndarray:
+        """Versão em lote de ``_calcular_match_valor``."""
+        valores = np.array(
+            [float(e.valor_estimado) if e.valor_estimado else np.nan for e in editais]
+        )[:, None]
+        
+        score = np.full((len(editais), len(features)), VALOR_PADRAO)
+        for plano, (limite, score_plano) in LIMITES_VALOR_PLANO.items():
+            codigo = features.vocab_plano.get(plano)
+            if codigo is None:
+                continue
+            acima = (features.plano == codigo)[None, :] & (valores > limite)
+            score[acima] = score_plano
+        
+        # Edital sem valor estimado: score neutro para todos os tenants
+        score[np.isnan(valores[:, 0])] = VALOR_NEUTRO
+        return score
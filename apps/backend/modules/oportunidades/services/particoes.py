@@ -0,0 +1,246 @@
+"""
+Particionamento mensal de ``oportunidades_edital`` por ``data_publicacao``.
+
+A tabela de editais vira uma tabela particionada por faixa (``PARTITION BY
+RANGE``), com uma partição por mês (``oportunidades_edital_pAAAAMM``) e uma
+partição ``DEFAULT`` para datas fora das faixas criadas. Consultas que
+filtram por ``data_publicacao`` só leem as partições do período, e a retenção
+remove partições inteiras em vez de apagar linha a linha.
+
+Restrições do Postgres que moldam o desenho:
+
+- chaves primárias e únicas de tabela particionada precisam incluir a chave
+  de partição, então a PK passa a ser ``(id, data_publicacao)`` e a unicidade
+  de ``(numero, ano, orgao)`` ganha ``data_publicacao`` (a constraint
+  ``UNICIDADE``, declarada no modelo). No banco, o mesmo edital com outra data
+  de publicação deixa de ser barrado; ``Edital.validate_unique`` continua
+  verificando ``(numero, ano, orgao)``. O ``id`` segue sendo a chave usada
+  pelo Django;
+- colunas identity em tabela particionada só existem a partir do Postgres
+  17, então o ``id`` passa a vir de uma sequência comum, dona da coluna, com
+  ``DEFAULT nextval(...)``;
+- por isso, nenhuma FK pode apontar para ``oportunidades_edital(id)``: as
+  tabelas dependentes (itens, documentos, oportunidades) ficam sem constraint
+  no banco (``db_constraint=False``) e continuam com o cascade do ORM. Elas não
+  têm ``data_publicacao`` e por isso não são particionadas; a retenção apaga
+  suas linhas em lotes (``services/retencao.py``) antes de remover a partição.
+
+As tabelas de editais existem em cada schema de tenant; os comandos de
+manutenção devem rodar por schema (``tenant_command``/``all_tenants_command``
+do django-tenants), e as tasks periódicas percorrem os schemas com
+``schema_context``.
+"""
+
+import logging
+import re
+from datetime import date
+from typing import List, Optional, Tuple
+
+from django.db import connection, transaction
+from django.db.models import QuerySet
+
+from ..models import Edital
+from .retencao import com_trabalho_dos_tenants, expurgar_editais
+
+logger = logging.getLogger(__name__)
+
+TABELA = Edital._meta.db_table
+COLUNA = 'data_publicacao'
+PARTICAO_DEFAULT = f'{TABELA}_default'
+SEQUENCIA = f'{TABELA}_id_seq'
+UNICIDADE = 'oportunidades_edital_numero_ano_orgao_uniq'
+
+_LIMITES = re.compile(r"FROM \('(\d{4}-\d{2}-\d{2})'\) TO \('(\d{4}-\d{2}-\d{2})'\)")
+
+
+def inicio_mes(data: date) -> date:
+    return data.replace(day=1)
+
+
+def somar_meses(mes: date, meses: int) -> date:
+    """Primeiro dia do mês ``meses`` à frente (ou atrás) de ``mes``."""
+    indice = mes.year * 12 + mes.month - 1 + meses
+    return date(indice // 12, indice % 12 + 1, 1)
+
+
+def nome_particao(mes: date) -> str:
+    return f'{TABELA}_p{mes:%Y%m}'
+
+
+def esta_particionada() -> bool:
+    """Indica se a tabela de editais do schema atual já é particionada."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s))",
+            [TABELA],
+        )
+        return cursor.fetchone()[0]
+
+
+def listar_particoes() -> List[Tuple[str, Optional[date], Optional[date]]]:
+    """Partições como (nome, início, fim); a partição ``DEFAULT`` vem sem limites."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT filha.relname, pg_get_expr(filha.relpartbound, filha.oid)
+            FROM pg_inherits
+            JOIN pg_class filha ON filha.oid = pg_inherits.inhrelid
+            WHERE pg_inherits.inhparent = to_regclass(%s)
+            ORDER BY filha.relname
+            """,
+            [TABELA],
+        )
+        linhas = cursor.fetchall()
+
+    particoes = []
+    for nome, limites in linhas:
+        match = _LIMITES.search(limites)
+        if match:
+            particoes.append((nome, date.fromisoformat(match.group(1)), date.fromisoformat(match.group(2))))
+        else:
+            particoes.append((nome, None, None))
+    return particoes
+
+
+def criar_particoes(meses_a_frente: int, desde: Optional[date] = None) -> List[str]:
+    """
+    Cria as partições mensais de ``desde`` (padrão: mês atual) até
+    ``meses_a_frente`` meses adiante. Partições existentes são ignoradas.
+
+    Se a partição ``DEFAULT`` já tiver linhas do mês, o Postgres recusa a
+    criação; nesse caso o mês é registrado no log e segue para o próximo.
+    """
+    mes = inicio_mes(desde or date.today())
+    existentes = {nome for nome, _, _ in listar_particoes()}
+    criadas = []
+
+    for _ in range(meses_a_frente + 1):
+        nome = nome_particao(mes)
+        if nome not in existentes:
+            try:
+                with transaction.atomic(), connection.cursor() as cursor:
+                    cursor.execute(
+                        f'CREATE TABLE "{nome}" PARTITION OF "{TABELA}" '
+                        f'FOR VALUES FROM (%s) TO (%s)',
+                        [mes, somar_meses(mes, 1)],
+                    )
+                criadas.append(nome)
+            except Exception as e:
+                logger.error(f"Erro ao criar partição {nome}: {e}")
+        mes = somar_meses(mes, 1)
+
+    if criadas:
+        logger.info(f"Partições de editais criadas: {', '.join(criadas)}")
+    return criadas
+
+
+def particoes_expiradas(data_limite: date) -> List[Tuple[str, date, date]]:
+    """Partições mensais inteiramente anteriores a ``data_limite``."""
+    return [
+        (nome, inicio, fim) for nome, inicio, fim in listar_particoes()
+        if fim is not None and fim <= data_limite
+    ]
+
+
+def editais_expirados_default(data_limite: date) -> QuerySet:
+    """
+    Editais anteriores a ``data_limite`` fora das partições mensais.
+
+    São as linhas da partição ``DEFAULT`` (datas sem partição própria), que
+    nunca sai inteira: expiram linha a linha, como na tabela não particionada.
+    """
+    editais = Edital.objects.filter(data_publicacao__lt=data_limite)
+    for _, inicio, fim in listar_particoes():
+        if inicio is not None:
+            editais = editais.exclude(data_publicacao__gte=inicio, data_publicacao__lt=fim)
+    return editais
+
+
+def remover_particao(nome: str, inicio: date, fim: date) -> None:
+    """
+    Arquiva e remove uma partição mensal e as linhas dependentes dos seus editais.
+
+    Não há ``DELETE`` na tabela de editais: desanexar e apagar a partição só
+    altera o catálogo, então o lock na tabela particionada é breve. Os editais
+    com trabalho dos tenants (propostas, contratos) não expiram: antes de a
+    partição ser apagada, voltam para a tabela e caem na partição ``DEFAULT``.
+    """
+    editais = Edital.objects.filter(data_publicacao__gte=inicio, data_publicacao__lt=fim)
+    # Dependentes saem em lotes (com arquivo frio); os editais saem com a partição
+    expurgar_editais(editais, manter_editais=True)
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        preservados = list(editais.filter(com_trabalho_dos_tenants()).values_list('id', flat=True))
+        cursor.execute(f'ALTER TABLE "{TABELA}" DETACH PARTITION "{nome}"')
+        if preservados:
+            # Sem partição para o mês, as linhas reinseridas vão para a DEFAULT
+            cursor.execute(f'INSERT INTO "{TABELA}" SELECT * FROM "{nome}" WHERE id = ANY(%s)', [preservados])
+        cursor.execute(f'DROP TABLE "{nome}"')
+    logger.info(f"Partição {nome} removida ({inicio} a {fim}, {len(preservados)} editais preservados)")
+
+
+def converter_tabela(meses_a_frente: int) -> None:
+    """
+    Converte a tabela de editais (não particionada) em tabela particionada.
+
+    Roda em uma única transação e copia todas as linhas, então deve ser
+    executada em janela de manutenção. Cria as partições do mês mais antigo
+    até ``meses_a_frente`` meses adiante, mais a partição ``DEFAULT``. Chaves,
+    índices e a sequência do ``id`` são criados depois da cópia, já com os
+    nomes liberados pela tabela antiga.
+
+    O estado das migrações não muda: a migração ``0002_unicidade_particionada``
+    já declara a unicidade com ``data_publicacao``.
+    """
+    legado = f'{TABELA}_legado'
+    hoje = date.today()
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'SELECT min({COLUNA}) FROM "{TABELA}"')
+        mais_antiga = cursor.fetchone()[0] or hoje
+
+        # FKs das tabelas dependentes não podem apontar para a tabela particionada
+        cursor.execute(
+            """
+            SELECT conrelid::regclass::text, conname FROM pg_constraint
+            WHERE contype = 'f' AND confrelid = to_regclass(%s)
+            """,
+            [TABELA],
+        )
+        for tabela, constraint in cursor.fetchall():
+            cursor.execute(f'ALTER TABLE {tabela} DROP CONSTRAINT "{constraint}"')
+
+        cursor.execute(f'ALTER TABLE "{TABELA}" RENAME TO "{legado}"')
+        # Sem INCLUDING IDENTITY (não suportado em tabela particionada antes do Postgres 17)
+        cursor.execute(
+            f'CREATE TABLE "{TABELA}" (LIKE "{legado}" INCLUDING DEFAULTS '
+            f'INCLUDING CONSTRAINTS) PARTITION BY RANGE ({COLUNA})'
+        )
+        # Se o id era serial, o default copiado ainda aponta para a sequência da tabela antiga
+        cursor.execute(f'ALTER TABLE "{TABELA}" ALTER COLUMN id DROP DEFAULT')
+        cursor.execute(f'CREATE TABLE "{PARTICAO_DEFAULT}" PARTITION OF "{TABELA}" DEFAULT')
+
+        meses = (hoje.year - mais_antiga.year) * 12 + hoje.month - mais_antiga.month
+        criar_particoes(meses + meses_a_frente, desde=mais_antiga)
+
+        cursor.execute(f'INSERT INTO "{TABELA}" SELECT * FROM "{legado}"')
+        cursor.execute(f'DROP TABLE "{legado}"')
+
+        cursor.execute(f'CREATE SEQUENCE "{SEQUENCIA}" OWNED BY "{TABELA}".id')
+        cursor.execute(f'ALTER TABLE "{TABELA}" ALTER COLUMN id SET DEFAULT nextval(\'"{SEQUENCIA}"\')')
+        cursor.execute(
+            f'SELECT setval(%s, coalesce(max(id), 1)) FROM "{TABELA}"',
+            [SEQUENCIA],
+        )
+
+        cursor.execute(f'ALTER TABLE "{TABELA}" ADD PRIMARY KEY (id, {COLUNA})')
+        cursor.execute(
+            f'ALTER TABLE "{TABELA}" ADD CONSTRAINT "{UNICIDADE}" '
+            f'UNIQUE (numero, ano, orgao, {COLUNA})'
+        )
+        # Índices do modelo (db_index e Meta.indexes) valem para todas as partições
+        with connection.schema_editor(atomic=False) as editor:
+            for sql in editor._model_indexes_sql(Edital):
+                editor.execute(sql)
+
+    logger.info(f"Tabela {TABELA} convertida em tabela particionada por {COLUNA}")
@@ -0,0 +1,96 @@
+"""
+Extração de texto de PDFs página a página, com paralelismo por processos.
+
+O pool só pode ser criado fora de processos daemônicos. Os filhos do pool
+prefork do Celery são daemônicos, então a fila ``edital_processing`` roda em
+um worker próprio com pool de threads (serviço ``celery-edital`` do
+docker-compose): o processo do worker não é daemônico e cada task de parsing
+abre seu pool de extração. Em qualquer outro contexto daemônico a leitura é
+serial, no próprio processo.
+"""
+
+import logging
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Optional
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _extrair_intervalo(arquivo_path: str, inicio: int, fim: int) -> List[str]:
+    """Extrai o texto das páginas [inicio, fim) em um processo do pool."""
+    import pdfplumber
+
+    textos = []
+    with pdfplumber.open(arquivo_path, pages=list(range(inicio + 1, fim + 1))) as pdf:
+        for pagina in pdf.pages:
+            textos.append(pagina.extract_text() or "")
+            # Libera objetos de layout da página assim que o texto sai
+            pagina.flush_cache()
+    return textos
+
+
+def contar_paginas(arquivo_path: str) -> int:
+    """Retorna o número de páginas do PDF."""
+    import pdfplumber
+
+    with pdfplumber.open(arquivo_path) as pdf:
+        return len(pdf.pages)
+
+
+def _pool_disponivel() -> bool:
+    """Processos daemônicos (filhos do pool prefork do Celery) não podem criar processos filhos."""
+    disponivel = not multiprocessing.current_process().daemon
+    if not disponivel:
+        logger.debug("Processo daemônico: extração de PDF serial")
+    return disponivel
+
+
+def iterar_paginas_pdf(arquivo_path: str,
+                       paginas_por_lote: Optional[int] = None,
+                       workers: Optional[int] = None) -> Iterator[str]:
+    """
+    Gera o texto de cada página do PDF, em ordem.
+
+    Lotes de páginas são distribuídos em um pool de processos, com no máximo
+    ``2 * workers`` lotes em voo. A janela limita o texto pendente entre os
+    processos; os objetos de layout do pdfplumber ficam nos processos do pool
+    e são liberados página a página. O gerador não faz streaming até o LLM: o
+    texto do edital é montado inteiro pelo chamador (store de texto, fallback
+    por regex e chunking usam o todo) antes de qualquer extração por IA.
+
+    Os processos saem de um ``forkserver``: o worker que chama esta função roda
+    com threads, e ``fork`` direto de um processo com várias threads não é seguro.
+    """
+    paginas_por_lote = paginas_por_lote or settings.EDITAL_PDF_PAGES_PER_TASK
+    workers = workers or settings.EDITAL_PDF_WORKERS
+
+    total = contar_paginas(arquivo_path)
+    lotes = [(inicio, min(inicio + paginas_por_lote, total))
+             for inicio in range(0, total, paginas_por_lote)]
+
+    if len(lotes) <= 1 or workers <= 1 or not _pool_disponivel():
+        for inicio, fim in lotes:
+            yield from _extrair_intervalo(arquivo_path, inicio, fim)
+        return
+
+    janela = 2 * workers
+    pendentes = iter(lotes)
+    em_voo = deque()
+
+    contexto = multiprocessing.get_context('forkserver')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=contexto) as executor:
+        for inicio, fim in pendentes:
+            em_voo.append(executor.submit(_extrair_intervalo, arquivo_path, inicio, fim))
+            if len(em_voo) >= janela:
+                break
+
+        while em_voo:
+            textos = em_voo.popleft().result()
+            proximo = next(pendentes, None)
+            if proximo is not None:
+                em_voo.append(executor.submit(_extrair_intervalo, arquivo_path, *proximo))
+            yield from textos
@@ -0,0 +1,255 @@
+"""
+Persistência em lote do módulo de oportunidades.
+
+Resultado do parser (ItemEdital e DocumentoExigido): os itens e documentos
+extraídos são gravados com ``bulk_create`` em modo upsert (``ON CONFLICT ...
+DO UPDATE``) sobre as chaves únicas (edital, codigo) e (edital, nome). Um
+edital com milhares de itens carrega em poucas queries, e os itens que
+continuam no edital mantêm o id (e as propostas que apontam para eles).
+
+Itens sem código são identificados por um hash da descrição e da unidade,
+não pela posição, para que um item inserido no meio do edital não renumere
+os seguintes. No reprocessamento, o que sumiu do edital é apagado; itens
+com propostas (``ItemProposta`` apaga em cascata) não são apagados, apenas
+marcados como inativos.
+
+Oportunidades do fan-out (OportunidadeTenant): todos os matches de um edital
+são gravados com upsert sobre (tenant, edital), em lotes de tamanho limitado.
+Só o score e as palavras-chave são atualizados em oportunidades existentes;
+status, responsável e análise do tenant não são tocados.
+"""
+
+import hashlib
+import logging
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import transaction
+
+from ..models import DocumentoExigido, ItemEdital, OportunidadeTenant
+from .numeros import normalizar_numero
+
+logger = logging.getLogger(__name__)
+
+CAMPOS_ITEM = [
+    'descricao', 'especificacao_tecnica', 'quantidade', 'unidade',
+    'valor_unitario_estimado', 'valor_total_estimado', 'categoria',
+    'subcategoria', 'ativo', 'updated_at',
+]
+CAMPOS_DOCUMENTO = ['tipo', 'descricao', 'obrigatorio']
+CAMPOS_OPORTUNIDADE = ['match_score', 'updated_at']
+
+TIPOS_DOCUMENTO = {tipo for tipo, _ in DocumentoExigido.TIPO_CHOICES}
+
+CENTAVOS = Decimal('0.01')
+
+
+def _texto(valor: Any, tamanho_max: Optional[int] = None) -> str:
+    texto = ' '.join(str(valor).split()) if valor not in (None, '') else ''
+    return texto[:tamanho_max] if tamanho_max else texto
+
+
+def _decimal(valor: Any, max_digits: int) -> Optional[Decimal]:
+    """Converte para Decimal com 2 casas; ``None`` se inválido ou fora da coluna."""
+    if valor in (None, ''):
+        return None
+    if isinstance(valor, str):
+        valor = normalizar_numero(valor)
+    try:
+        numero = Decimal(str(valor)).quantize(CENTAVOS)
+    except (InvalidOperation, ValueError):
+        return None
+    if not numero.is_finite() or abs(numero) >= Decimal(10) ** (max_digits - 2):
+        return None
+    return numero
+
+
+def decimal_score(score: float) -> Optional[Decimal]:
+    """Score de match no formato gravado em ``match_score`` (2 casas)."""
+    return _decimal(score, 5)
+
+
+def codigo_sem_numero(descricao: str, unidade: str) -> str:
+    """Código estável de um item sem código: hash da descrição e da unidade normalizadas."""
+    chave = f"{_texto(descricao).casefold()}|{_texto(unidade).casefold()}"
+    return f"#{hashlib.sha1(chave.encode('utf-8')).hexdigest()[:16]}"
+
+
+def montar_itens(edital, itens: List[Dict[str, Any]]) -> List[ItemEdital]:
+    """Converte os itens do parser em instâncias de ItemEdital (sem salvar)."""
+    objetos = {}
+    repeticoes = {}
+
+    for item in itens:
+        codigo = _texto(item.get('codigo'), 50)
+        if not codigo:
+            # Itens iguais sem código são numerados pela ordem em que se repetem
+            codigo = codigo_sem_numero(item.get('descricao'), item.get('unidade'))
+            repeticoes[codigo] = repeticoes.get(codigo, 0) + 1
+            if repeticoes[codigo] > 1:
+                codigo = f"{codigo}-{repeticoes[codigo]}"
+        if codigo in objetos:
+            continue
+
+        quantidade = _decimal(item.get('quantidade'), 10)
+        if quantidade is None or quantidade < CENTAVOS:
+            quantidade = Decimal('1.00')
+        valor_unitario = _decimal(item.get('valor_unitario_estimado'), 15)
+        valor_total = _decimal(valor_unitario * quantidade, 15) if valor_unitario else None
+
+        # bulk_create não chama save(), então o total é calculado aqui
+        objetos[codigo] = ItemEdital(
+            edital=edital,
+            codigo=codigo,
+            descricao=_texto(item.get('descricao')) or codigo,
+            especificacao_tecnica=_texto(item.get('especificacao_tecnica')),
+            quantidade=quantidade,
+            unidade=_texto(item.get('unidade'), 20) or 'unidade',
+            valor_unitario_estimado=valor_unitario,
+            valor_total_estimado=valor_total,
+            categoria=_texto(item.get('categoria'), 100),
+            subcategoria=_texto(item.get('subcategoria'), 100),
+        )
+
+    return list(objetos.values())
+
+
+def montar_documentos(edital, documentos: List[Dict[str, Any]]) -> List[DocumentoExigido]:
+    """Converte os documentos do parser em instâncias de DocumentoExigido (sem salvar)."""
+    objetos = {}
+
+    for documento in documentos:
+        nome = _texto(documento.get('nome'), 200)
+        if not nome or nome in objetos:
+            continue
+
+        tipo = documento.get('tipo')
+        objetos[nome] = DocumentoExigido(
+            edital=edital,
+            nome=nome,
+            tipo=tipo if tipo in TIPOS_DOCUMENTO else 'outro',
+            descricao=_texto(documento.get('descricao')),
+            obrigatorio=documento.get('obrigatorio') is not False,
+        )
+
+    return list(objetos.values())
+
+
+def persistir_itens_e_documentos(edital, itens: List[Dict[str, Any]],
+                                 documentos: List[Dict[str, Any]],
+                                 batch_size: Optional[int] = None) -> Dict[str, int]:
+    """
+    Grava itens e documentos do edital em uma transação, com upsert.
+
+    Retorna quantos itens/documentos foram gravados, quantos antigos foram
+    removidos e quantos itens com propostas foram mantidos como inativos.
+    """
+    batch_size = batch_size or settings.EDITAL_PERSIST_BATCH_SIZE
+    objetos_itens = montar_itens(edital, itens)
+    objetos_documentos = montar_documentos(edital, documentos)
+
+    with transaction.atomic():
+        ausentes = ItemEdital.objects.filter(edital=edital).exclude(
+            codigo__in=[item.codigo for item in objetos_itens]
+        )
+        inativados = ausentes.filter(propostas__isnull=False).update(ativo=False)
+        removidos_itens, _ = ausentes.filter(propostas__isnull=True).delete()
+        ItemEdital.objects.bulk_create(
+            objetos_itens,
+            batch_size=batch_size,
+            update_conflicts=True,
+            unique_fields=['edital', 'codigo'],
+            update_fields=CAMPOS_ITEM,
+        )
+
+        removidos_documentos, _ = DocumentoExigido.objects.filter(edital=edital).exclude(
+            nome__in=[documento.nome for documento in objetos_documentos]
+        ).delete()
+        DocumentoExigido.objects.bulk_create(
+            objetos_documentos,
+            batch_size=batch_size,
+            update_conflicts=True,
+            unique_fields=['edital', 'nome'],
+            update_fields=CAMPOS_DOCUMENTO,
+        )
+
+    logger.info(
+        f"Edital {edital.numero}: {len(objetos_itens)} itens e "
+        f"{len(objetos_documentos)} documentos persistidos"
+    )
+    return {
+        'itens': len(objetos_itens),
+        'documentos': len(objetos_documentos),
+        'removidos': removidos_itens + removidos_documentos,
+        'inativados': inativados,
+    }
+
+
+def gravar_oportunidades(registros: Iterable[Tuple[int, int, float, Optional[List[str]]]],
+                         com_keywords: bool = True,
+                         batch_size: Optional[int] = None) -> Dict[str, int]:
+    """
+    Cria ou atualiza oportunidades a partir de (tenant_id, edital_id, score, termos).
+
+    Cada lote custa um SELECT (para separar criadas de atualizadas) e um
+    ``INSERT ... ON CONFLICT DO UPDATE``. Sem ``com_keywords``, o
+    ``keywords_match`` de oportunidades existentes é preservado. Retorna
+    ``{'criadas', 'atualizadas'}``.
+    """
+    batch_size = batch_size or settings.OPORTUNIDADE_UPSERT_BATCH_SIZE
+    campos = CAMPOS_OPORTUNIDADE + (['keywords_match'] if com_keywords else [])
+    registros = list(registros)
+    criadas = atualizadas = 0
+
+    for inicio in range(0, len(registros), batch_size):
+        lote = registros[inicio:inicio + batch_size]
+        pares = {(tenant_id, edital_id) for tenant_id, edital_id, _, _ in lote}
+
+        with transaction.atomic():
+            # Os lotes são de um edital ou de um tenant, então o filtro por
+            # conjuntos não traz linhas além das do lote
+            existentes = pares & set(
+                OportunidadeTenant.objects.filter(
+                    tenant_id__in={tenant_id for tenant_id, _ in pares},
+                    edital_id__in={edital_id for _, edital_id in pares},
+                ).values_list('tenant_id', 'edital_id')
+            )
+            OportunidadeTenant.objects.bulk_create(
+                [
+                    OportunidadeTenant(
+                        tenant_id=tenant_id,
+                        edital_id=edital_id,
+                        match_score=decimal_score(score),
+                        keywords_match=termos or [],
+                        status='nova',
+                    )
+                    for tenant_id, edital_id, score, termos in lote
+                ],
+                update_conflicts=True,
+                unique_fields=['tenant', 'edital'],
+                update_fields=campos,
+            )
+
+        atualizadas += len(existentes)
+        criadas += len(lote) - len(existentes)
+
+    return {'criadas': criadas, 'atualizadas': atualizadas}
+
+
+def salvar_oportunidades(edital_id: int, tenant_ids: Iterable[int], scores: Iterable[float],
+                         keywords: Optional[Iterable[List[str]]] = None,
+                         batch_size: Optional[int] = None) -> Dict[str, int]:
+    """
+    Cria ou atualiza as oportunidades de um edital para os tenants informados.
+
+    ``keywords``, se informado, é alinhado com ``tenant_ids`` e vai para
+    ``keywords_match``.
+    """
+    tenant_ids = list(tenant_ids)
+    termos = keywords if keywords is not None else [None] * len(tenant_ids)
+    return gravar_oportunidades(
+        [(tenant_id, edital_id, score, t) for tenant_id, score, t in zip(tenant_ids, scores, termos)],
+        com_keywords=keywords is not None,
+        batch_size=batch_size,
+    )
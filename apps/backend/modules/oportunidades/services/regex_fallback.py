@@ -0,0 +1,140 @@
+"""
+Extração por regras (regex) usada quando o LLM não está disponível.
+
+Todos os padrões são compilados uma única vez no import. Os metadados são
+coletados com um padrão combinado: a cada campo encontrado, a busca recomeça
+no início desse match só com os campos que faltam. Campos que começam no
+mesmo ponto ou dentro do match (``Pregão nº 1`` é ``numero`` e
+``modalidade``) não se perdem, e o resultado é o mesmo de um ``re.search``
+por campo. Só os trechos já casados, no máximo um por campo, são lidos de
+novo; um ``finditer`` único com todos os campos em lookahead evitaria isso,
+mas tenta todos os padrões em cada posição e fica várias vezes mais lento
+quando um campo está ausente. A varredura para assim que todos os campos
+aparecem.
+
+Diferente do parser antigo, os metadados só são procurados no início do
+documento (``JANELA_METADADOS``), como no caminho com LLM: um campo que só
+aparece depois da janela não é extraído, em troca de um campo ausente não
+custar uma varredura de vários MB.
+"""
+
+import re
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, List
+
+from django.utils import timezone
+
+from .numeros import numero_br
+
+UFS = (
+    'AC', 'AL', 'AP', 'AM', 'BA', 'CE', 'DF', 'ES', 'GO', 'MA', 'MT', 'MS', 'MG', 'PA',
+    'PB', 'PR', 'PE', 'PI', 'RJ', 'RN', 'RS', 'RO', 'RR', 'SC', 'SP', 'SE', 'TO',
+)
+
+# Capa, preâmbulo e primeiras seções, onde os metadados aparecem
+JANELA_METADADOS = 64 * 1024
+
+# Cada campo é capturado pelo grupo nomeado de mesmo nome
+PADROES_METADADOS = {
+    'numero': r'(?:edital|licitação|pregão)(?:\s+(?:eletrônico|presencial))?\s*(?:n[oº°]\.?\s*)?'
+              r'(?P<numero>(?=[A-Z0-9\-/.]*\d)[A-Z0-9][A-Z0-9\-/.]*)',
+    'ano': r'(?P<ano>\b20\d{2}\b)',
+    'orgao': r'(?:órgão|entidade|prefeitura|câmara|secretaria)\s*:?\s*(?P<orgao>[^,\n]+)',
+    'uf': r'(?-i:\b(?P<uf>' + '|'.join(UFS) + r')\b)',
+    'municipio': r'(?:município|cidade)\s*:?\s*(?P<municipio>[^,\n]+)',
+    'modalidade': r'(?P<modalidade>pregão|concorrência|tomada|convite|concurso|leilão)',
+    'valor': r'(?:valor|preço|orçamento)(?:\s+(?:estimado|global|total|máximo))?'
+             r'\s*:?\s*R?\$?\s*(?P<valor>\d[\d.,]*)',
+}
+
+PADRAO_ITEM = re.compile(
+    r'(?:item|lote)\s*(?P<codigo>\d+)[:.]?[ \t]*(?P<descricao>[^\n]+?)'
+    r'(?:\s*quantidade\s*:?\s*(?P<quantidade>\d[\d.,]*)\s*(?P<unidade>\S+))?[ \t]*$',
+    re.IGNORECASE | re.MULTILINE
+)
+
+PADRAO_DOCUMENTO = re.compile(
+    r'(?P<tipo>declaração|certificado|contrato|procuração)\s+(?:de\s+)?(?P<nome>[^,\n]+)'
+    r'|(?:documentos?\s+)?(?:exigidos?|necessários?)[:.]?[ \t]*(?P<lista>[^:\n]+)',
+    re.IGNORECASE
+)
+
+TIPOS_DOCUMENTO = {
+    'declaração': 'declaracao',
+    'certificado': 'certificado',
+    'contrato': 'contrato',
+    'procuração': 'procuracao',
+}
+
+
+@lru_cache(maxsize=None)
+def _padrao_combinado(campos: FrozenSet[str]) -> re.Pattern:
+    """Compila (uma vez por conjunto de campos) a alternância dos padrões restantes."""
+    alternativas = [PADROES_METADADOS[campo] for campo in PADROES_METADADOS if campo in campos]
+    return re.compile('|'.join(alternativas), re.IGNORECASE)
+
+
+def extrair_metadados(conteudo: str) -> Dict[str, Any]:
+    """Extrai a primeira ocorrência de cada campo no início do documento."""
+    conteudo = conteudo[:JANELA_METADADOS]
+    metadados = {}
+    restantes = frozenset(PADROES_METADADOS)
+    posicao = 0
+
+    while restantes:
+        match = _padrao_combinado(restantes).search(conteudo, posicao)
+        if not match:
+            break
+
+        campo = match.lastgroup
+        metadados[campo] = match.group(campo).strip()
+        restantes = restantes - {campo}
+        # Outros campos podem começar no mesmo ponto ou dentro deste match
+        posicao = match.start()
+
+    hoje = timezone.now().date().isoformat()
+    metadados.update({
+        'ano': int(metadados.get('ano', timezone.now().year)),
+        'data_publicacao': hoje,
+        'data_abertura': hoje,
+        'data_encerramento': None,
+        'observacoes': None
+    })
+    return metadados
+
+
+def extrair_itens(conteudo: str) -> List[Dict[str, Any]]:
+    """Extrai itens/lotes numerados."""
+    itens = []
+    for match in PADRAO_ITEM.finditer(conteudo):
+        quantidade = match.group('quantidade')
+        itens.append({
+            'codigo': match.group('codigo'),
+            'descricao': match.group('descricao').strip(),
+            'quantidade': (numero_br(quantidade) or 1.0) if quantidade else 1.0,
+            'unidade': match.group('unidade') or 'unidade',
+            'valor_unitario_estimado': None,
+            'categoria': None,
+            'subcategoria': None
+        })
+    return itens
+
+
+def extrair_documentos(conteudo: str) -> List[Dict[str, Any]]:
+    """Extrai documentos exigidos com uma única varredura para todos os padrões."""
+    documentos = []
+    for match in PADRAO_DOCUMENTO.finditer(conteudo):
+        if match.group('nome') is not None:
+            nome = match.group('nome')
+            tipo = TIPOS_DOCUMENTO.get(match.group('tipo').lower(), 'outro')
+        else:
+            nome = match.group('lista')
+            tipo = 'declaracao'
+
+        documentos.append({
+            'nome': nome.strip(),
+            'tipo': tipo,
+            'descricao': None,
+            'obrigatorio': True
+        })
+    return documentos
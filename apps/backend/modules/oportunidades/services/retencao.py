@@ -0,0 +1,259 @@
+"""
+Retenção de editais: arquivo frio, exclusão em lotes e coleta de mídia órfã.
+
+Editais fora da retenção são percorridos por paginação por chave (``id``), em
+lotes pequenos. Cada lote é primeiro gravado em um pacote JSONL comprimido no
+storage (edital, itens, documentos e oportunidades) e depois excluído em uma
+transação curta, com ``lock_timeout``. Entre os lotes há uma pausa, de modo
+que a limpeza nunca segura locks longos nas tabelas quentes. Arquivos de
+mídia que nenhum edital referencia mais são removidos ao final.
+
+Editais com trabalho dos tenants (propostas, documentos gerados, contratos
+e o que pende deles) não expiram: o cascade do ``delete()`` apagaria esse
+trabalho junto. O nome do pacote depende só do conteúdo, então uma execução
+repetida (por exemplo, após um lote que não conseguiu o lock) não grava um
+segundo pacote igual.
+"""
+
+import gzip
+import hashlib
+import io
+import json
+import logging
+import operator
+import os
+import time
+from functools import reduce
+from datetime import timedelta
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import OperationalError, connection, transaction
+from django.db.models import Exists, OuterRef, Q, QuerySet
+from django.utils import timezone
+
+from ..models import DocumentoExigido, Edital, ItemEdital, OportunidadeTenant
+
+logger = logging.getLogger(__name__)
+
+PREFIXO_ARQUIVO = 'editais/arquivo'
+
+# Tabelas que dependem do edital, com o nome usado no pacote arquivado
+DEPENDENTES = (
+    ('itens', ItemEdital),
+    ('documentos', DocumentoExigido),
+    ('oportunidades', OportunidadeTenant),
+)
+
+# Mídia de editais: (diretório no storage, campo do edital, chave do arquivo)
+MIDIA_EDITAIS = (
+    ('editais/originais', 'arquivo_original', lambda nome: nome),
+    ('editais/textos', 'arquivo_sha256', lambda nome: os.path.basename(nome).split('.', 1)[0]),
+)
+
+TENTATIVAS_LOCK = 3
+
+
+def com_trabalho_dos_tenants() -> Q:
+    """
+    Filtro dos editais com trabalho dos tenants ligado às suas oportunidades ou itens.
+
+    Vale qualquer modelo instalado com FK para ``OportunidadeTenant`` ou
+    ``ItemEdital`` (propostas, gerações de documentos, contratos); faturas e
+    medições pendem dos contratos e ficam protegidas com eles.
+    """
+    existentes = [
+        Exists(relacao.related_model._base_manager.filter(
+            **{f'{relacao.field.name}__edital_id': OuterRef('pk')}
+        ))
+        for modelo in (OportunidadeTenant, ItemEdital)
+        for relacao in modelo._meta.related_objects
+    ]
+    return reduce(operator.or_, existentes, Q())
+
+
+def arquivar_lote(edital_ids: List[int], storage=None) -> Optional[str]:
+    """
+    Grava os editais e suas linhas dependentes em um pacote JSONL comprimido.
+
+    Cada linha do pacote é um edital com ``itens``, ``documentos`` e
+    ``oportunidades`` embutidos. O caminho tem o schema e um hash do
+    conteúdo: se o pacote já existe, não é gravado de novo. Retorna o
+    caminho no storage.
+    """
+    storage = storage or default_storage
+    editais = {
+        registro['id']: registro
+        for registro in Edital.objects.filter(id__in=edital_ids).order_by('id').values()
+    }
+    if not editais:
+        return None
+
+    for chave, modelo in DEPENDENTES:
+        for registro in editais.values():
+            registro[chave] = []
+        for linha in modelo.objects.filter(edital_id__in=list(editais)).order_by('id').values():
+            editais[linha['edital_id']][chave].append(linha)
+
+    buffer = io.BytesIO()
+    resumo = hashlib.sha256()
+    # mtime fixo: o mesmo conteúdo gera o mesmo pacote
+    with gzip.GzipFile(fileobj=buffer, mode='wb', compresslevel=6, mtime=0) as saida:
+        for registro in editais.values():
+            registro.pop('busca', None)
+            linha = json.dumps(registro, cls=DjangoJSONEncoder, ensure_ascii=False).encode('utf-8') + b'\n'
+            resumo.update(linha)
+            saida.write(linha)
+
+    ids = sorted(editais)
+    # O storage é compartilhado entre os tenants, e os ids se repetem entre schemas
+    schema = getattr(connection, 'schema_name', None) or 'public'
+    caminho = f"{PREFIXO_ARQUIVO}/{schema}/editais-{ids[0]}-{ids[-1]}-{resumo.hexdigest()[:16]}.jsonl.gz"
+    if storage.exists(caminho):
+        return caminho
+    return storage.save(caminho, ContentFile(buffer.getvalue()))
+
+
+def _excluir_lote(edital_ids: List[int], manter_editais: bool) -> int:
+    """
+    Exclui um lote em uma transação curta, desistindo se esperar por lock.
+
+    Usa o ``delete()`` do ORM para que o cascade alcance as linhas ligadas às
+    oportunidades; os editais com trabalho dos tenants já foram tirados do
+    lote por ``expurgar_editais``.
+    """
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL lock_timeout = %s", [f"{settings.EDITAL_RETENCAO_LOCK_TIMEOUT_MS}ms"])
+
+        if not manter_editais:
+            total, _ = Edital.objects.filter(id__in=edital_ids).delete()
+            return total
+
+        total = 0
+        for _, modelo in DEPENDENTES:
+            excluidos, _ = modelo.objects.filter(edital_id__in=edital_ids).delete()
+            total += excluidos
+        return total
+
+
+def expurgar_editais(editais: QuerySet, lote: Optional[int] = None, pausa: Optional[float] = None,
+                     arquivar: Optional[bool] = None, manter_editais: bool = False) -> Dict[str, int]:
+    """
+    Arquiva e exclui os editais do queryset em lotes paginados por ``id``.
+
+    Editais com trabalho dos tenants (``com_trabalho_dos_tenants``) ficam de
+    fora. ``manter_editais`` exclui só as linhas dependentes, para quando os
+    editais saem junto com a partição inteira.
+    """
+    editais = editais.exclude(com_trabalho_dos_tenants())
+    lote = lote or settings.EDITAL_RETENCAO_LOTE
+    pausa = settings.EDITAL_RETENCAO_PAUSA if pausa is None else pausa
+    arquivar = settings.EDITAL_RETENCAO_ARQUIVAR if arquivar is None else arquivar
+
+    resumo = {'editais': 0, 'linhas': 0, 'pacotes': 0}
+    ultimo_id = 0
+
+    while True:
+        ids = list(
+            editais.filter(id__gt=ultimo_id).order_by('id').values_list('id', flat=True)[:lote]
+        )
+        if not ids:
+            return resumo
+
+        if arquivar and arquivar_lote(ids):
+            resumo['pacotes'] += 1
+
+        for tentativa in range(1, TENTATIVAS_LOCK + 1):
+            try:
+                resumo['linhas'] += _excluir_lote(ids, manter_editais)
+                resumo['editais'] += len(ids)
+                break
+            except OperationalError as e:
+                # lock_timeout: cede a vez para o tráfego e tenta de novo depois
+                logger.warning(f"Lote de editais {ids[0]}-{ids[-1]} aguardando lock (tentativa {tentativa}): {e}")
+                time.sleep(pausa * 4 * tentativa)
+        else:
+            logger.error(f"Lote de editais {ids[0]}-{ids[-1]} não excluído; fica para a próxima execução")
+
+        ultimo_id = ids[-1]
+        time.sleep(pausa)
+
+
+def _listar_arquivos(storage, diretorio: str) -> Iterator[str]:
+    """Lista recursivamente os arquivos de um diretório do storage."""
+    try:
+        subdiretorios, arquivos = storage.listdir(diretorio)
+    except (FileNotFoundError, NotImplementedError):
+        return
+    for nome in arquivos:
+        yield f"{diretorio}/{nome}"
+    for subdiretorio in subdiretorios:
+        yield from _listar_arquivos(storage, f"{diretorio}/{subdiretorio}")
+
+
+def _referenciadas(campo: str, valores: set, schemas: Optional[Iterable[str]]) -> set:
+    """Valores de ``campo`` usados por algum edital (do schema atual ou dos ``schemas``)."""
+    def consultar():
+        return set(Edital.objects.filter(**{f'{campo}__in': valores}).values_list(campo, flat=True))
+
+    if schemas is None:
+        return consultar()
+
+    from django_tenants.utils import schema_context
+
+    referenciadas = set()
+    for schema in schemas:
+        with schema_context(schema):
+            referenciadas |= consultar()
+    return referenciadas
+
+
+def coletar_midia_orfa(storage=None, carencia: Optional[timedelta] = None, lote: int = 500,
+                       schemas: Optional[Iterable[str]] = None) -> int:
+    """
+    Remove arquivos de editais que nenhum edital referencia.
+
+    Arquivos mais novos que ``carencia`` são mantidos, para não apagar um
+    upload cujo edital ainda não foi gravado. O storage é compartilhado entre
+    os tenants: com ``schemas``, um arquivo só é órfão se nenhum desses
+    schemas o referencia (sem eles, vale só o schema da conexão atual).
+    """
+    storage = storage or default_storage
+    carencia = carencia or timedelta(hours=settings.EDITAL_MIDIA_CARENCIA_HORAS)
+    limite = timezone.now() - carencia
+    schemas = list(schemas) if schemas is not None else None
+    removidos = 0
+
+    def processar(nomes, campo, chave):
+        chaves = {nome: chave(nome) for nome in nomes}
+        referenciadas = _referenciadas(campo, set(chaves.values()), schemas)
+        total = 0
+        for nome, valor in chaves.items():
+            if valor in referenciadas:
+                continue
+            try:
+                if storage.get_modified_time(nome) >= limite:
+                    continue
+                storage.delete(nome)
+                total += 1
+            except Exception as e:
+                logger.warning(f"Erro ao remover mídia órfã {nome}: {e}")
+        return total
+
+    for diretorio, campo, chave in MIDIA_EDITAIS:
+        nomes = []
+        for nome in _listar_arquivos(storage, diretorio):
+            nomes.append(nome)
+            if len(nomes) >= lote:
+                removidos += processar(nomes, campo, chave)
+                nomes = []
+        if nomes:
+            removidos += processar(nomes, campo, chave)
+
+    if removidos:
+        logger.info(f"Removidos {removidos} arquivos de mídia órfãos de editais")
+    return removidos
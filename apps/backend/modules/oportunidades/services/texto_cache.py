@@ -0,0 +1,74 @@
+"""
+Cache persistente do texto extraído de editais, endereçado pelo SHA-256 do arquivo.
+
+O texto normalizado é gravado comprimido no storage padrão do Django (disco local
+ou object storage), uma vez por conteúdo de arquivo. Retries, reparses e mudanças
+de prompt reaproveitam o artefato sem decodificar PDF/DOCX de novo.
+"""
+
+import gzip
+import hashlib
+import logging
+import re
+import unicodedata
+from typing import Optional
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+logger = logging.getLogger(__name__)
+
+PREFIXO_TEXTOS = 'editais/textos'
+
+_ESPACOS_FIM_LINHA = re.compile(r'[ \t]+\n')
+_LINHAS_VAZIAS = re.compile(r'\n{3,}')
+
+
+def calcular_sha256(arquivo_path: str, tamanho_bloco: int = 1024 * 1024) -> str:
+    """Calcula o SHA-256 do arquivo lendo em blocos."""
+    h = hashlib.sha256()
+    with open(arquivo_path, 'rb') as f:
+        for bloco in iter(lambda: f.read(tamanho_bloco), b''):
+            h.update(bloco)
+    return h.hexdigest()
+
+
+def normalizar_texto(texto: str) -> str:
+    """Normaliza o texto extraído (NFC, espaços de fim de linha, linhas vazias repetidas)."""
+    texto = unicodedata.normalize('NFC', texto).replace('\r\n', '\n')
+    texto = _ESPACOS_FIM_LINHA.sub('\n', texto)
+    return _LINHAS_VAZIAS.sub('\n\n', texto)
+
+
+def caminho_texto(sha256: str) -> str:
+    """Caminho do artefato de texto no storage."""
+    return f"{PREFIXO_TEXTOS}/{sha256[:2]}/{sha256}.txt.gz"
+
+
+class TextoExtraidoStore:
+    """Leitura e gravação dos artefatos de texto extraído."""
+
+    def __init__(self, storage=None):
+        self.storage = storage or default_storage
+
+    def obter(self, sha256: str) -> Optional[str]:
+        """Retorna o texto já extraído para o hash, ou ``None``."""
+        caminho = caminho_texto(sha256)
+        try:
+            if not self.storage.exists(caminho):
+                return None
+            with self.storage.open(caminho, 'rb') as f:
+                return gzip.decompress(f.read()).decode('utf-8')
+        except Exception as e:
+            logger.warning(f"Falha ao ler texto extraído {caminho}: {e}")
+            return None
+
+    def salvar(self, sha256: str, texto: str) -> str:
+        """Grava o texto comprimido, se ainda não existir, e retorna o caminho."""
+        caminho = caminho_texto(sha256)
+        if self.storage.exists(caminho):
+            return caminho
+
+        conteudo = gzip.compress(texto.encode('utf-8'), compresslevel=6)
+        # O storage pode renomear em caso de corrida; o nome salvo é o que vale
+        return self.storage.save(caminho, ContentFile(conteudo))
@@ -0,0 +1,125 @@
+"""
+Sinais do módulo de oportunidades.
+"""
+
+import logging
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from core.tenancy.models import Tenant
+
+from .models import Edital
+
+logger = logging.getLogger(__name__)
+
+# Campos do edital que entram no vetor de busca (os itens são tratados no parse)
+CAMPOS_BUSCA = ('objeto', 'orgao', 'municipio')
+
+# Campos do tenant que mudam o resultado do matching
+CAMPOS_PERFIL = (
+    'uf', 'municipio', 'cnae_principal', 'cnae_secundarios', 'palavras_chave',
+    'plan', 'is_active', 'billing_status',
+)
+
+
+@receiver(pre_save, sender=Tenant)
+def guardar_perfil_anterior(sender, instance, update_fields=None, **kwargs):
+    """Guarda o perfil gravado antes do save para detectar mudanças relevantes."""
+    instance._perfil_anterior = None
+    if instance.pk is None:
+        return
+    if update_fields is not None and not set(update_fields) & set(CAMPOS_PERFIL):
+        instance._perfil_anterior = _perfil(instance)
+        return
+    instance._perfil_anterior = (
+        Tenant.objects.filter(pk=instance.pk).values_list(*CAMPOS_PERFIL).first()
+    )
+
+
+def _perfil(tenant):
+    return tuple(getattr(tenant, campo) for campo in CAMPOS_PERFIL)
+
+
+@receiver(post_save, sender=Tenant)
+def casar_tenant_alterado(sender, instance, created, **kwargs):
+    """Dispara o match reverso quando um tenant elegível é criado ou muda de perfil."""
+    from .services.indice_tenants import elegivel
+    from .tasks import casar_tenant_com_editais_abertos
+
+    if not elegivel(instance):
+        return
+    if not created and getattr(instance, '_perfil_anterior', None) == _perfil(instance):
+        return
+
+    tenant_id = instance.id
+    transaction.on_commit(lambda: casar_tenant_com_editais_abertos.delay(tenant_id))
+
+
+@receiver(post_save, sender=Tenant)
+def indexar_tenant(sender, instance, **kwargs):
+    """Mantém o índice invertido de tenants atualizado após cada save."""
+    from .services.indice_tenants import IndiceTenants
+
+    def atualizar():
+        try:
+            IndiceTenants().atualizar(instance)
+        except Exception as e:
+            # O índice se corrige na próxima reconstrução; o save não deve falhar
+            logger.error(f"Erro ao indexar tenant {instance.id}: {e}")
+
+    transaction.on_commit(atualizar)
+
+
+@receiver(post_delete, sender=Tenant)
+def desindexar_tenant(sender, instance, **kwargs):
+    """Remove o tenant excluído do índice invertido."""
+    from .services.indice_tenants import IndiceTenants
+
+    tenant_id = instance.id
+
+    def remover():
+        try:
+            IndiceTenants().remover(tenant_id)
+        except Exception as e:
+            logger.error(f"Erro ao remover tenant {tenant_id} do índice: {e}")
+
+    transaction.on_commit(remover)
+
+
+@receiver(post_delete, sender=Tenant)
+def remover_perfil_keywords(sender, instance, **kwargs):
+    """Tira o tenant excluído do índice de palavras-chave (deste e dos demais processos)."""
+    from .services.keywords import registrar_exclusao
+
+    tenant_id = instance.id
+
+    def remover():
+        try:
+            registrar_exclusao(tenant_id)
+        except Exception as e:
+            # Sem a marca no cache, os outros processos mantêm o perfil até reiniciar
+            logger.error(f"Erro ao remover tenant {tenant_id} do índice de palavras-chave: {e}")
+
+    transaction.on_commit(remover)
+
+
+@receiver(post_save, sender=Edital)
+def reindexar_busca_edital(sender, instance, created, update_fields=None, **kwargs):
+    """Recalcula o vetor de busca quando muda um campo textual do edital."""
+    from .services.busca import atualizar_vetor_busca
+
+    if update_fields is not None and not set(update_fields) & set(CAMPOS_BUSCA):
+        return
+
+    edital_id = instance.id
+
+    def atualizar():
+        try:
+            atualizar_vetor_busca([edital_id])
+        except Exception as e:
+            # indexar_busca_editais cobre os editais que ficarem sem vetor
+            logger.error(f"Erro ao atualizar busca do edital {edital_id}: {e}")
+
+    transaction.on_commit(atualizar)
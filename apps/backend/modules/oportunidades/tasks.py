@@ -3,16 +3,76 @@ Tasks do Celery para o módulo de oportunidades.
 """
 
 import logging
-from celery import shared_task
+import openai
+from celery import chord, shared_task
+from django.db import transaction
+from django.db.models import Q
 from django.utils import timezone
 from django.conf import settings
+from django.core.cache import cache
 
 from .models import Edital, OportunidadeTenant
 from .services.ai_parser import EditalAIParser
-from .services.oportunidade_matcher import OportunidadeMatcher
+from .services import particoes
+from .services.busca import atualizar_vetor_busca, indexar_pendentes
+from .services.oportunidade_matcher import SCORE_MINIMO, FeaturesTenants, OportunidadeMatcher
+from .services.indice_tenants import IndiceTenants, termos_edital
+from .services.fila_ingestao import reivindicar_editais, reivindicar_proximo_lote
+from .services.keywords import atualizar_perfis, obter_motor, texto_edital
+from .services.retencao import coletar_midia_orfa, expurgar_editais
+from .services.persistencia import (
+    decimal_score, gravar_oportunidades, persistir_itens_e_documentos, salvar_oportunidades
+)
 
 logger = logging.getLogger(__name__)
 
+def _indexar_busca(edital_id):
+    """Vetor de busca do edital, fora da transação do parse: uma falha aqui não desfaz o resultado."""
+    try:
+        atualizar_vetor_busca([edital_id])
+    except Exception as exc:
+        # indexar_busca_editais cobre os editais que ficarem sem vetor
+        logger.error(f"Erro ao atualizar busca do edital {edital_id}: {exc}")
+
+def _aplicar_resultado_parse(edital, resultado):
+    """Grava o resultado do parser no edital e dispara a criação de oportunidades."""
+    if resultado['sucesso']:
+        with transaction.atomic():
+            # Atualiza edital com dados processados
+            edital.arquivo_processado = resultado['dados']
+            edital.itens_extraidos = resultado['itens']
+            edital.documentos_exigidos = resultado['documentos']
+            edital.confidence_score = resultado['confidence_score']
+            edital.arquivo_sha256 = resultado.get('arquivo_sha256', edital.arquivo_sha256)
+            edital.texto_extraido.name = resultado.get('texto_extraido', edital.texto_extraido.name)
+            edital.lote_ia_id = ''
+            # Vetor recalculado após o commit; até lá (ou se falhar) fica para indexar_busca_editais
+            edital.busca = None
+            edital.save(update_fields=[
+                'arquivo_processado', 'itens_extraidos', 'documentos_exigidos',
+                'arquivo_sha256', 'texto_extraido', 'lote_ia_id', 'busca', 'updated_at'
+            ])
+            
+            # Popula ItemEdital/DocumentoExigido para a precificação
+            persistir_itens_e_documentos(edital, resultado['itens'], resultado['documentos'])
+            edital.mark_as_processed()
+            
+            # Dispara task para criar oportunidades para todos os tenants
+            edital_id = edital.id
+            transaction.on_commit(lambda: _indexar_busca(edital_id))
+            transaction.on_commit(lambda: criar_oportunidades_para_tenants.delay(edital_id))
+        
+        logger.info(f"Edital {edital.numero} processado com sucesso")
+        
+    else:
+        # Registra erros
+        edital.parse_errors = resultado['erros']
+        edital.status_ingestao = 'erro'
+        edital.lote_ia_id = ''
+        edital.save(update_fields=['parse_errors', 'status_ingestao', 'lote_ia_id'])
+        
+        logger.error(f"Erro ao processar edital {edital.numero}: {resultado['erros']}")
+
 @shared_task(bind=True, max_retries=3, default_retry_delay=60)
 def processar_edital_task(self, edital_id):
     """
@@ -22,36 +82,17 @@ def processar_edital_task(self, edital_id):
         edital = Edital.objects.get(id=edital_id)
         logger.info(f"Iniciando processamento do edital {edital.numero}")
         
-        # Marca como processando
+        # Marca como processando (e renova a lease de quem despachou pela fila)
         edital.status_ingestao = 'processando'
-        edital.save(update_fields=['status_ingestao'])
+        edital.processando_desde = timezone.now()
+        edital.save(update_fields=['status_ingestao', 'processando_desde'])
         
         # Inicializa parser de IA
         parser = EditalAIParser()
         
         # Processa o edital
         resultado = parser.parse_edital(edital.arquivo_original.path)
-        
-        if resultado['sucesso']:
-            # Atualiza edital com dados processados
-            edital.arquivo_processado = resultado['dados']
-            edital.itens_extraidos = resultado['itens']
-            edital.documentos_exigidos = resultado['documentos']
-            edital.confidence_score = resultado['confidence_score']
-            edital.mark_as_processed()
-            
-            logger.info(f"Edital {edital.numero} processado com sucesso")
-            
-            # Dispara task para criar oportunidades para todos os tenants
-            criar_oportunidades_para_tenants.delay(edital_id)
-            
-        else:
-            # Registra erros
-            edital.parse_errors = resultado['erros']
-            edital.status_ingestao = 'erro'
-            edital.save(update_fields=['parse_errors', 'status_ingestao'])
-            
-            logger.error(f"Erro ao processar edital {edital.numero}: {resultado['erros']}")
+        _aplicar_resultado_parse(edital, resultado)
             
     except Edital.DoesNotExist:
         logger.error(f"Edital {edital_id} não encontrado")
@@ -71,122 +112,564 @@ def processar_edital_task(self, edital_id):
             except Edital.DoesNotExist:
                 pass
 
+def _tenants_elegiveis():
+    """Tenants que recebem oportunidades: ativos e com cobrança em dia."""
+    # Importa aqui para evitar circular imports
+    from core.tenancy.models import Tenant
+    return Tenant.objects.filter(is_active=True, billing_status='active')
+
+def _shards_de_tenants(tamanho, candidatos=None):
+    """
+    Divide os tenants em shards de até ``tamanho`` tenants.
+    
+    Sem candidatos, cada shard é um intervalo de id [inicio, fim] sobre todos os
+    tenants elegíveis; com candidatos (vindos do índice invertido), o shard leva
+    também a lista explícita de ids.
+    """
+    ids = candidatos
+    if ids is None:
+        ids = list(_tenants_elegiveis().order_by('id').values_list('id', flat=True))
+    
+    shards = []
+    for inicio in range(0, len(ids), tamanho):
+        parte = ids[inicio:inicio + tamanho]
+        shards.append((parte[0], parte[-1], parte if candidatos is not None else None))
+    return shards
+
+def _candidatos_do_indice(edital):
+    """
+    Tenants que podem atingir ``SCORE_MINIMO`` no edital (``None`` = todos).
+    
+    União das postings do índice invertido (UF, município, afinidade de CNAE
+    com os itens) com os tenants que têm termo em comum com o edital no índice
+    de palavras-chave; os demais não passam de ``SCORE_MAXIMO_SEM_AFINIDADE``
+    (ver ``termos_edital``).
+    """
+    if not settings.OPORTUNIDADE_PREFILTRO:
+        return None
+    
+    try:
+        indice = IndiceTenants()
+        termos = termos_edital(edital, indice.tabela)
+        if termos is None:
+            return None
+        candidatos = indice.candidatos(termos)
+    except Exception as e:
+        logger.warning(f"Índice de tenants indisponível, pontuando todos: {e}")
+        return None
+    
+    if candidatos is None:
+        if cache.add('tenants:idx:reconstruindo', True, timeout=3600):
+            logger.warning("Índice de tenants vazio; agendando reconstrução")
+            reconstruir_indice_tenants.delay()
+        return None
+    
+    por_keywords = obter_motor().tenants_com_termos(texto_edital(edital))
+    return sorted(set(candidatos).union(por_keywords))
+
 @shared_task
 def criar_oportunidades_para_tenants(edital_id):
     """
     Cria oportunidades para todos os tenants ativos baseado no edital.
+    
+    Só os tenants que podem atingir o score mínimo (mesma UF ou município,
+    CNAE com afinidade com os itens, ou palavras-chave em comum) são pontuados. Eles são divididos em shards, processados em
+    paralelo (chord) e agregados em ``agregar_oportunidades_edital``.
     """
     try:
         edital = Edital.objects.get(id=edital_id)
-        logger.info(f"Criando oportunidades para edital {edital.numero}")
-        
-        # Importa aqui para evitar circular imports
-        from core.tenancy.models import Tenant
-        
-        # Busca todos os tenants ativos
-        tenants = Tenant.objects.filter(is_active=True, billing_status='active')
+        candidatos = _candidatos_do_indice(edital)
+        shards = _shards_de_tenants(settings.OPORTUNIDADE_SHARD_SIZE, candidatos)
+        logger.info(
+            f"Criando oportunidades para edital {edital.numero} em {len(shards)} shards"
+            + (f" ({len(candidatos)} tenants candidatos)" if candidatos is not None else "")
+        )
         
-        matcher = OportunidadeMatcher()
+        if len(shards) <= 1:
+            # Um shard só: não vale o custo do chord
+            resultados = [criar_oportunidades_shard(edital_id, *shard) for shard in shards]
+            return agregar_oportunidades_edital(resultados, edital_id)
         
-        for tenant in tenants:
-            try:
-                # Calcula score de match
-                match_score = matcher.calcular_match_score(edital, tenant)
-                
-                # Cria oportunidade se score for relevante
-                if match_score >= 0.3:  # Threshold configurável
-                    oportunidade, created = OportunidadeTenant.objects.get_or_create(
-                        tenant=tenant,
-                        edital=edital,
-                        defaults={
-                            'match_score': match_score,
-                            'status': 'nova'
-                        }
-                    )
-                    
-                    if created:
-                        logger.info(f"Oportunidade criada para tenant {tenant.name} (score: {match_score})")
-                    else:
-                        # Atualiza score existente
-                        oportunidade.match_score = match_score
-                        oportunidade.save(update_fields=['match_score'])
-                        
-            except Exception as e:
-                logger.error(f"Erro ao criar oportunidade para tenant {tenant.name}: {e}")
-                continue
+        chord(
+            criar_oportunidades_shard.s(edital_id, *shard) for shard in shards
+        )(agregar_oportunidades_edital.s(edital_id))
                 
     except Edital.DoesNotExist:
         logger.error(f"Edital {edital_id} não encontrado")
     except Exception as exc:
         logger.error(f"Erro ao criar oportunidades: {exc}")
 
+@shared_task(bind=True, max_retries=3, default_retry_delay=30)
+def criar_oportunidades_shard(self, edital_id, tenant_id_inicio, tenant_id_fim, tenant_ids=None):
+    """
+    Calcula e grava as oportunidades de um edital para um intervalo de tenants.
+    
+    Com ``tenant_ids``, só esses tenants do intervalo são pontuados. O upsert
+    torna o shard idempotente: um retry refaz só este intervalo.
+    """
+    try:
+        edital = Edital.objects.get(id=edital_id)
+        matcher = OportunidadeMatcher()
+        
+        tenants = _tenants_elegiveis().filter(id__gte=tenant_id_inicio, id__lte=tenant_id_fim)
+        if tenant_ids is not None:
+            tenants = tenants.filter(id__in=tenant_ids)
+        
+        # Features dos tenants do shard em uma query; score em uma passada
+        features = matcher.carregar_tenants(tenants)
+        scores = matcher.calcular_scores_lote(edital, features)
+        
+        # Cria oportunidade se score for relevante
+        relevantes = scores >= SCORE_MINIMO
+        
+        tenant_ids = features.ids[relevantes].tolist()
+        return salvar_oportunidades(edital_id, tenant_ids, scores[relevantes].tolist(),
+                                    keywords=matcher.palavras_em_comum(edital, tenant_ids))
+        
+    except Edital.DoesNotExist:
+        logger.error(f"Edital {edital_id} não encontrado")
+        return {'criadas': 0, 'atualizadas': 0, 'falhas': 0}
+    except Exception as exc:
+        shard = f"{tenant_id_inicio}-{tenant_id_fim}"
+        if self.request.called_directly or self.request.retries >= self.max_retries:
+            # Não derruba o chord: o shard entra na agregação como falha
+            logger.error(f"Shard {shard} do edital {edital_id} falhou: {exc}")
+            return {'criadas': 0, 'atualizadas': 0, 'falhas': 1}
+        
+        logger.warning(f"Shard {shard} do edital {edital_id} falhou, tentando de novo: {exc}")
+        raise self.retry(exc=exc, countdown=30 * (2 ** self.request.retries))
+
+@shared_task
+def agregar_oportunidades_edital(resultados, edital_id):
+    """Soma as contagens dos shards do fan-out de um edital."""
+    contagem = {'criadas': 0, 'atualizadas': 0, 'falhas': 0}
+    for resultado in resultados:
+        for chave in contagem:
+            contagem[chave] += (resultado or {}).get(chave, 0)
+    
+    logger.info(
+        f"Edital {edital_id}: {contagem['criadas']} oportunidades criadas, "
+        f"{contagem['atualizadas']} atualizadas, {contagem['falhas']} shards com falha"
+    )
+    return contagem
+
+def _editais_abertos():
+    """Editais processados que ainda recebem propostas (mesmo critério de ``Edital.is_open``)."""
+    return Edital.objects.filter(status_ingestao='concluido').filter(
+        Q(data_encerramento__isnull=True) | Q(data_encerramento__gte=timezone.now().date())
+    )
+
+@shared_task
+def casar_tenant_com_editais_abertos(tenant_id):
+    """
+    Match reverso: pontua um tenant novo ou alterado contra os editais abertos.
+    
+    Os editais vêm de um cursor do lado do servidor (``iterator``) e são
+    pontuados em blocos pela API vetorizada, então a memória fica limitada ao
+    bloco mesmo com centenas de milhares de editais abertos.
+    """
+    try:
+        matcher = OportunidadeMatcher()
+        features = matcher.carregar_tenants(_tenants_elegiveis().filter(id=tenant_id))
+        if not len(features):
+            logger.info(f"Tenant {tenant_id} não elegível; match reverso ignorado")
+            return {'criadas': 0, 'atualizadas': 0}
+        
+        # O perfil de palavras-chave do tenant acabou de mudar
+        atualizar_perfis(matcher.motor_keywords, [tenant_id])
+        
+        editais = _editais_abertos().only(
+            'id', 'uf', 'municipio', 'valor_estimado', 'objeto', 'itens_extraidos'
+        ).order_by('id')
+        
+        bloco_tamanho = settings.OPORTUNIDADE_REVERSO_BLOCO
+        contagem = {'criadas': 0, 'atualizadas': 0}
+        total = 0
+        bloco = []
+        
+        def processar_bloco(bloco):
+            scores = matcher.calcular_matriz_scores(bloco, features)[:, 0]
+            registros = [
+                (tenant_id, edital.id, float(score),
+                 matcher.palavras_em_comum(edital, [tenant_id])[0])
+                for edital, score in zip(bloco, scores)
+                if score >= SCORE_MINIMO
+            ]
+            for chave, valor in gravar_oportunidades(registros).items():
+                contagem[chave] += valor
+        
+        for edital in editais.iterator(chunk_size=bloco_tamanho):
+            bloco.append(edital)
+            if len(bloco) >= bloco_tamanho:
+                processar_bloco(bloco)
+                total += len(bloco)
+                bloco = []
+        if bloco:
+            processar_bloco(bloco)
+            total += len(bloco)
+        
+        logger.info(
+            f"Match reverso do tenant {tenant_id}: {total} editais abertos, "
+            f"{contagem['criadas']} oportunidades criadas, {contagem['atualizadas']} atualizadas"
+        )
+        return contagem
+        
+    except Exception as exc:
+        logger.error(f"Erro no match reverso do tenant {tenant_id}: {exc}")
+
+@shared_task
+def reconstruir_indice_tenants():
+    """
+    Reconstrói o índice invertido de tenants a partir do banco.
+    """
+    try:
+        return IndiceTenants().reconstruir()
+    finally:
+        cache.delete('tenants:idx:reconstruindo')
+
 @shared_task
 def processar_editais_pendentes():
     """
     Task agendada para processar editais pendentes.
     """
     try:
-        # Busca editais pendentes
-        editais_pendentes = Edital.objects.filter(
-            status_ingestao='pendente'
-        ).order_by('created_at')[:10]  # Processa até 10 por vez
+        # Backfills grandes vão para a Batch API em vez da API de chat síncrona
+        if settings.EDITAL_BATCH_ENABLED and settings.OPENAI_API_KEY:
+            total_pendentes = Edital.objects.filter(status_ingestao='pendente').count()
+            if total_pendentes >= settings.EDITAL_BATCH_MIN_EDITAIS:
+                submeter_lote_editais.delay()
+                logger.info(f"{total_pendentes} editais pendentes; enviando para processamento em lote")
+                return
+        
+        # Reivindica (SKIP LOCKED) um lote dimensionado pela fila e pelos workers
+        ids = reivindicar_proximo_lote()
         
-        for edital in editais_pendentes:
-            processar_edital_task.delay(edital.id)
+        for edital_id in ids:
+            processar_edital_task.delay(edital_id)
             
-        logger.info(f"Disparadas {editais_pendentes.count()} tasks de processamento")
+        logger.info(f"Disparadas {len(ids)} tasks de processamento")
         
     except Exception as exc:
         logger.error(f"Erro ao processar editais pendentes: {exc}")
 
 @shared_task
-def limpar_editais_antigos():
+def indexar_busca_editais():
+    """Preenche o vetor de busca dos editais ainda não indexados."""
+    try:
+        total = indexar_pendentes()
+        if total:
+            logger.info(f"Vetor de busca preenchido para {total} editais")
+        return total
+    except Exception as exc:
+        logger.error(f"Erro ao indexar busca de editais: {exc}")
+
+@shared_task
+def submeter_lote_editais(limite=None):
     """
-    Remove editais antigos (mais de 2 anos) para economizar espaço.
+    Envia editais pendentes para extração via Batch API da OpenAI.
+    
+    Os editais são reivindicados em grupos de ``EDITAL_BATCH_GROUP_SIZE``: a
+    leitura do texto é serial, e com grupos pequenos o último edital do grupo
+    não espera além da lease (``EDITAL_CLAIM_LEASE``) enquanto os outros são
+    lidos. O texto de cada grupo também não fica todo em memória até o fim.
     """
+    from .services.batch_parser import EditalBatchParser
+    
+    limite = limite or settings.EDITAL_BATCH_MAX_EDITAIS
+    
+    try:
+        parser = EditalAIParser()
+        lote = EditalBatchParser(parser)
+    except Exception as exc:
+        logger.error(f"Erro ao submeter lote de editais: {exc}")
+        return
+    
+    reivindicados = 0
+    while reivindicados < limite:
+        ids = reivindicar_editais(min(settings.EDITAL_BATCH_GROUP_SIZE, limite - reivindicados))
+        if not ids:
+            break
+        reivindicados += len(ids)
+        _submeter_grupo(parser, lote, ids)
+
+def _submeter_grupo(parser, lote, ids):
+    """Lê o texto de um grupo de editais reivindicados e o envia à Batch API."""
+    sincronos = set()
+    
     try:
-        data_limite = timezone.now().date() - timezone.timedelta(days=730)
+        documentos = {}
+        for edital in Edital.objects.filter(id__in=ids):
+            conteudo, artefato = parser.obter_texto(edital.arquivo_original.path)
+            if not conteudo:
+                _aplicar_resultado_parse(edital, {
+                    'sucesso': False,
+                    'erros': ['Não foi possível ler o arquivo']
+                })
+                continue
+            
+            # O texto extraído fica ligado ao edital para a coleta não reler o arquivo;
+            # a lease é renovada a cada edital lido
+            edital.arquivo_sha256 = artefato.get('arquivo_sha256', '')
+            edital.texto_extraido.name = artefato.get('texto_extraido', '')
+            edital.processando_desde = timezone.now()
+            edital.save(update_fields=['arquivo_sha256', 'texto_extraido', 'processando_desde'])
+            documentos[str(edital.id)] = conteudo
+        
+        enviados = set()
+        for batch_id, chaves in lote.submeter(documentos):
+            enviados.update(chaves)
+            if batch_id is None:
+                # Grande demais para a Batch API: segue pelo caminho síncrono
+                for chave in chaves:
+                    sincronos.add(int(chave))
+                    processar_edital_task.delay(int(chave))
+                continue
+            
+            # A lease do lote (EDITAL_BATCH_LEASE) conta a partir do envio
+            Edital.objects.filter(id__in=chaves).update(
+                lote_ia_id=batch_id, processando_desde=timezone.now()
+            )
+            acompanhar_lote_editais.apply_async(
+                args=[batch_id],
+                countdown=settings.EDITAL_BATCH_POLL_INTERVAL
+            )
+        
+        # Tudo em cache: aplica os resultados imediatamente
+        em_cache = {chave: conteudo for chave, conteudo in documentos.items() if chave not in enviados}
+        if em_cache:
+            _aplicar_resultados_lote(lote, None, em_cache)
         
+    except Exception as exc:
+        logger.error(f"Erro ao submeter lote de editais: {exc}")
+        # Devolve para a fila síncrona o que não chegou a ser enviado
+        Edital.objects.filter(
+            id__in=set(ids) - sincronos, status_ingestao='processando', lote_ia_id=''
+        ).update(status_ingestao='pendente', processando_desde=None)
+
+def _aplicar_resultados_lote(lote, batch_id, documentos):
+    """Aplica nos editais os resultados coletados de um lote."""
+    resultados = lote.coletar(batch_id, documentos)
+    for edital in Edital.objects.filter(id__in=resultados.keys()):
+        try:
+            _aplicar_resultado_parse(edital, resultados[str(edital.id)])
+        except Exception as e:
+            logger.error(f"Erro ao aplicar resultado do lote ao edital {edital.id}: {e}")
+
+@shared_task(bind=True, max_retries=None)
+def acompanhar_lote_editais(self, batch_id):
+    """
+    Verifica o status de um lote na OpenAI e distribui os resultados quando concluído.
+    """
+    from .services.batch_parser import EditalBatchParser, STATUS_EM_ANDAMENTO
+    
+    lote = EditalBatchParser()
+    try:
+        status = lote.status(batch_id)
+    except openai.APIError as exc:
+        # Falha transitória: tenta de novo; se o acompanhamento se perder de vez,
+        # os editais voltam para a fila após EDITAL_BATCH_LEASE
+        logger.warning(f"Erro ao consultar o lote {batch_id}: {exc}")
+        raise self.retry(exc=exc, countdown=settings.EDITAL_BATCH_POLL_INTERVAL)
+    
+    if status in STATUS_EM_ANDAMENTO:
+        raise self.retry(countdown=settings.EDITAL_BATCH_POLL_INTERVAL)
+    
+    editais = Edital.objects.filter(lote_ia_id=batch_id)
+    
+    if status != 'completed':
+        logger.error(f"Lote {batch_id} terminou com status {status}; editais voltam para a fila")
+        editais.update(status_ingestao='pendente', lote_ia_id='', processando_desde=None)
+        return
+    
+    documentos = {}
+    for edital in editais:
+        conteudo = edital.carregar_texto()
+        if conteudo is None:
+            # Artefato indisponível: reprocessa este edital pelo caminho síncrono
+            edital.status_ingestao = 'pendente'
+            edital.lote_ia_id = ''
+            edital.save(update_fields=['status_ingestao', 'lote_ia_id'])
+            continue
+        documentos[str(edital.id)] = conteudo
+    
+    try:
+        _aplicar_resultados_lote(lote, batch_id, documentos)
+    except openai.APIError as exc:
+        # A saída é baixada antes de qualquer edital ser gravado
+        logger.warning(f"Erro ao baixar a saída do lote {batch_id}: {exc}")
+        raise self.retry(exc=exc, countdown=settings.EDITAL_BATCH_POLL_INTERVAL)
+    logger.info(f"Lote {batch_id} aplicado a {len(documentos)} editais")
+
+def _schemas_tenants():
+    """Schemas dos tenants: as tabelas de oportunidades não existem no schema público."""
+    from django_tenants.utils import get_public_schema_name, get_tenant_model
+    
+    return list(
+        get_tenant_model().objects.exclude(schema_name=get_public_schema_name())
+        .order_by('schema_name').values_list('schema_name', flat=True)
+    )
+
+def _limpar_editais_schema(data_limite):
+    """Retenção dos editais do schema atual."""
+    if particoes.esta_particionada():
+        expiradas = particoes.particoes_expiradas(data_limite)
+        for nome, inicio, fim in expiradas:
+            particoes.remover_particao(nome, inicio, fim)
+        # A partição DEFAULT nunca sai inteira: as suas linhas expiram uma a uma
+        resumo = expurgar_editais(particoes.editais_expirados_default(data_limite))
+        logger.info(
+            f"Removidas {len(expiradas)} partições de editais antigos "
+            f"e {resumo['editais']} editais da partição padrão"
+        )
+    else:
         editais_antigos = Edital.objects.filter(
             data_publicacao__lt=data_limite,
             status_ingestao__in=['concluido', 'erro']
         )
-        
-        count = editais_antigos.count()
-        editais_antigos.delete()
-        
-        logger.info(f"Removidos {count} editais antigos")
-        
+        resumo = expurgar_editais(editais_antigos)
+        logger.info(
+            f"Removidos {resumo['editais']} editais antigos "
+            f"({resumo['linhas']} linhas, {resumo['pacotes']} pacotes arquivados)"
+        )
+
+@shared_task
+def limpar_editais_antigos():
+    """
+    Remove editais antigos (mais de EDITAL_RETENCAO_DIAS) para economizar espaço.
+    
+    Roda em cada schema de tenant. Os editais são arquivados em pacotes JSONL
+    comprimidos e excluídos em lotes pequenos, com pausa entre eles (ver
+    ``services/retencao.py``). Com a tabela particionada, remove as partições
+    mensais inteiramente fora da retenção (incluindo editais que nunca foram
+    processados) e expira linha a linha os editais da partição ``DEFAULT``. Ao
+    final, apaga os arquivos de mídia que nenhum schema referencia.
+    """
+    from django_tenants.utils import schema_context
+    
+    data_limite = timezone.now().date() - timezone.timedelta(days=settings.EDITAL_RETENCAO_DIAS)
+    try:
+        schemas = _schemas_tenants()
     except Exception as exc:
         logger.error(f"Erro ao limpar editais antigos: {exc}")
+        return
+    
+    falhas = 0
+    for schema in schemas:
+        try:
+            with schema_context(schema):
+                _limpar_editais_schema(data_limite)
+        except Exception as exc:
+            falhas += 1
+            logger.error(f"Erro ao limpar editais antigos do schema {schema}: {exc}")
+    
+    # Sem a lista completa de referências, um arquivo de outro schema pareceria órfão
+    if falhas:
+        return
+    try:
+        coletar_midia_orfa(schemas=schemas)
+    except Exception as exc:
+        logger.error(f"Erro ao coletar mídia órfã de editais: {exc}")
+
+@shared_task
+def criar_particoes_editais():
+    """Garante as partições mensais dos próximos meses nos schemas com a tabela particionada."""
+    from django_tenants.utils import schema_context
+    
+    criadas = {}
+    try:
+        schemas = _schemas_tenants()
+    except Exception as exc:
+        logger.error(f"Erro ao criar partições de editais: {exc}")
+        return criadas
+    
+    for schema in schemas:
+        try:
+            with schema_context(schema):
+                if particoes.esta_particionada():
+                    criadas[schema] = particoes.criar_particoes(settings.EDITAL_PARTICOES_MESES_FUTUROS)
+        except Exception as exc:
+            logger.error(f"Erro ao criar partições de editais do schema {schema}: {exc}")
+    return criadas
+
+CHAVE_WATERMARK_SCORES = 'oportunidades:scores:watermark'
+
+def _reavaliar_bloco(matcher, bloco):
+    """Recalcula os scores de um bloco de oportunidades; retorna as que mudaram."""
+    editais = list({o.edital_id: o.edital for o in bloco}.values())
+    tenants = list({o.tenant_id: o.tenant for o in bloco}.values())
+    features = FeaturesTenants.de_tenants(tenants)
+    
+    # Matriz pequena (editais × tenants do bloco); o bloco vem ordenado por edital
+    matriz = matcher.calcular_matriz_scores(editais, features)
+    linha = {edital.id: i for i, edital in enumerate(editais)}
+    coluna = {tenant.id: j for j, tenant in enumerate(tenants)}
+    
+    agora = timezone.now()
+    alteradas = []
+    for oportunidade in bloco:
+        novo_score = decimal_score(matriz[linha[oportunidade.edital_id], coluna[oportunidade.tenant_id]])
+        if novo_score != oportunidade.match_score:
+            oportunidade.match_score = novo_score
+            oportunidade.updated_at = agora
+            alteradas.append(oportunidade)
+    return alteradas
 
 @shared_task
-def atualizar_scores_oportunidades():
+def atualizar_scores_oportunidades(completo=False):
     """
     Atualiza scores de match das oportunidades existentes.
+    
+    Só reavalia oportunidades cujo edital ou tenant mudou desde a última
+    execução (watermark em ``updated_at``, guardado no cache); ``completo``
+    força a reavaliação de todas. As oportunidades são lidas com
+    ``iterator`` e gravadas com ``bulk_update``, só quando o score muda.
     """
     try:
         # Importa aqui para evitar circular imports
-        from core.tenancy.models import Tenant
+        from modules.precificacao.models import HistoricoPrecos
         
+        inicio = timezone.now()
+        watermark = None if completo else cache.get(CHAVE_WATERMARK_SCORES)
         matcher = OportunidadeMatcher()
         
         # Busca oportunidades ativas
-        oportunidades = OportunidadeTenant.objects.filter(
-            status__in=['nova', 'analisando']
-        ).select_related('edital', 'tenant')
+        oportunidades = OportunidadeTenant.objects.filter(status__in=['nova', 'analisando'])
+        if watermark is not None:
+            oportunidades = oportunidades.filter(
+                Q(edital__updated_at__gte=watermark)
+                | Q(tenant__updated_at__gte=watermark)
+                | Q(tenant_id__in=HistoricoPrecos.objects.filter(
+                    created_at__gte=watermark).values('tenant_id'))
+            )
+        oportunidades = oportunidades.select_related('edital', 'tenant').order_by('edital_id', 'id')
         
-        for oportunidade in oportunidades:
-            try:
-                novo_score = matcher.calcular_match_score(oportunidade.edital, oportunidade.tenant)
-                oportunidade.match_score = novo_score
-                oportunidade.save(update_fields=['match_score'])
-                
-            except Exception as e:
-                logger.error(f"Erro ao atualizar score da oportunidade {oportunidade.id}: {e}")
+        tamanho = settings.OPORTUNIDADE_RESCORE_CHUNK_SIZE
+        avaliadas = atualizadas = 0
+        bloco = []
+        
+        for oportunidade in oportunidades.iterator(chunk_size=tamanho):
+            bloco.append(oportunidade)
+            if len(bloco) < tamanho:
                 continue
-                
-        logger.info(f"Atualizados scores de {oportunidades.count()} oportunidades")
+            alteradas = _reavaliar_bloco(matcher, bloco)
+            OportunidadeTenant.objects.bulk_update(alteradas, ['match_score', 'updated_at'])
+            avaliadas += len(bloco)
+            atualizadas += len(alteradas)
+            bloco = []
+        
+        if bloco:
+            alteradas = _reavaliar_bloco(matcher, bloco)
+            OportunidadeTenant.objects.bulk_update(alteradas, ['match_score', 'updated_at'])
+            avaliadas += len(bloco)
+            atualizadas += len(alteradas)
+        
+        cache.set(CHAVE_WATERMARK_SCORES, inicio, timeout=None)
+        logger.info(
+            f"Scores reavaliados em {avaliadas} oportunidades "
+            f"({'completo' if watermark is None else f'desde {watermark:%Y-%m-%d %H:%M}'}); "
+            f"{atualizadas} alterados"
+        )
+        return {'avaliadas': avaliadas, 'atualizadas': atualizadas}
         
     except Exception as exc:
         logger.error(f"Erro ao atualizar scores de oportunidades: {exc}")
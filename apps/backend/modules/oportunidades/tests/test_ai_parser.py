@@ -0,0 +1,98 @@
+"""
+Testes do EditalAIParser: prazo global e limite de concorrência.
+"""
+
+import json
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from modules.oportunidades.services.ai_parser import EditalAIParser
+from modules.oportunidades.services.llm_cache import LLMResponseCache
+
+
+class ClienteFalso:
+    """Cliente OpenAI mínimo que registra opções e o pico de chamadas simultâneas."""
+
+    def __init__(self, latencia=0.02):
+        self.latencia = latencia
+        self.opcoes = []
+        self.em_andamento = 0
+        self.pico = 0
+        self._lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def with_options(self, **opcoes):
+        self.opcoes.append(opcoes)
+        return self
+
+    def _create(self, timeout=None, **corpo):
+        with self._lock:
+            self.em_andamento += 1
+            self.pico = max(self.pico, self.em_andamento)
+        try:
+            time.sleep(self.latencia)
+        finally:
+            with self._lock:
+                self.em_andamento -= 1
+        conteudo = json.dumps({'numero': '1', 'orgao': 'X', 'objeto': 'Y', 'modalidade': 'Z'})
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=conteudo))])
+
+
+def criar_parser(cliente, **atributos):
+    parser = EditalAIParser(openai_client=cliente, concorrente=True,
+                            cache=LLMResponseCache(tipo='none'), texto_store=False)
+    for nome, valor in atributos.items():
+        setattr(parser, nome, valor)
+    return parser
+
+
+def test_limites_sem_prazo_usam_configuracao():
+    parser = criar_parser(ClienteFalso(), llm_timeout=60.0, llm_max_retries=2)
+    assert parser._limites_chamada() == (60.0, 2)
+
+
+def test_limites_cabem_no_prazo_restante():
+    parser = criar_parser(ClienteFalso(), llm_timeout=60.0, llm_max_retries=2)
+
+    timeout, retries = parser._limites_chamada(time.monotonic() + 300)
+    assert timeout == 60.0 and retries == 2
+
+    timeout, retries = parser._limites_chamada(time.monotonic() + 130)
+    assert timeout == 60.0 and retries == 1
+
+    timeout, retries = parser._limites_chamada(time.monotonic() + 30)
+    assert timeout <= 30 and retries == 0
+    # Pior caso de todas as tentativas nunca passa do prazo
+    assert timeout * (retries + 1) <= 30
+
+
+def test_prazo_esgotado_nao_dispara_chamada():
+    parser = criar_parser(ClienteFalso())
+    with pytest.raises(TimeoutError):
+        parser._limites_chamada(time.monotonic() - 1)
+
+
+def test_concorrencia_limitada_por_um_unico_pool():
+    cliente = ClienteFalso()
+    parser = criar_parser(cliente, chunk_size=200, chunk_workers=3, prazo_total=30.0)
+    conteudo = '\f'.join(f"1. SEÇÃO {i}\n" + 'texto do edital ' * 10 for i in range(20))
+
+    metadados, _, _ = parser._extrair_concorrente(conteudo, time.monotonic() + parser.prazo_total)
+
+    assert metadados['numero'] == '1'
+    assert len(cliente.opcoes) > parser.chunk_workers
+    assert cliente.pico <= parser.chunk_workers
+
+
+def test_prazos_de_chamadas_paralelas_sao_independentes():
+    cliente = ClienteFalso()
+    parser = criar_parser(cliente, llm_timeout=60.0, llm_max_retries=2)
+
+    # Um edital com prazo esgotado não afeta outro processado pelo mesmo parser
+    with pytest.raises(TimeoutError):
+        parser._chamar_llm('metadados', 'edital A', time.monotonic() - 1)
+    assert parser._chamar_llm('metadados', 'edital B', time.monotonic() + 300)['numero'] == '1'
+    assert cliente.opcoes == [{'max_retries': 2}]
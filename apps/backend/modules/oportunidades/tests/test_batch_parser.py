@@ -0,0 +1,112 @@
+"""
+Testes do modo em lote: divisão dos arquivos nos limites da Batch API.
+"""
+
+import json
+from types import SimpleNamespace
+
+from modules.oportunidades.services.ai_parser import EditalAIParser
+from modules.oportunidades.services.batch_parser import EditalBatchParser
+from modules.oportunidades.services.llm_cache import DiskLLMCache, LLMResponseCache
+
+
+class ClienteLoteFalso:
+    """Cliente OpenAI mínimo que guarda os arquivos enviados à Batch API."""
+
+    def __init__(self):
+        self.arquivos = {}
+        self.lotes = {}
+        self.files = SimpleNamespace(create=self._criar_arquivo)
+        self.batches = SimpleNamespace(create=self._criar_lote)
+
+    def _criar_arquivo(self, file, purpose):
+        arquivo_id = f"file-{len(self.arquivos)}"
+        self.arquivos[arquivo_id] = file[1]
+        return SimpleNamespace(id=arquivo_id)
+
+    def _criar_lote(self, input_file_id, **opcoes):
+        batch_id = f"batch-{len(self.lotes)}"
+        self.lotes[batch_id] = self.arquivos[input_file_id]
+        return SimpleNamespace(id=batch_id)
+
+
+def criar_lote(cliente, cache=None):
+    parser = EditalAIParser(openai_client=cliente, cache=cache or LLMResponseCache(tipo='none'),
+                            texto_store=False)
+    parser.chunk_size = 200
+    return EditalBatchParser(parser)
+
+
+def _documentos(quantidade, tamanho=600):
+    return {str(i): f"Edital {i}\n" + f"Item {i}: material {'x' * 40}\n" * (tamanho // 60)
+            for i in range(quantidade)}
+
+
+def _linhas(conteudo):
+    return [json.loads(linha) for linha in conteudo.decode('utf-8').splitlines()]
+
+
+def test_um_lote_quando_cabe_nos_limites():
+    cliente = ClienteLoteFalso()
+    documentos = _documentos(5)
+
+    lotes = list(criar_lote(cliente).submeter(documentos))
+
+    assert lotes == [('batch-0', list(documentos))]
+
+
+def test_divide_por_requisicoes_sem_separar_documentos():
+    cliente = ClienteLoteFalso()
+    lote = criar_lote(cliente)
+    documentos = _documentos(6)
+    por_documento = len(lote.planejar('0', documentos['0']))
+    lote.max_requisicoes = 2 * por_documento + 1
+
+    lotes = list(lote.submeter(documentos))
+
+    assert [chaves for _, chaves in lotes] == [['0', '1'], ['2', '3'], ['4', '5']]
+    for batch_id, chaves in lotes:
+        linhas = _linhas(cliente.lotes[batch_id])
+        assert len(linhas) <= lote.max_requisicoes
+        assert {linha['custom_id'].split(':')[0] for linha in linhas} == set(chaves)
+
+
+def test_divide_por_bytes():
+    cliente = ClienteLoteFalso()
+    lote = criar_lote(cliente)
+    documentos = _documentos(4)
+    tamanho = sum(map(len, lote._linhas_pendentes('0', documentos['0'])))
+    lote.max_bytes = int(tamanho * 1.5)
+
+    lotes = list(lote.submeter(documentos))
+
+    assert len(lotes) == 4
+    assert all(len(cliente.lotes[batch_id]) <= lote.max_bytes for batch_id, _ in lotes)
+
+
+def test_documento_acima_dos_limites_vai_para_o_caminho_sincrono():
+    cliente = ClienteLoteFalso()
+    lote = criar_lote(cliente)
+    documentos = _documentos(3)
+    documentos['1'] = documentos['1'] * 20
+    lote.max_bytes = sum(map(len, lote._linhas_pendentes('0', documentos['0']))) * 3
+
+    lotes = list(lote.submeter(documentos))
+
+    assert (None, ['1']) in lotes
+    enviados = [chave for batch_id, chaves in lotes if batch_id for chave in chaves]
+    assert enviados == ['0', '2']
+
+
+def test_documentos_em_cache_nao_entram_no_lote(tmp_path):
+    cliente = ClienteLoteFalso()
+    cache = LLMResponseCache(backend=DiskLLMCache(str(tmp_path), 3600, 10 * 1024 * 1024))
+    lote = criar_lote(cliente, cache=cache)
+    documentos = _documentos(2)
+    for _, tipo, trecho in lote.planejar('0', documentos['0']):
+        _, chave = lote.parser.montar_requisicao(tipo, trecho)
+        cache.set(tipo, chave, {})
+
+    lotes = list(lote.submeter(documentos))
+
+    assert lotes == [('batch-0', ['1'])]
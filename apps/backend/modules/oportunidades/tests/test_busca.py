@@ -0,0 +1,30 @@
+"""
+Testes do filtro de valor da busca de editais.
+"""
+
+from decimal import Decimal
+
+from django.db.models import Q
+
+from modules.oportunidades.services.busca import FAIXAS_VALOR, _filtro_valor
+
+
+def test_valor_max_do_usuario_e_inclusivo():
+    assert _filtro_valor(Decimal('10'), Decimal('1000')) == (
+        Q(valor_estimado__gte=Decimal('10')) & Q(valor_estimado__lte=Decimal('1000'))
+    )
+
+
+def test_faixas_da_faceta_sao_semiabertas():
+    assert _filtro_valor(Decimal('80000'), Decimal('1000000'), maximo_inclusivo=False) == (
+        Q(valor_estimado__gte=Decimal('80000')) & Q(valor_estimado__lt=Decimal('1000000'))
+    )
+
+
+def test_faixas_da_faceta_sao_contiguas():
+    for (_, _, fim), (_, inicio, _) in zip(FAIXAS_VALOR, FAIXAS_VALOR[1:]):
+        assert fim == inicio
+
+
+def test_sem_limites_nao_filtra():
+    assert _filtro_valor(None, None) == Q()
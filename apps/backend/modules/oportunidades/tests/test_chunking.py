@@ -0,0 +1,52 @@
+"""
+Testes da divisão do texto de editais em blocos.
+"""
+
+from modules.oportunidades.services.chunking import (
+    SEPARADOR_PAGINA, agrupar_em_chunks, dividir_em_chunks, dividir_em_secoes
+)
+
+
+def _palavras(texto):
+    return texto.replace(SEPARADOR_PAGINA, ' ').split()
+
+
+def test_paginas_nao_juntam_palavras():
+    texto = SEPARADOR_PAGINA.join(["fim da primeira", "começo da segunda"])
+
+    chunks = dividir_em_chunks(texto, 4000)
+
+    assert len(chunks) == 1
+    assert 'primeira\ncomeço' in chunks[0]
+    assert _palavras(chunks[0]) == _palavras(texto)
+
+
+def test_secoes_iniciam_nos_titulos():
+    texto = "Preâmbulo\n1. DO OBJETO\nAquisição\nANEXO I\nTermo\n"
+
+    secoes = list(dividir_em_secoes(texto))
+
+    assert secoes == ["Preâmbulo\n", "1. DO OBJETO\nAquisição\n", "ANEXO I\nTermo\n"]
+
+
+def test_blocos_respeitam_tamanho_sem_perder_conteudo():
+    paginas = [
+        "\n".join(f"{i}.{j} ITEM {'x' * 30}" for j in range(1, 40))
+        for i in range(1, 6)
+    ]
+    texto = SEPARADOR_PAGINA.join(paginas)
+
+    chunks = dividir_em_chunks(texto, 500)
+
+    assert len(chunks) > 1
+    assert all(len(chunk) <= 500 for chunk in chunks)
+    assert _palavras(''.join(chunks)) == _palavras(texto)
+
+
+def test_secao_maior_que_limite_e_quebrada():
+    secao = "linha longa " * 100 + "\n" + "y" * 1200
+
+    chunks = agrupar_em_chunks([secao], 500)
+
+    assert all(len(chunk) <= 500 for chunk in chunks)
+    assert ''.join(chunks) == secao
@@ -0,0 +1,34 @@
+"""
+Testes da tabela de afinidade CNAE × categoria.
+"""
+
+from modules.oportunidades.services.cnae import CATEGORIAS_EM_CACHE, TabelaAfinidade
+
+
+def _tabela():
+    return TabelaAfinidade({
+        'versao': 'teste',
+        'categorias': {'informatica': ['computador'], 'material_limpeza': []},
+        'afinidades': {'62': {'informatica': 1.0}, '6201': {'informatica': 0.5}},
+    })
+
+
+def test_categoria_reconhece_apelido_dentro_do_texto():
+    tabela = _tabela()
+    assert tabela.categoria('Computador portátil') == tabela.coluna['informatica']
+    assert tabela.categoria('material limpeza') == tabela.coluna['material_limpeza']
+
+
+def test_cache_de_categoria_limitado():
+    tabela = _tabela()
+    for i in range(CATEGORIAS_EM_CACHE + 10):
+        tabela.categoria(f'texto {i}')
+    info = tabela.categoria.cache_info()
+    assert info.maxsize == CATEGORIAS_EM_CACHE
+    assert info.currsize == CATEGORIAS_EM_CACHE
+
+
+def test_prefixo_mais_especifico():
+    tabela = _tabela()
+    assert tabela.prefixo_cnae('62.01-5/00') == '6201'
+    assert tabela.prefixo_cnae('6311900') is None
@@ -0,0 +1,181 @@
+"""
+Testes do motor de palavras-chave: índice incremental e scores do TF-IDF.
+"""
+
+import random
+from collections import Counter
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from django.core.cache.backends.locmem import LocMemCache
+
+from modules.oportunidades.services import keywords
+from modules.oportunidades.services.keywords import MotorKeywords, tokenizar
+from modules.oportunidades.services.oportunidade_matcher import (
+    KEYWORDS_SEM_PERFIL, OportunidadeMatcher
+)
+
+PALAVRAS = [
+    'notebook', 'computador', 'monitor', 'teclado', 'detergente', 'sabão', 'vassoura',
+    'asfalto', 'cimento', 'areia', 'buffet', 'café', 'açúcar', 'papel', 'caneta',
+]
+
+CONSULTAS = [
+    'Aquisição de notebooks e monitores',
+    'Material de limpeza: detergente, vassouras e sabão',
+    'Pavimentação com asfalto e cimento',
+    'Café e açúcar para copa',
+    'Serviço de dedetização',
+]
+
+
+@pytest.fixture
+def cache_local(monkeypatch):
+    """Cache em memória no lugar do compartilhado (a marca de exclusões vive nele)."""
+    cache = LocMemCache('keywords-testes', {})
+    monkeypatch.setattr(keywords, 'cache', cache)
+    return cache
+
+
+def _texto(aleatorio):
+    return ' '.join(aleatorio.choices(PALAVRAS, k=aleatorio.randint(1, 8)))
+
+
+def _motor(perfis):
+    motor = MotorKeywords()
+    for tenant_id, texto in perfis.items():
+        motor.definir_perfil(tenant_id, texto)
+    return motor
+
+
+def _referencia(perfis, consultas, tenant_ids):
+    """TF-IDF denso calculado do zero: idf suavizado, TF sublinear e norma L2."""
+    contagens = {tenant_id: Counter(tokenizar(texto)) for tenant_id, texto in perfis.items()}
+    contagens = {tenant_id: contagem for tenant_id, contagem in contagens.items() if contagem}
+    termos = sorted(set().union(*contagens.values())) if contagens else []
+    df = np.array([sum(termo in contagem for contagem in contagens.values()) for termo in termos])
+    idf = np.log((1 + len(contagens)) / (1 + df)) + 1
+
+    def vetor(contagem):
+        pesos = np.array([(1 + np.log(contagem[t])) * peso if contagem.get(t) else 0.0
+                          for t, peso in zip(termos, idf)])
+        norma = np.linalg.norm(pesos)
+        return pesos / norma if norma else pesos
+
+    resultado = np.zeros((len(consultas), len(tenant_ids)))
+    for linha, consulta in enumerate(consultas):
+        q = vetor(Counter(tokenizar(consulta)))
+        for coluna, tenant_id in enumerate(tenant_ids):
+            if tenant_id in contagens:
+                resultado[linha, coluna] = q @ vetor(contagens[tenant_id])
+    return resultado
+
+
+@pytest.mark.parametrize('semente', range(5))
+def test_scores_iguais_ao_tfidf_denso(semente):
+    aleatorio = random.Random(semente)
+    perfis = {tenant_id: _texto(aleatorio) for tenant_id in range(1, 31)}
+    tenant_ids = list(range(0, 33))
+
+    scores = _motor(perfis).pontuar(CONSULTAS, tenant_ids)
+
+    assert np.allclose(scores, _referencia(perfis, CONSULTAS, tenant_ids))
+
+
+@pytest.mark.parametrize('semente', range(5))
+def test_indice_incremental_igual_ao_montado_do_zero(semente):
+    aleatorio = random.Random(semente)
+    perfis = {tenant_id: _texto(aleatorio) for tenant_id in range(1, 41)}
+    motor = _motor(perfis)
+    motor.pontuar(CONSULTAS, [1])  # matriz montada antes das alterações
+
+    for tenant_id in aleatorio.sample(sorted(perfis), 10):
+        perfis[tenant_id] = _texto(aleatorio)
+        motor.definir_perfil(tenant_id, perfis[tenant_id])
+    for tenant_id in aleatorio.sample(sorted(perfis), 10):
+        del perfis[tenant_id]
+        motor.remover(tenant_id)
+    for tenant_id in range(41, 46):
+        perfis[tenant_id] = _texto(aleatorio)
+        motor.definir_perfil(tenant_id, perfis[tenant_id])
+
+    tenant_ids = list(range(1, 46))
+    novo = _motor(perfis)
+    assert np.allclose(motor.pontuar(CONSULTAS, tenant_ids), novo.pontuar(CONSULTAS, tenant_ids))
+    assert (motor.possui(tenant_ids) == novo.possui(tenant_ids)).all()
+
+
+def test_termo_removido_de_todos_os_perfis_nao_pesa_na_consulta():
+    motor = _motor({1: 'notebook monitor', 2: 'detergente vassoura', 3: 'cimento'})
+    motor.remover(3)
+
+    consulta = ['notebook cimento']
+    assert np.allclose(motor.pontuar(consulta, [1, 2]),
+                       _motor({1: 'notebook monitor', 2: 'detergente vassoura'}).pontuar(consulta, [1, 2]))
+    assert motor.tenants_com_termos('cimento') == []
+
+
+def test_tenants_com_termos_apos_alteracoes():
+    motor = _motor({1: 'notebook monitor', 2: 'notebook teclado', 3: 'detergente'})
+    motor.definir_perfil(2, 'vassoura')
+    motor.remover(1)
+
+    assert motor.tenants_com_termos('notebook') == []
+    assert motor.tenants_com_termos('notebooks e vassouras') == [2]
+
+
+def test_tenant_sem_perfil_mantem_score_antigo():
+    motor = _motor({1: 'notebook monitor'})
+    matcher = OportunidadeMatcher(motor_keywords=motor)
+
+    scores = matcher._scores_keywords(['Aquisição de notebooks', 'Serviço de buffet'], [1, 2])
+
+    assert scores[0, 0] > 0 and scores[1, 0] == 0
+    assert (scores[:, 1] == KEYWORDS_SEM_PERFIL).all()
+
+
+def test_score_individual_igual_ao_lote():
+    motor = _motor({1: 'notebook monitor', 2: 'detergente', 3: 'notebook teclado teclado'})
+    matcher = OportunidadeMatcher(motor_keywords=motor)
+    edital = SimpleNamespace(objeto='Aquisição de notebooks',
+                             itens_extraidos=[{'descricao': 'Teclado ABNT2'}])
+
+    lote = matcher._scores_keywords([keywords.texto_edital(edital)], [1, 2, 3, 4])[0]
+
+    for tenant_id, score in zip([1, 2, 3, 4], lote):
+        tenant = SimpleNamespace(id=tenant_id)
+        assert matcher._calcular_match_keywords(edital, tenant) == pytest.approx(score)
+
+
+def test_exclusao_sai_do_motor_do_processo_e_troca_a_marca(monkeypatch, cache_local):
+    motor = _motor({1: 'notebook', 2: 'detergente'})
+    monkeypatch.setattr(keywords, '_motor', motor)
+    marca = cache_local.get(keywords.CHAVE_EXCLUSOES)
+
+    keywords.registrar_exclusao(1)
+
+    assert motor.possui([1, 2]).tolist() == [False, True]
+    assert cache_local.get(keywords.CHAVE_EXCLUSOES) != marca
+
+
+@pytest.mark.django_db
+def test_sincronizar_remove_tenants_excluidos_em_outro_processo(cache_local):
+    from core.tenancy.models import Tenant
+
+    Tenant.objects.bulk_create([
+        Tenant(id=tenant_id, name=f'Tenant {tenant_id}', schema_name=f'tenant_{tenant_id}',
+               cnpj=f'00.000.000/0001-0{tenant_id}', palavras_chave=['notebook'],
+               is_active=True, billing_status='active')
+        for tenant_id in (1, 2)
+    ])
+    motor = MotorKeywords()
+    keywords.sincronizar(motor)
+    assert motor.possui([1, 2]).tolist() == [True, True]
+
+    # Exclusão registrada por outro processo: este motor só vê a marca no cache
+    Tenant.objects.filter(id=1).delete()
+    cache_local.set(keywords.CHAVE_EXCLUSOES, 'outra-marca')
+    keywords.sincronizar(motor)
+
+    assert motor.possui([1, 2]).tolist() == [False, True]
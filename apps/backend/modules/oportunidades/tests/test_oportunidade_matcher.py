@@ -0,0 +1,76 @@
+"""
+Testes do OportunidadeMatcher: a API em lote reproduz o cálculo unitário.
+"""
+
+import random
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from modules.oportunidades.services.cnae import TabelaAfinidade
+from modules.oportunidades.services.keywords import MotorKeywords
+from modules.oportunidades.services.oportunidade_matcher import FeaturesTenants, OportunidadeMatcher
+
+TABELA = TabelaAfinidade({
+    'versao': 'teste',
+    'categorias': {'informatica': ['computador'], 'limpeza': [], 'obras': []},
+    'afinidades': {
+        '62': {'informatica': 1.0},
+        '4751': {'informatica': 0.8, 'limpeza': 0.1},
+        '47': {'limpeza': 0.4},
+        '42': {'obras': 0.9},
+    },
+})
+
+ITENS = [
+    {'categoria': 'informatica', 'descricao': 'notebook 16gb'},
+    {'subcategoria': 'computador', 'descricao': 'desktop'},
+    {'categoria': 'limpeza', 'descricao': 'detergente'},
+    {'categoria': 'obras', 'descricao': 'asfalto'},
+    {'categoria': 'desconhecida', 'descricao': 'buffet'},
+]
+
+
+def _tenant(aleatorio, tenant_id):
+    cnaes = aleatorio.sample(['6201500', '4751201', '4711302', '4211101', '0111301'], aleatorio.randint(0, 3))
+    return SimpleNamespace(
+        id=tenant_id,
+        uf=aleatorio.choice(['SP', 'RJ', '']),
+        municipio=aleatorio.choice(['Campinas', 'Niteroi']),
+        plan=aleatorio.choice(['free', 'basic', 'pro']),
+        cnae_principal=cnaes[0] if cnaes else '',
+        cnae_secundarios=cnaes[1:],
+    )
+
+
+def _edital(aleatorio):
+    return SimpleNamespace(
+        uf=aleatorio.choice(['SP', 'RJ', 'MG', '']),
+        municipio=aleatorio.choice(['Campinas', 'Niteroi', 'Ouro Preto']),
+        objeto=aleatorio.choice(['Aquisição de notebook', 'Serviço de limpeza', '']),
+        itens_extraidos=aleatorio.sample(ITENS, aleatorio.randint(0, 3)),
+        valor_estimado=aleatorio.choice([None, 0, 50000, 300000, 2000000]),
+    )
+
+
+@pytest.mark.parametrize('semente', range(3))
+def test_matriz_igual_ao_score_unitario(semente):
+    aleatorio = random.Random(semente)
+    tenants = [_tenant(aleatorio, tenant_id) for tenant_id in range(1, 31)]
+    editais = [_edital(aleatorio) for _ in range(15)]
+
+    motor = MotorKeywords()
+    for tenant in tenants[::2]:
+        motor.definir_perfil(tenant.id, aleatorio.choice(['notebook desktop', 'detergente limpeza']))
+    matcher = OportunidadeMatcher(motor_keywords=motor, tabela_cnae=TABELA)
+
+    matriz = matcher.calcular_matriz_scores(editais, FeaturesTenants.de_tenants(tenants))
+    esperado = np.array([[matcher.calcular_match_score(e, t) for t in tenants] for e in editais])
+    np.testing.assert_allclose(matriz, esperado, rtol=1e-6, atol=1e-9)
+
+
+def test_matriz_vazia():
+    matcher = OportunidadeMatcher(motor_keywords=MotorKeywords(), tabela_cnae=TABELA)
+    features = FeaturesTenants.de_tenants([])
+    assert matcher.calcular_matriz_scores([_edital(random.Random(0))], features).shape == (1, 0)
@@ -0,0 +1,50 @@
+"""
+Testes da unicidade de editais com a tabela particionada.
+"""
+
+import importlib
+from datetime import date
+
+import pytest
+
+from modules.oportunidades.models import Edital
+from modules.oportunidades.services import particoes
+
+
+def _unicidade(constraints):
+    return next(c for c in constraints if c.name == particoes.UNICIDADE)
+
+
+def test_modelo_declara_a_unicidade_criada_pela_conversao():
+    constraint = _unicidade(Edital._meta.constraints)
+    assert tuple(constraint.fields) == ('numero', 'ano', 'orgao', particoes.COLUNA)
+    assert not Edital._meta.unique_together
+
+
+def test_migracao_leva_o_estado_para_a_unicidade_do_modelo():
+    migracao = importlib.import_module('modules.oportunidades.migrations.0002_unicidade_particionada')
+    estado = migracao.Migration.operations[0].state_operations
+    constraint = _unicidade([op.constraint for op in estado if hasattr(op, 'constraint')])
+    assert constraint == _unicidade(Edital._meta.constraints)
+
+
+@pytest.mark.django_db
+def test_expiracao_da_particao_padrao_ignora_as_mensais(monkeypatch):
+    monkeypatch.setattr(particoes, 'listar_particoes', lambda: [
+        (particoes.nome_particao(date(2024, 3, 1)), date(2024, 3, 1), date(2024, 4, 1)),
+        (particoes.PARTICAO_DEFAULT, None, None),
+    ])
+    datas = [date(2023, 12, 5), date(2024, 2, 10), date(2024, 3, 2), date(2024, 3, 30), date(2025, 1, 1)]
+    Edital.objects.bulk_create([
+        Edital(numero=str(i), ano=data.year, objeto='Objeto', orgao='Órgão', uf='SP',
+               municipio='Campinas', modalidade='pregao_eletronico',
+               data_publicacao=data, data_abertura=data)
+        for i, data in enumerate(datas)
+    ])
+
+    expirados = particoes.editais_expirados_default(date(2024, 3, 25))
+
+    # Março sai com a partição quando ela expirar inteira; dezembro e fevereiro estão na DEFAULT
+    assert sorted(expirados.values_list('data_publicacao', flat=True)) == [
+        date(2023, 12, 5), date(2024, 2, 10)
+    ]
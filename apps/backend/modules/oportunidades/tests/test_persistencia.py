@@ -0,0 +1,114 @@
+"""
+Testes da conversão de valores do parser e da gravação de itens do edital.
+"""
+
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from modules.oportunidades.models import Edital, ItemEdital, OportunidadeTenant
+from modules.oportunidades.services.numeros import numero_br
+from modules.oportunidades.services.persistencia import (
+    _decimal, codigo_sem_numero, decimal_score, montar_itens, persistir_itens_e_documentos
+)
+
+
+@pytest.mark.parametrize('valor, esperado', [
+    ('1.000,50', Decimal('1000.50')),
+    ('1000.50', Decimal('1000.50')),
+    ('1000,5', Decimal('1000.50')),
+    ('1.234.567,89', Decimal('1234567.89')),
+    ('1.000.000', Decimal('1000000.00')),
+    ('1.000', Decimal('1000.00')),
+    ('12.500', Decimal('12500.00')),
+    ('2.5', Decimal('2.50')),
+    ('R$ 2.500,00', Decimal('2500.00')),
+    (1000.5, Decimal('1000.50')),
+    (12, Decimal('12.00')),
+])
+def test_decimal_formatos(valor, esperado):
+    assert _decimal(valor, 15) == esperado
+
+
+@pytest.mark.parametrize('valor', [None, '', 'abc', 'R$', 'nan', 'inf'])
+def test_decimal_invalido(valor):
+    assert _decimal(valor, 15) is None
+
+
+def test_decimal_fora_da_coluna():
+    assert _decimal('1.000.000,00', 5) is None
+    assert _decimal('999,99', 5) == Decimal('999.99')
+
+
+def test_decimal_score():
+    assert decimal_score(0.8765) == Decimal('0.88')
+
+
+@pytest.mark.parametrize('valor', ['1.000', '12.500', '1000.50', '1.000,50', '2.5', '1.234.567', '7'])
+def test_fallback_e_persistencia_leem_o_mesmo_numero(valor):
+    assert _decimal(valor, 15) == Decimal(str(numero_br(valor))).quantize(Decimal('0.01'))
+
+
+def test_itens_sem_codigo_nao_sao_renumerados():
+    itens = [
+        {'descricao': 'Caneta azul', 'unidade': 'un'},
+        {'descricao': 'Papel A4', 'unidade': 'resma'},
+    ]
+    antes = [item.codigo for item in montar_itens(None, itens)]
+
+    depois = montar_itens(None, [{'descricao': 'Grampeador', 'unidade': 'un'}] + itens)
+
+    assert [item.codigo for item in depois[1:]] == antes
+    assert antes[0] == codigo_sem_numero('  caneta   AZUL ', 'UN')
+
+
+def test_itens_repetidos_sem_codigo_sao_mantidos():
+    item = {'descricao': 'Cadeira', 'unidade': 'un'}
+
+    codigos = [objeto.codigo for objeto in montar_itens(None, [item, item])]
+
+    assert codigos == [codigo_sem_numero('Cadeira', 'un'), f"{codigo_sem_numero('Cadeira', 'un')}-2"]
+
+
+@pytest.mark.django_db
+def test_reprocessamento_preserva_itens_com_proposta():
+    from core.tenancy.models import Tenant
+    from modules.precificacao.models import ItemProposta
+
+    # bulk_create: sem os signals de indexação e sem criar o schema do tenant
+    tenant = Tenant.objects.bulk_create([Tenant(
+        schema_name='teste', name='Teste', cnpj='00.000.000/0001-00', razao_social='Teste',
+        cnae_principal='6201500', uf='SP', municipio='Campinas',
+    )])[0]
+    edital = Edital.objects.bulk_create([Edital(
+        numero='1', ano=2024, objeto='Material de escritório', orgao='Prefeitura', uf='SP',
+        municipio='Campinas', modalidade='pregao_eletronico',
+        data_publicacao=date(2024, 1, 10), data_abertura=date(2024, 1, 20),
+    )])[0]
+    oportunidade = OportunidadeTenant.objects.create(tenant=tenant, edital=edital)
+
+    persistir_itens_e_documentos(edital, [
+        {'codigo': '1', 'descricao': 'Caneta', 'quantidade': 10, 'unidade': 'un'},
+        {'codigo': '2', 'descricao': 'Papel', 'quantidade': 5, 'unidade': 'resma'},
+    ], [])
+    item = ItemEdital.objects.get(edital=edital, codigo='1')
+    proposta = ItemProposta.objects.create(
+        oportunidade=oportunidade, item_edital=item, descricao='Caneta',
+        unidade='un', quantidade=Decimal('10'),
+    )
+
+    resumo = persistir_itens_e_documentos(edital, [
+        {'codigo': '3', 'descricao': 'Grampeador', 'quantidade': 1, 'unidade': 'un'},
+    ], [])
+
+    assert resumo['inativados'] == 1
+    assert ItemProposta.objects.filter(pk=proposta.pk, item_edital_id=item.pk).exists()
+    ativos = dict(ItemEdital.objects.filter(edital=edital).values_list('codigo', 'ativo'))
+    assert ativos == {'1': False, '3': True}
+
+    # O item volta ao edital: reativado, com o mesmo id
+    persistir_itens_e_documentos(edital, [
+        {'codigo': '1', 'descricao': 'Caneta', 'quantidade': 10, 'unidade': 'un'},
+    ], [])
+    assert ItemEdital.objects.get(pk=item.pk).ativo
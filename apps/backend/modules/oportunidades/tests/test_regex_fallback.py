@@ -0,0 +1,130 @@
+"""
+Testes do extrator por regras: a varredura combinada equivale a um re.search por campo.
+"""
+
+import random
+import re
+
+import pytest
+
+from modules.oportunidades.services import regex_fallback
+from modules.oportunidades.services.regex_fallback import (
+    JANELA_METADADOS, PADROES_METADADOS, extrair_itens, extrair_metadados
+)
+
+CAMPOS = list(PADROES_METADADOS)
+
+EDITAIS = [
+    # Capa típica: "Pregão" abre tanto o número quanto a modalidade
+    "PREFEITURA MUNICIPAL DE EXEMPLO - SP\n"
+    "Município: Exemplo\n"
+    "Pregão Eletrônico nº 001/2024\n"
+    "Valor estimado: R$ 1.250.000,00\n",
+    # Campos fora da ordem do dicionário de padrões
+    "Valor global: 980.000,00\nConcorrência 12/2023\nSecretaria: Obras, Serviços\nRJ\n",
+    # Campo ausente (sem município nem valor)
+    "Edital nº PE-45/2025\nCâmara Municipal de Teste\nTomada de preços - MG\n",
+    # UF em minúsculas não conta; ano só aparece no fim
+    "Licitação n. 7\nOrçamento: 15.000\nuf: sp\nCidade: Santos, SP\nAno base 2022\n",
+    "",
+]
+
+LINHAS = [
+    "Pregão Presencial nº 33/2024", "Concorrência pública", "Leilão de bens inservíveis",
+    "Prefeitura de Curitiba", "Secretaria: Saúde", "Município: Londrina, PR",
+    "Valor máximo: 12.500,00", "Preço: 300", "Edital 2021/77", "Convite nº 2",
+    "Cidade: Recife", "PE", "BA", "exercício de 2020", "Item 1: cadeira",
+    "Declaração de idoneidade", "Entidade: Consórcio Intermunicipal", "sem metadados aqui",
+]
+
+
+def _legado(conteudo):
+    """Referência: um re.search por campo na mesma janela."""
+    conteudo = conteudo[:JANELA_METADADOS]
+    metadados = {}
+    for campo, padrao in PADROES_METADADOS.items():
+        match = re.search(padrao, conteudo, re.IGNORECASE)
+        if match:
+            metadados[campo] = match.group(campo).strip()
+    return metadados
+
+
+def _campos(metadados):
+    return {campo: metadados[campo] for campo in CAMPOS if campo in metadados and campo != 'ano'}
+
+
+@pytest.mark.parametrize('conteudo', EDITAIS)
+def test_varredura_combinada_equivale_a_busca_por_campo(conteudo):
+    esperado = _legado(conteudo)
+
+    metadados = extrair_metadados(conteudo)
+
+    assert _campos(metadados) == _campos(esperado)
+    if 'ano' in esperado:
+        assert metadados['ano'] == int(esperado['ano'])
+
+
+@pytest.mark.parametrize('semente', range(20))
+def test_varredura_combinada_equivale_em_editais_aleatorios(semente):
+    aleatorio = random.Random(semente)
+    conteudo = "\n".join(aleatorio.choices(LINHAS, k=aleatorio.randint(1, 12)))
+
+    assert _campos(extrair_metadados(conteudo)) == _campos(_legado(conteudo))
+
+
+def test_campos_coincidentes_na_mesma_posicao():
+    metadados = extrair_metadados("Pregão Eletrônico nº 001/2024")
+
+    assert metadados['numero'] == '001/2024'
+    assert metadados['modalidade'] == 'Pregão'
+    assert metadados['ano'] == 2024
+
+
+def test_varredura_para_quando_todos_os_campos_aparecem(monkeypatch):
+    capa = EDITAIS[0] + "Órgão: Fundo Municipal\n"
+    posicoes = []
+    compilar = regex_fallback._padrao_combinado
+
+    class Registro:
+        def __init__(self, padrao):
+            self.padrao = padrao
+
+        def search(self, conteudo, posicao):
+            match = self.padrao.search(conteudo, posicao)
+            posicoes.append(match.end() if match else len(conteudo))
+            return match
+
+    monkeypatch.setattr(regex_fallback, '_padrao_combinado', lambda campos: Registro(compilar(campos)))
+    metadados = extrair_metadados(capa + "SP 2030 " * 5000)
+
+    assert set(CAMPOS) <= set(metadados)
+    assert max(posicoes) <= len(capa)
+
+
+def test_metadados_apenas_na_janela():
+    conteudo = "x" * JANELA_METADADOS + "\nMunicípio: Distante\n"
+
+    assert 'municipio' not in extrair_metadados(conteudo)
+
+
+def test_itens_mantem_codigos_do_padrao_antigo():
+    conteudo = (
+        "Item 1: caneta esferográfica azul quantidade: 1.000 un\n"
+        "Lote 2. papel A4 75g\n"
+        "item 3 grampeador quantidade 12,5 cx\n"
+    )
+    antigo = re.compile(
+        r'(?:item|lote)\s*(\d+)[:.]?\s*([^:]+?)(?:\s*quantidade\s*:?\s*([\d.,]+)\s*([^\s]+))?',
+        re.IGNORECASE
+    )
+
+    itens = extrair_itens(conteudo)
+
+    assert [item['codigo'] for item in itens] == [m.group(1) for m in antigo.finditer(conteudo)]
+    # O padrão antigo capturava um único caractere de descrição; agora vai até o fim da linha
+    assert [item['descricao'] for item in itens] == [
+        'caneta esferográfica azul', 'papel A4 75g', 'grampeador'
+    ]
+    assert [(item['quantidade'], item['unidade']) for item in itens] == [
+        (1000.0, 'un'), (1.0, 'unidade'), (12.5, 'cx')
+    ]
@@ -0,0 +1,151 @@
+"""
+Testes da retenção: expurgo em lotes com arquivo frio e coleta de mídia órfã.
+"""
+
+import gzip
+import json
+import os
+import time
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+
+from modules.oportunidades.models import Edital, ItemEdital, OportunidadeTenant
+from modules.oportunidades.services import retencao
+from modules.oportunidades.services.retencao import arquivar_lote, coletar_midia_orfa, expurgar_editais
+
+
+@pytest.fixture
+def storage(tmp_path, monkeypatch):
+    storage = FileSystemStorage(location=str(tmp_path))
+    monkeypatch.setattr(retencao, 'default_storage', storage)
+    return storage
+
+
+@pytest.fixture
+def tenant():
+    from core.tenancy.models import Tenant
+
+    # bulk_create: sem os signals de indexação e sem criar o schema do tenant
+    return Tenant.objects.bulk_create([Tenant(
+        schema_name='teste', name='Teste', cnpj='00.000.000/0001-00', razao_social='Teste',
+        cnae_principal='6201500', uf='SP', municipio='Campinas',
+    )])[0]
+
+
+def _editais(quantidade, **campos):
+    editais = Edital.objects.bulk_create([
+        Edital(numero=str(i), ano=2020, objeto=f'Objeto {i}', orgao='Prefeitura', uf='SP',
+               municipio='Campinas', modalidade='pregao_eletronico',
+               data_publicacao=date(2020, 1, 10), data_abertura=date(2020, 1, 20), **campos)
+        for i in range(quantidade)
+    ])
+    for edital in editais:
+        ItemEdital.objects.create(edital=edital, codigo='1', descricao='Caneta',
+                                  quantidade=Decimal('10'), unidade='un')
+    return editais
+
+
+def _pacotes(storage):
+    schemas, _ = storage.listdir(retencao.PREFIXO_ARQUIVO)
+    return [
+        f"{retencao.PREFIXO_ARQUIVO}/{schema}/{nome}"
+        for schema in schemas for nome in storage.listdir(f"{retencao.PREFIXO_ARQUIVO}/{schema}")[1]
+    ]
+
+
+def _ler_pacote(storage, caminho):
+    with storage.open(caminho) as arquivo:
+        return [json.loads(linha) for linha in gzip.decompress(arquivo.read()).splitlines()]
+
+
+@pytest.mark.django_db
+def test_expurgo_arquiva_e_exclui_em_lotes(storage, tenant):
+    editais = _editais(3)
+    OportunidadeTenant.objects.create(tenant=tenant, edital=editais[0])
+
+    resumo = expurgar_editais(Edital.objects.all(), lote=2, pausa=0, arquivar=True)
+
+    assert resumo == {'editais': 3, 'linhas': 7, 'pacotes': 2}
+    assert not Edital.objects.exists() and not ItemEdital.objects.exists()
+    arquivados = [registro for caminho in _pacotes(storage) for registro in _ler_pacote(storage, caminho)]
+    assert sorted(registro['id'] for registro in arquivados) == sorted(e.id for e in editais)
+    assert all(len(registro['itens']) == 1 for registro in arquivados)
+    assert sum(len(registro['oportunidades']) for registro in arquivados) == 1
+
+
+@pytest.mark.django_db
+def test_edital_com_proposta_nao_expira(storage, tenant):
+    from modules.precificacao.models import ItemProposta
+
+    editais = _editais(2)
+    oportunidade = OportunidadeTenant.objects.create(tenant=tenant, edital=editais[0])
+    ItemProposta.objects.create(
+        oportunidade=oportunidade, item_edital=editais[0].itens.get(), descricao='Caneta',
+        unidade='un', quantidade=Decimal('10'),
+    )
+
+    resumo = expurgar_editais(Edital.objects.all(), pausa=0, arquivar=True)
+
+    assert resumo['editais'] == 1
+    assert list(Edital.objects.values_list('id', flat=True)) == [editais[0].id]
+    assert ItemProposta.objects.filter(oportunidade=oportunidade).exists()
+    assert [registro['id'] for registro in _ler_pacote(storage, _pacotes(storage)[0])] == [editais[1].id]
+
+
+@pytest.mark.django_db
+def test_manter_editais_exclui_so_os_dependentes(storage, tenant):
+    editais = _editais(2)
+    OportunidadeTenant.objects.create(tenant=tenant, edital=editais[1])
+
+    resumo = expurgar_editais(Edital.objects.all(), pausa=0, arquivar=False, manter_editais=True)
+
+    assert resumo == {'editais': 2, 'linhas': 3, 'pacotes': 0}
+    assert Edital.objects.count() == 2
+    assert not ItemEdital.objects.exists() and not OportunidadeTenant.objects.exists()
+
+
+@pytest.mark.django_db
+def test_reexecucao_nao_grava_pacote_repetido(storage):
+    ids = [edital.id for edital in _editais(2)]
+
+    primeiro = arquivar_lote(ids)
+    segundo = arquivar_lote(ids)
+
+    assert primeiro == segundo
+    assert _pacotes(storage) == [primeiro]
+
+    # Conteúdo diferente (um item novo) vai para outro pacote
+    ItemEdital.objects.create(edital_id=ids[0], codigo='2', descricao='Papel',
+                              quantidade=Decimal('5'), unidade='resma')
+    assert arquivar_lote(ids) != primeiro
+
+
+def _gravar(storage, nome, horas_atras):
+    caminho = storage.save(nome, ContentFile(b'conteudo'))
+    momento = time.time() - horas_atras * 3600
+    os.utime(storage.path(caminho), (momento, momento))
+    return caminho
+
+
+@pytest.mark.django_db
+def test_coleta_remove_so_midia_orfa_fora_da_carencia(storage):
+    referenciado = _gravar(storage, 'editais/originais/2020/usado.pdf', 48)
+    orfao = _gravar(storage, 'editais/originais/2020/orfao.pdf', 48)
+    recente = _gravar(storage, 'editais/originais/novo.pdf', 1)
+    texto_usado = _gravar(storage, f"editais/textos/ab/{'a' * 64}.txt.gz", 48)
+    texto_orfao = _gravar(storage, f"editais/textos/cd/{'b' * 64}.txt.gz", 48)
+    Edital.objects.bulk_create([Edital(
+        numero='1', ano=2020, objeto='Objeto', orgao='Prefeitura', uf='SP', municipio='Campinas',
+        modalidade='pregao_eletronico', data_publicacao=date(2020, 1, 10),
+        data_abertura=date(2020, 1, 20), arquivo_original=referenciado, arquivo_sha256='a' * 64,
+    )])
+
+    removidos = coletar_midia_orfa(lote=2)
+
+    assert removidos == 2
+    assert not storage.exists(orfao) and not storage.exists(texto_orfao)
+    assert all(storage.exists(nome) for nome in (referenciado, recente, texto_usado))
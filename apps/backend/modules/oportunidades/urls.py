@@ -0,0 +1,9 @@
+from django.urls import path
+from . import views
+
+app_name = 'oportunidades'
+
+urlpatterns = [
+    # Busca de editais
+    path('editais/busca/', views.BuscaEditaisView.as_view(), name='busca_editais'),
+]
@@ -0,0 +1,37 @@
+from rest_framework import generics
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from .serializers import BuscaEditaisParamsSerializer, EditalBuscaSerializer
+from .services.busca import BuscaEditais
+
+class BuscaEditaisView(generics.GenericAPIView):
+    """Busca textual ranqueada de editais, com facetas por UF, modalidade e valor"""
+    permission_classes = [IsAuthenticated]
+    serializer_class = EditalBuscaSerializer
+    
+    def get(self, request):
+        params = BuscaEditaisParamsSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        dados = params.validated_data
+        
+        busca = BuscaEditais(
+            termo=dados['q'],
+            orgao=dados['orgao'],
+            uf=dados['uf'],
+            modalidade=dados['modalidade'],
+            valor_min=dados.get('valor_min'),
+            valor_max=dados.get('valor_max'),
+        )
+        facetas = busca.facetas()
+        
+        inicio = (dados['pagina'] - 1) * dados['tamanho']
+        editais = busca.resultados()[inicio:inicio + dados['tamanho']]
+        
+        return Response({
+            'total': busca.total(facetas),
+            'pagina': dados['pagina'],
+            'tamanho': dados['tamanho'],
+            'resultados': self.get_serializer(editais, many=True).data,
+            'facetas': facetas,
+        })
@@ -12,6 +12,18 @@ SELECT 'CREATE DATABASE unleash' WHERE NOT EXISTS (SELECT FROM pg_database WHERE
 -- Cria extensões necessárias
 CREATE EXTENSION IF NOT EXISTS "uuid-ossp";
 CREATE EXTENSION IF NOT EXISTS "pg_trgm";
+CREATE EXTENSION IF NOT EXISTS "unaccent";
+
+-- Configuração de busca textual em português sem acentos (EDITAL_BUSCA_CONFIG)
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT FROM pg_catalog.pg_ts_config WHERE cfgname = 'portuguese_unaccent') THEN
+        CREATE TEXT SEARCH CONFIGURATION portuguese_unaccent (COPY = portuguese);
+        ALTER TEXT SEARCH CONFIGURATION portuguese_unaccent
+            ALTER MAPPING FOR hword, hword_part, word WITH unaccent, portuguese_stem;
+    END IF;
+END
+$$;
 
 -- Cria usuário para o aplicativo se não existir
 DO $$